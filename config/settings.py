@@ -40,16 +40,25 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'widget_tweaks',
     'productos',
+    'tareas',
+    'rendimiento',
 ]
 
 MIDDLEWARE = [
+    # /healthz y /readyz contestan antes que sesiones y autenticación
+    'rendimiento.arranque.SaludMiddleware',
+    # Mide todo lo que sigue y sirve /metrics (rendimiento/metricas.py)
+    'rendimiento.metricas.MetricasMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Comprime al final de la respuesta: va antes que todo lo que modifica el cuerpo
+    'rendimiento.respuestas.CompresionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'productos.tiendas.TiendaMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -131,4 +140,14 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('productos:login')
 LOGIN_REDIRECT_URL = reverse_lazy('productos:index')
-LOGOUT_REDIRECT_URL = reverse_lazy('productos:index')
\ No newline at end of file
+LOGOUT_REDIRECT_URL = reverse_lazy('productos:index')
+
+# Tienda (código) de los requests cuyo host no es el dominio de ninguna tienda, y de las
+# filas creadas fuera de un request. None: esos requests responden 404 (productos/tiendas.py)
+TIENDA_POR_DEFECTO = 'principal'
+# Header con el código de tienda, solo si lo pone un proxy interno que descarta el del cliente
+TIENDA_HEADER = None
+
+# Perfil de rendimiento: DJANGO_PERFIL=dev (por defecto), bench o prod (rendimiento/perfiles.py)
+from rendimiento.perfiles import aplicar_perfil  # noqa: E402
+aplicar_perfil(globals())
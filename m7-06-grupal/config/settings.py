@@ -35,10 +35,18 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'voluntariado',
+    'tareas',
+    'rendimiento',
 ]
 
 MIDDLEWARE = [
+    # /healthz y /readyz contestan antes que sesiones y autenticación
+    'rendimiento.arranque.SaludMiddleware',
+    # Mide todo lo que sigue y sirve /metrics (rendimiento/metricas.py)
+    'rendimiento.metricas.MetricasMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Comprime al final de la respuesta: va antes que todo lo que modifica el cuerpo
+    'rendimiento.respuestas.CompresionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -118,3 +126,16 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Correo: en desarrollo los mensajes se escriben como archivos en correos/
+# (los tests usan el backend locmem de Django automáticamente)
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_FILE_PATH = BASE_DIR / 'correos'
+DEFAULT_FROM_EMAIL = 'voluntariado@ejemplo.com'
+# Los tiempos por lote de los avisos (voluntariado/notificaciones.py) se
+# registran en INFO aunque el perfil bench/prod deje el resto en WARNING
+RENDIMIENTO_LOGS_INFO = ['voluntariado.notificaciones']
+
+# Perfil de rendimiento: DJANGO_PERFIL=dev (por defecto), bench o prod (rendimiento/perfiles.py)
+from rendimiento.perfiles import aplicar_perfil  # noqa: E402
+aplicar_perfil(globals())
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from rendimiento import consultas_lentas as lentas
+
+
+class Command(BaseCommand):
+    help = (
+        'Consultas lentas registradas (rendimiento/consultas_lentas.py), agrupadas por forma: '
+        'veces, tiempo, vistas, la línea del proyecto que las hizo y las alertas del plan '
+        '(recorridos completos, tablas temporales, índices que faltan).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limite', type=int, default=20)
+        parser.add_argument('--plan', action='store_true', help='Muestra también el plan completo')
+        parser.add_argument('--vaciar', action='store_true', help='Vacía el buffer después de mostrarlo')
+
+    def handle(self, *args, **options):
+        grupos = lentas.resumen()
+        self.stdout.write(f'{len(grupos)} forma(s) de consulta sobre {lentas.configuracion()["UMBRAL_MS"]} ms')
+        for grupo in grupos[:options['limite']]:
+            self.stdout.write(
+                f'\n{grupo["veces"]} {"vez" if grupo["veces"] == 1 else "veces"}, {grupo["total_ms"]:.1f} ms en total, máx {grupo["max_ms"]:.1f} ms'
+                f' - {", ".join(grupo["vistas"])}'
+            )
+            for linea in grupo['pila']:
+                self.stdout.write(f'  {linea}')
+            for alerta in grupo['alertas']:
+                self.stdout.write(self.style.WARNING(f'  ! {alerta}'))
+            self.stdout.write(f'  {grupo["sql"][:300]}')
+            if options['plan'] and grupo['plan']:
+                for fila in grupo['plan']:
+                    self.stdout.write(f'    {fila}')
+        if options['vaciar']:
+            lentas.vaciar()
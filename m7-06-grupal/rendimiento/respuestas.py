@@ -0,0 +1,196 @@
+# rendimiento/respuestas.py
+"""
+Respuestas más livianas: compresión y GET condicional por versión de modelos.
+
+`CompresionMiddleware` reemplaza a GZipMiddleware. Usa Brotli si el paquete
+está instalado y el cliente lo acepta (comprime el HTML un 15-20 % más que
+gzip), si no gzip. No comprime respuestas de menos de MINIMO bytes (los
+encabezados y la CPU no compensan), tipos que ya vienen comprimidos (solo
+los de TIPOS) ni las vistas marcadas con `@sin_compresion`. gzip lleva el
+relleno aleatorio de Django contra BREACH; el token CSRF, además, va
+enmascarado distinto en cada respuesta.
+
+`@condicion(Producto, Stock, ...)` hace el GET condicional de una vista con
+un ETag débil que sale de las versiones de esos modelos (versiones.py), de
+quién pide y de `extra(request)` si hace falta (p. ej. la tienda). Calcularlo
+es una lectura de la caché: con If-None-Match igual se contesta 304 sin
+consultar la base ni renderizar, cosa que ConditionalGetMiddleware no logra
+porque hashea el cuerpo ya renderizado. Si hay mensajes pendientes no se
+contesta 304, para no esconderlos.
+
+Encabezados de caché: anónimo sin cookies nuevas, `public` con
+revalidación; con sesión iniciada, `private, no-cache`. Siempre
+`Vary: Cookie`, así una caché compartida no le da a un usuario la página de
+otro.
+
+Configuración en settings.RENDIMIENTO_COMPRESION (se mezcla con
+POR_DEFECTO).
+"""
+from functools import wraps
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+from django.views.decorators.http import condition
+
+from .versiones import versiones
+
+try:
+    import brotli
+except ImportError:  # Brotli es opcional: sin el paquete se usa gzip
+    brotli = None
+
+
+POR_DEFECTO = {
+    # Bytes: por debajo de esto no se comprime
+    'MINIMO': 1024,
+    # 0-11; 4-5 es el punto en que Brotli ya le gana a gzip 6 sin gastar mucha más CPU
+    'NIVEL_BROTLI': 5,
+    'TIPOS': ('text/', 'application/json', 'application/javascript', 'application/xml', 'image/svg+xml'),
+}
+# Igual que GZipMiddleware
+MAX_BYTES_ALEATORIOS = 100
+
+
+def configuracion():
+    return {**POR_DEFECTO, **getattr(settings, 'RENDIMIENTO_COMPRESION', {})}
+
+
+def codificaciones_aceptadas(cabecera):
+    """Codificaciones de un Accept-Encoding, sin las rechazadas con q=0."""
+    aceptadas = set()
+    for parte in cabecera.split(','):
+        nombre, _, parametros = parte.partition(';')
+        parametros = parametros.strip().lower()
+        if parametros.startswith('q='):
+            try:
+                if float(parametros[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        aceptadas.add(nombre.strip().lower())
+    return aceptadas
+
+
+def _brotli_secuencia(secuencia, nivel):
+    compresor = brotli.Compressor(quality=nivel)
+    for parte in secuencia:
+        datos = compresor.process(parte) + compresor.flush()
+        if datos:
+            yield datos
+    yield compresor.finish()
+
+
+class CompresionMiddleware:
+    """Brotli o gzip según Accept-Encoding, con tamaño mínimo y tipos comprimibles."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        conf = configuracion()
+        self.minimo = conf['MINIMO']
+        self.nivel_brotli = conf['NIVEL_BROTLI']
+        self.tipos = tuple(conf['TIPOS'])
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if getattr(response, 'sin_compresion', False) or response.has_header('Content-Encoding'):
+            return response
+        if not response.get('Content-Type', '').startswith(self.tipos):
+            return response
+        if not response.streaming and len(response.content) < self.minimo:
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        aceptadas = codificaciones_aceptadas(request.headers.get('Accept-Encoding', ''))
+        if brotli is not None and 'br' in aceptadas:
+            codificacion = 'br'
+        elif 'gzip' in aceptadas:
+            codificacion = 'gzip'
+        else:
+            return response
+
+        if response.streaming:
+            if codificacion == 'br':
+                response.streaming_content = _brotli_secuencia(response.streaming_content, self.nivel_brotli)
+            else:
+                response.streaming_content = compress_sequence(
+                    response.streaming_content, max_random_bytes=MAX_BYTES_ALEATORIOS,
+                )
+            del response.headers['Content-Length']
+        else:
+            if codificacion == 'br':
+                comprimido = brotli.compress(response.content, quality=self.nivel_brotli)
+            else:
+                comprimido = compress_string(response.content, max_random_bytes=MAX_BYTES_ALEATORIOS)
+            if len(comprimido) >= len(response.content):
+                return response
+            response.content = comprimido
+            response.headers['Content-Length'] = str(len(comprimido))
+
+        # El cuerpo ya no es idéntico byte a byte: un ETag fuerte pasa a débil
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = codificacion
+        return response
+
+
+def sin_compresion(vista):
+    """La respuesta de `vista` sale sin comprimir (ya comprimida, o muy chica para que valga la pena)."""
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        response = vista(request, *args, **kwargs)
+        response.sin_compresion = True
+        return response
+    return envoltura
+
+
+def _visitante(request):
+    usuario = getattr(request, 'user', None)
+    return f'u{usuario.pk}' if usuario is not None and usuario.is_authenticated else 'anonimo'
+
+
+def _mensajes_pendientes(request):
+    # len() no marca los mensajes como leídos, iterarlos sí
+    almacen = getattr(request, '_messages', None)
+    return almacen is not None and len(almacen) > 0
+
+
+def encabezados_de_cache(request, response, max_age=0):
+    """Cache-Control público para anónimos y privado para usuarios con sesión, con Vary: Cookie."""
+    if response.status_code not in (200, 304):
+        return response
+    usuario = getattr(request, 'user', None)
+    if (usuario is not None and usuario.is_authenticated) or response.cookies:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, public=True, max_age=max_age, must_revalidate=True)
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def condicion(*modelos, extra=None, max_age=0):
+    """
+    GET condicional para una vista cuyo contenido depende solo de `modelos`
+    (y de `extra(request)`, si se pasa). `max_age` son los segundos que un
+    anónimo puede reusar la respuesta sin revalidar.
+    """
+    def etag(request, *args, **kwargs):
+        if _mensajes_pendientes(request):
+            return None
+        numeros = versiones(*modelos)
+        if None in numeros:
+            return None  # un ETag fijo contestaría 304 con datos viejos para siempre
+        partes = [_visitante(request), *map(str, numeros)]
+        if extra is not None:
+            partes.append(str(extra(request)))
+        return 'W/"%s"' % hashlib.blake2b('|'.join(partes).encode(), digest_size=12).hexdigest()
+
+    def decorador(vista):
+        condicional = condition(etag_func=etag)(vista)
+
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            return encabezados_de_cache(request, condicional(request, *args, **kwargs), max_age)
+        return envoltura
+    return decorador
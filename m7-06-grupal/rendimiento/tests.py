@@ -0,0 +1,328 @@
+import gzip
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock, skipIf
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from . import arranque, consultas_lentas, metricas
+from .importaciones import de_la_app, hijos, leer_importtime, por_paquete
+from .perfiles import aplicar_perfil, problemas
+from .respuestas import CompresionMiddleware, brotli, condicion, sin_compresion
+from .versiones import versiones, vigilar
+
+
+HTML = ('<tr><td>Producto</td><td>$10.00</td><td>5</td></tr>\n' * 100).encode()
+
+
+class CompresionTests(TestCase):
+
+    def setUp(self):
+        self.fabrica = RequestFactory()
+
+    def _respuesta(self, contenido=HTML, tipo='text/html; charset=utf-8', vista=None, **encabezados):
+        vista = vista or (lambda request: HttpResponse(contenido, content_type=tipo))
+        return CompresionMiddleware(vista)(self.fabrica.get('/', headers=encabezados))
+
+    def test_gzip_con_umbral_y_tipos(self):
+        response = self._respuesta(**{'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(response.content), HTML)
+        self.assertLess(int(response['Content-Length']), len(HTML) / 5)
+
+        self.assertFalse(self._respuesta(HTML[:500], **{'Accept-Encoding': 'gzip'}).has_header('Content-Encoding'))
+        self.assertFalse(self._respuesta(tipo='image/png', **{'Accept-Encoding': 'gzip'}).has_header('Content-Encoding'))
+        self.assertFalse(self._respuesta(**{'Accept-Encoding': 'gzip;q=0'}).has_header('Content-Encoding'))
+        vista = sin_compresion(lambda request: HttpResponse(HTML))
+        self.assertFalse(self._respuesta(vista=vista, **{'Accept-Encoding': 'gzip'}).has_header('Content-Encoding'))
+
+    @override_settings(RENDIMIENTO_COMPRESION={'MINIMO': 100000})
+    def test_umbral_configurable(self):
+        self.assertFalse(self._respuesta(**{'Accept-Encoding': 'gzip'}).has_header('Content-Encoding'))
+
+    @skipIf(brotli is None, 'Brotli no está instalado')
+    def test_brotli_antes_que_gzip(self):
+        response = self._respuesta(**{'Accept-Encoding': 'gzip, br'})
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), HTML)
+
+
+class CondicionTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        vigilar(User)
+        self.fabrica = RequestFactory()
+        self.renderizados = 0
+
+        @condicion(User)
+        def vista(request):
+            self.renderizados += 1
+            return HttpResponse(HTML)
+        self.vista = vista
+
+    def _get(self, usuario=None, **encabezados):
+        request = self.fabrica.get('/', headers=encabezados)
+        request.user = usuario or AnonymousUser()
+        return self.vista(request)
+
+    def test_304_hasta_que_cambia_el_modelo(self):
+        etag = self._get()['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        response = self._get(**{'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.renderizados, 1)
+
+        version = versiones(User)
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create(username='nuevo')
+        self.assertEqual(versiones(User), [version[0] + 1])
+        response = self._get(**{'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+    def test_sin_versiones_no_hay_etag(self):
+        self.assertEqual(versiones(User), [None])
+        response = self._get()
+        self.assertNotIn('ETag', response)
+        response = self._get(**{'If-None-Match': '*'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.renderizados, 2)
+
+    def test_encabezados_anonimo_y_con_sesion(self):
+        anonimo = self._get()
+        self.assertIn('public', anonimo['Cache-Control'])
+        self.assertIn('Cookie', anonimo['Vary'])
+        usuario = User.objects.create(username='ana')
+        con_sesion = self._get(usuario)
+        self.assertIn('private', con_sesion['Cache-Control'])
+        self.assertIn('Cookie', con_sesion['Vary'])
+        self.assertNotEqual(con_sesion['ETag'], anonimo['ETag'])
+        # El ETag de un anónimo no sirve para el usuario
+        self.assertEqual(self._get(usuario, **{'If-None-Match': anonimo['ETag']}).status_code, 200)
+
+
+class PerfilesTests(TestCase):
+
+    def _ajustes(self):
+        return {
+            'BASE_DIR': Path('/srv/proyecto'),
+            'DEBUG': True,
+            'DATABASES': {'default': {'ENGINE': 'django.db.backends.mysql', 'NAME': 'x'}},
+            'TEMPLATES': [{
+                'BACKEND': 'django.template.backends.django.DjangoTemplates',
+                'DIRS': [], 'APP_DIRS': True, 'OPTIONS': {},
+            }],
+        }
+
+    def test_dev_no_cambia_nada(self):
+        ajustes = self._ajustes()
+        self.assertEqual(aplicar_perfil(ajustes, 'dev'), 'dev')
+        self.assertEqual({k: v for k, v in ajustes.items() if k != 'PERFIL'}, self._ajustes())
+
+    def test_bench(self):
+        ajustes = self._ajustes()
+        aplicar_perfil(ajustes, 'bench')
+        self.assertFalse(ajustes['DEBUG'])
+        self.assertEqual(ajustes['DATABASES']['default']['CONN_MAX_AGE'], 60)
+        plantillas = ajustes['TEMPLATES'][0]
+        self.assertNotIn('APP_DIRS', plantillas)
+        self.assertEqual(plantillas['OPTIONS']['loaders'][0][0], 'django.template.loaders.cached.Loader')
+        self.assertIn('django.template.loaders.app_directories.Loader', plantillas['OPTIONS']['loaders'][0][1])
+        self.assertEqual(ajustes['SESSION_ENGINE'], 'django.contrib.sessions.backends.cached_db')
+        self.assertEqual(ajustes['LOGGING']['root']['level'], 'WARNING')
+
+    def test_loggers_en_info(self):
+        ajustes = {**self._ajustes(), 'RENDIMIENTO_LOGS_INFO': ['app.envios']}
+        aplicar_perfil(ajustes, 'bench')
+        self.assertEqual(ajustes['LOGGING']['loggers']['app.envios']['level'], 'INFO')
+        self.assertEqual(ajustes['LOGGING']['root']['level'], 'WARNING')
+
+    def test_prod_exige_entorno_y_cache_compartida(self):
+        with mock.patch.dict(os.environ, {}, clear=True), self.assertRaises(ImproperlyConfigured):
+            aplicar_perfil(self._ajustes(), 'prod')
+        with self.assertRaises(ImproperlyConfigured):
+            aplicar_perfil(self._ajustes(), 'produccion')
+        entorno = {'DJANGO_SECRET_KEY': 's' * 50, 'DJANGO_ALLOWED_HOSTS': 'a.cl,b.cl'}
+        # Sin Redis no arranca: no hay otra caché compartida con incr atómico
+        with mock.patch.dict(os.environ, entorno, clear=True), self.assertRaisesMessage(ImproperlyConfigured, 'REDIS_URL'):
+            aplicar_perfil(self._ajustes(), 'prod')
+        ajustes = self._ajustes()
+        with mock.patch.dict(os.environ, {**entorno, 'REDIS_URL': 'redis://cache:6379/0'}, clear=True):
+            aplicar_perfil(ajustes, 'prod')
+        self.assertEqual(ajustes['ALLOWED_HOSTS'], ['a.cl', 'b.cl'])
+        self.assertEqual(ajustes['CACHES']['default'], {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache:6379/0',
+        })
+        self.assertIn('Manifest', ajustes['STORAGES']['staticfiles']['BACKEND'])
+
+    @override_settings(
+        PERFIL='prod', DEBUG=True,
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    )
+    def test_problemas(self):
+        codigos = [codigo for codigo, _ in problemas()]
+        self.assertIn('R001', codigos)
+        self.assertIn('R005', codigos)
+        self.assertNotIn('R009', codigos)
+        archivos = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp'}}
+        with self.settings(CACHES=archivos):
+            self.assertIn('R014', [codigo for codigo, _ in problemas()])
+
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       900 |        900 |     numpy.core
+import time:      4100 |       5000 |   numpy
+import time:      1200 |       6200 | productos.recomendaciones
+import time:       300 |        300 |   productos.tiendas
+import time:       500 |        800 | productos.views
+"""
+
+
+class ImportacionesTests(TestCase):
+
+    def test_leer_importtime(self):
+        importaciones = leer_importtime(IMPORTTIME)
+        self.assertEqual([i.modulo for i in importaciones][:3], ['numpy.core', 'numpy', 'productos.recomendaciones'])
+        self.assertEqual([i.profundidad for i in importaciones], [2, 1, 0, 1, 0])
+        arbol = hijos(importaciones)
+        self.assertEqual([i.modulo for i in arbol['productos.recomendaciones']], ['numpy'])
+        self.assertEqual([i.modulo for i in arbol['productos.views']], ['productos.tiendas'])
+        self.assertEqual(por_paquete(importaciones), {'numpy': 5000, 'productos': 2000})
+        self.assertEqual([i.modulo for i in de_la_app(importaciones, 'productos')][0], 'productos.recomendaciones')
+
+
+class ArranqueTests(TestCase):
+
+    def test_healthz_no_pasa_por_el_resto_del_stack(self):
+        with self.assertNumQueries(0):
+            response = self.client.get('/healthz', headers={'Host': '10.0.0.5'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'no-store')
+        self.assertFalse(response.cookies)
+
+    def test_readyz_espera_el_precalentamiento(self):
+        with mock.patch.dict(arranque._estado, listo=False):
+            self.assertEqual(self.client.get('/readyz').status_code, 503)
+        with mock.patch.dict(arranque._estado, listo=True):
+            self.assertEqual(self.client.get('/readyz').content, b'ok')
+
+    def test_precalentar_sigue_si_un_paso_falla(self):
+        llamadas = []
+
+        def falla():
+            raise RuntimeError('sin base')
+
+        with mock.patch.object(arranque, '_funciones', []):
+            arranque.al_precalentar(falla)
+            arranque.al_precalentar(lambda: llamadas.append(1))
+            with self.assertLogs('rendimiento.arranque', 'ERROR'):
+                tiempos = arranque.precalentar()
+        self.assertEqual(llamadas, [1])
+        self.assertEqual(list(tiempos)[:2], ['urls', 'plantillas'])
+        self.assertEqual(len(tiempos), 4)
+
+
+class MetricasTests(TestCase):
+
+    def setUp(self):
+        parche = mock.patch.dict(metricas._estado, almacen=metricas._Memoria(), pid=os.getpid())
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def test_histograma_exporta_cubetas_acumuladas(self):
+        for segundos in (0.003, 0.02, 0.02, 30):
+            metricas.DURACION_REQUEST.observar(segundos, view='productos:lista', method='GET')
+        with self.assertRaises(ValueError):
+            metricas.DURACION_REQUEST.observar(1, view='productos:lista')
+        texto = metricas.exportar()
+        self.assertIn('# TYPE django_http_request_duration_seconds histogram', texto)
+        serie = 'django_http_request_duration_seconds_bucket{method="GET",view="productos:lista",le="%s"} %d'
+        self.assertIn(serie % ('0.005', 1), texto)
+        self.assertIn(serie % ('0.025', 3), texto)
+        self.assertIn(serie % ('10.0', 3), texto)
+        self.assertIn(serie % ('+Inf', 4), texto)
+        self.assertIn('django_http_request_duration_seconds_count{method="GET",view="productos:lista"} 4', texto)
+
+    def test_procesos_suman_en_el_directorio(self):
+        directorio = self.enterContext(tempfile.TemporaryDirectory())
+        clave = metricas._clave('django_http_requests_total', '', {'view': 'a', 'method': 'GET', 'status': '200'})
+        with mock.patch.object(metricas, 'TAMANO_INICIAL', 64):
+            for pid, cantidad in ((101, 2), (102, 3)):
+                archivo = metricas._Archivo(Path(directorio) / f'metricas_{pid}.db')
+                for i in range(20):
+                    archivo.sumar(f'relleno{i}', 1)  # obliga a agrandar el archivo
+                archivo.sumar(clave, cantidad)
+                archivo.cerrar()
+        with override_settings(RENDIMIENTO_METRICAS={'DIRECTORIO': directorio}):
+            self.assertEqual(metricas.valores()[clave], 5)
+            metricas.archivar(directorio, 101)
+            self.assertFalse((Path(directorio) / 'metricas_101.db').exists())
+            self.assertEqual(metricas.valores()[clave], 5)
+            self.assertEqual(metricas.valores()['relleno0'], 2)
+
+    def test_requests_consultas_y_escrituras(self):
+        url = reverse('admin:login')
+        self.client.get(url)
+        User.objects.create(username='ana')
+        with override_settings(RENDIMIENTO_METRICAS={'TOKEN': 'secreto'}):
+            texto = self.client.get('/metrics', headers={'Authorization': 'Bearer secreto'}).content.decode()
+        self.assertIn('django_http_requests_total{method="GET",status="200",view="admin:login"} 1', texto)
+        self.assertIn('django_model_writes_total{model="auth.User",operation="insert"} 1', texto)
+        self.assertIn('django_db_query_duration_seconds_count{alias="default",view="-"}', texto)
+
+    def test_metrics_exige_token_o_ip_configurada(self):
+        # Detrás de un proxy local todo llega desde 127.0.0.1: no basta con eso
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+        with override_settings(RENDIMIENTO_METRICAS={'TOKEN': 'secreto'}):
+            self.assertEqual(self.client.get('/metrics', headers={'Authorization': 'Bearer otro'}).status_code, 404)
+            self.assertEqual(self.client.get('/metrics', headers={'Authorization': 'secreto'}).status_code, 404)
+            self.assertEqual(self.client.get('/metrics', headers={'Authorization': 'bearer secreto'}).status_code, 200)
+        with override_settings(RENDIMIENTO_METRICAS={'IPS': ['10.0.0.5']}):
+            self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.0.0.5').status_code, 200)
+            self.assertEqual(self.client.get('/metrics', headers={'Authorization': 'Bearer '}).status_code, 404)
+
+
+@override_settings(RENDIMIENTO_CONSULTAS_LENTAS={'UMBRAL_MS': 0, 'CAPACIDAD': 100})
+class ConsultasLentasTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        consultas_lentas.vaciar()
+
+    def test_registra_plan_y_alertas(self):
+        list(User.objects.filter(first_name='ana'))
+        list(User.objects.filter(first_name='eva'))
+        list(User.objects.filter(username='ana'))
+        grupos = consultas_lentas.resumen()
+        por_nombre = next(g for g in grupos if '"first_name" = ' in g['sql'])
+        self.assertEqual(por_nombre['veces'], 2)
+        self.assertIn('Recorre toda la tabla de auth.User', por_nombre['alertas'])
+        self.assertIn('Falta un índice en auth.User.first_name', por_nombre['alertas'])
+        self.assertTrue(por_nombre['pila'][-1].startswith('rendimiento/tests.py:'))
+        por_username = next(g for g in grupos if '"username" = ' in g['sql'])
+        self.assertIsNotNone(por_username['plan'])
+        self.assertEqual(por_username['alertas'], [])
+
+    @override_settings(RENDIMIENTO_CONSULTAS_LENTAS={'UMBRAL_MS': 10 ** 6, 'CAPACIDAD': 5})
+    def test_buffer_circular(self):
+        for i in range(8):
+            consultas_lentas._guardar({'huella': str(i), 'cuando': i})
+        self.assertEqual([e['huella'] for e in consultas_lentas.registradas()], ['7', '6', '5', '4', '3'])
+
+    def test_pagina_solo_staff(self):
+        staff = User.objects.create(username='staff', is_staff=True)
+        url = reverse('rendimiento:consultas_lentas')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(staff)
+        list(User.objects.filter(last_name='x'))
+        self.assertContains(self.client.get(url), 'Falta un índice en auth.User.last_name')
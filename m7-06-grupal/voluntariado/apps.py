@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class VoluntariadoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'voluntariado'
+
+    def ready(self):
+        from rendimiento.versiones import vigilar
+        from .models import Evento, Voluntario
+        # Versiones para los ETags de las listas (rendimiento/respuestas.py)
+        vigilar(Voluntario, Evento)
@@ -0,0 +1,35 @@
+"""
+Borrado de voluntarios y eventos sin pasar por el Collector de Django.
+
+`Model.delete()` carga en memoria todas las asignaciones (tabla intermedia
+evento-voluntario) antes de borrarlas. Aquí se borran con
+`rendimiento.lotes.borrar_en_lotes()`, primero las asignaciones y luego el
+objeto, cada lote en su propia transacción: si algo falla a mitad de
+camino el objeto sigue existiendo y volver a borrarlo termina lo que
+faltaba. Las cantidades que se muestran en la confirmación vienen anotadas
+en la consulta de la vista.
+
+Ojo: al ser SQL directo no se emiten las señales pre_delete/post_delete;
+las versiones de los ETags se actualizan a mano.
+"""
+from rendimiento.lotes import TAMANO_LOTE, borrar_en_lotes
+from rendimiento.versiones import tocar
+
+from .models import Voluntario, Evento
+
+
+Asignacion = Evento.voluntarios.through
+
+
+def borrar_voluntario(voluntario, tamano_lote=TAMANO_LOTE):
+    """Quita al voluntario de todos sus eventos y luego lo borra"""
+    borrar_en_lotes(Asignacion.objects.filter(voluntario_id=voluntario.pk), tamano_lote)
+    borrar_en_lotes(Voluntario.objects.filter(pk=voluntario.pk), tamano_lote)
+    tocar(Voluntario, Evento)
+
+
+def borrar_evento(evento, tamano_lote=TAMANO_LOTE):
+    """Quita todas las asignaciones del evento y luego lo borra"""
+    borrar_en_lotes(Asignacion.objects.filter(evento_id=evento.pk), tamano_lote)
+    borrar_en_lotes(Evento.objects.filter(pk=evento.pk), tamano_lote)
+    tocar(Voluntario, Evento)
@@ -0,0 +1,81 @@
+# voluntariado/notificaciones.py
+"""
+Aviso por correo a los voluntarios de un evento que cambió.
+
+El request solo encola (ver tareas/cola.py): `avisar_cambio_evento()` deja
+una tarea de reparto que corre VENTANA segundos después, así varias
+ediciones seguidas del mismo evento generan un único aviso con el estado
+final. El reparto lee los destinatarios con una sola consulta values_list y
+los divide en lotes de TAMANO_LOTE; cada lote es otra tarea, de modo que el
+pool de hilos de run_worker envía varios lotes a la vez, cada uno por una
+única conexión SMTP. Cada lote registra su duración en el log
+'voluntariado.notificaciones'.
+
+La ventana de deduplicación usa la caché: con varios procesos web hace
+falta una caché compartida (con locmem cada proceso deduplica lo suyo).
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import render_to_string
+
+from tareas.cola import encolar
+
+from .models import Evento, Voluntario
+
+
+logger = logging.getLogger('voluntariado.notificaciones')
+
+VENTANA = 5 * 60
+TAMANO_LOTE = 100
+
+
+def _clave(evento_id):
+    return f'voluntariado:aviso_evento:{evento_id}'
+
+
+def avisar_cambio_evento(evento):
+    """Programa el aviso del cambio. Devuelve False si ya había uno pendiente en la ventana."""
+    if not cache.add(_clave(evento.pk), True, VENTANA):
+        return False
+    encolar(repartir_aviso, evento.pk, demora=VENTANA)
+    return True
+
+
+def repartir_aviso(evento_id):
+    """Toma la lista de destinatarios y encola un envío por lote."""
+    if not Evento.objects.filter(pk=evento_id).exists():
+        return 0
+    destinatarios = list(
+        Voluntario.objects.filter(eventos=evento_id).order_by('pk').values_list('nombre', 'email')
+    )
+    for desde in range(0, len(destinatarios), TAMANO_LOTE):
+        encolar(enviar_lote, evento_id, destinatarios[desde:desde + TAMANO_LOTE])
+    return len(destinatarios)
+
+
+def enviar_lote(evento_id, destinatarios):
+    """Envía el aviso a un lote de (nombre, email) por una sola conexión."""
+    evento = Evento.objects.filter(pk=evento_id).first()
+    if evento is None:
+        return 0
+    inicio = time.perf_counter()
+    asunto = f'Cambios en el evento "{evento.titulo}"'
+    mensajes = [
+        EmailMessage(
+            asunto,
+            render_to_string('correo_evento_actualizado.txt', {'nombre': nombre, 'evento': evento}),
+            settings.DEFAULT_FROM_EMAIL,
+            [email],
+        )
+        for nombre, email in destinatarios
+    ]
+    enviados = get_connection().send_messages(mensajes) or 0
+    logger.info(
+        'Evento %s: lote de %d avisos enviado en %.1f ms',
+        evento_id, enviados, (time.perf_counter() - inicio) * 1000,
+    )
+    return enviados
@@ -0,0 +1,135 @@
+/*
+ * custom.js: listas que se completan con filas parciales.
+ *
+ * Un contenedor con data-parcial (el tbody de una tabla o la fila de
+ * tarjetas) tiene las filas de la primera página. La última fila,
+ * data-siguiente, lleva un enlace a la página siguiente: cuando se acerca al
+ * borde de la pantalla (o al hacerle clic) se pide esa URL con ?parcial=1,
+ * el servidor devuelve solo las filas, sin layout, y se agregan al final.
+ * Sin JavaScript el enlace abre la página siguiente completa.
+ *
+ * Cada fila con data-fila apunta a la URL de su propio parcial.
+ * Parciales.refrescar(fila) la reemplaza por la versión actual, o la quita si
+ * el objeto ya no existe. Al volver con "atrás" después de editar o eliminar
+ * desde la lista, el navegador restaura la página vieja: en lugar de
+ * recargarla entera se refresca solo la fila que se tocó.
+ */
+(function () {
+    'use strict';
+
+    var CLAVE_FILA_TOCADA = 'parciales:fila';
+    // Empieza a pedir la página siguiente antes de llegar al final
+    var MARGEN = '400px';
+
+    function pedir(url) {
+        return fetch(url, {credentials: 'same-origin', headers: {'X-Requested-With': 'XMLHttpRequest'}});
+    }
+
+    function cargarSiguiente(centinela) {
+        var contenedor = centinela.closest('[data-parcial]');
+        var enlace = centinela.querySelector('a');
+        if (!contenedor || !enlace || centinela.dataset.cargando) {
+            return;
+        }
+        centinela.dataset.cargando = '1';
+        var url = new URL(enlace.href, window.location.href);
+        url.searchParams.set('parcial', '1');
+        pedir(url).then(function (respuesta) {
+            if (!respuesta.ok) {
+                throw new Error(respuesta.status);
+            }
+            return respuesta.text();
+        }).then(function (html) {
+            if (observador) {
+                observador.unobserve(centinela);
+            }
+            centinela.remove();
+            contenedor.insertAdjacentHTML('beforeend', html);
+            observar(contenedor);
+        }).catch(function () {
+            // El enlace sigue ahí: se puede reintentar con un clic
+            delete centinela.dataset.cargando;
+        });
+    }
+
+    var observador = 'IntersectionObserver' in window ? new IntersectionObserver(function (entradas) {
+        entradas.forEach(function (entrada) {
+            if (entrada.isIntersecting) {
+                cargarSiguiente(entrada.target);
+            }
+        });
+    }, {rootMargin: MARGEN}) : null;
+
+    function observar(raiz) {
+        if (!observador) {
+            return;
+        }
+        raiz.querySelectorAll('[data-siguiente]').forEach(function (centinela) {
+            observador.observe(centinela);
+        });
+    }
+
+    function refrescar(fila) {
+        return pedir(fila.dataset.fila).then(function (respuesta) {
+            if (respuesta.status === 404) {
+                fila.remove();
+                return;
+            }
+            if (respuesta.ok) {
+                return respuesta.text().then(function (html) {
+                    fila.outerHTML = html;
+                });
+            }
+        });
+    }
+
+    document.addEventListener('click', function (evento) {
+        var enlace = evento.target.closest('a');
+        if (!enlace) {
+            return;
+        }
+        var centinela = enlace.closest('[data-siguiente]');
+        if (centinela) {
+            evento.preventDefault();
+            cargarSiguiente(centinela);
+            return;
+        }
+        var fila = enlace.closest('[data-fila]');
+        if (fila) {
+            // Con la URL de la lista: solo esa página, al volver desde el bfcache, consume la clave
+            sessionStorage.setItem(CLAVE_FILA_TOCADA, JSON.stringify({lista: location.href, fila: fila.dataset.fila}));
+        }
+    });
+
+    function filaTocada() {
+        try {
+            return JSON.parse(sessionStorage.getItem(CLAVE_FILA_TOCADA));
+        } catch (error) {
+            return null;
+        }
+    }
+
+    window.addEventListener('pageshow', function (evento) {
+        var tocada = filaTocada();
+        // La página de edición o borrado también carga este archivo: la clave queda para la lista
+        if (!tocada || tocada.lista !== location.href) {
+            return;
+        }
+        sessionStorage.removeItem(CLAVE_FILA_TOCADA);
+        // Una lista cargada de nuevo ya viene al día; solo la restaurada del bfcache está vieja
+        if (!evento.persisted) {
+            return;
+        }
+        document.querySelectorAll('[data-fila]').forEach(function (fila) {
+            if (fila.dataset.fila === tocada.fila) {
+                refrescar(fila);
+            }
+        });
+    });
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('[data-parcial]').forEach(observar);
+    });
+
+    window.Parciales = {refrescar: refrescar, cargarSiguiente: cargarSiguiente};
+})();
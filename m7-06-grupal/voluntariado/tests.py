@@ -1,3 +1,199 @@
+import datetime
+from unittest import mock
+
+from django.core import mail
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from tareas.cola import procesar
+from tareas.models import Tarea
+
+from .models import Voluntario, Evento
+from . import notificaciones, views
+from .borrado import borrar_voluntario
+
+
+class DetalleConPrefetchTests(TestCase):
+    """Las vistas de detalle cargan objeto y relación en dos consultas fijas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.evento = Evento.objects.create(
+            titulo='Limpieza de playa', descripcion='Playa Las Cruces',
+            fecha=datetime.date(2025, 1, 10),
+        )
+        cls.voluntarios = Voluntario.objects.bulk_create([
+            Voluntario(nombre=f'Voluntario {i:03d}', email=f'v{i}@ejemplo.com')
+            for i in range(views.VOLUNTARIOS_POR_PAGINA + 5)
+        ])
+        cls.evento.voluntarios.set(cls.voluntarios)
+        cls.otros_eventos = Evento.objects.bulk_create([
+            Evento(titulo=f'Evento {i}', descripcion='-', fecha=datetime.date(2025, 2, i + 1))
+            for i in range(views.EVENTOS_POR_PAGINA + 3)
+        ])
+        cls.voluntarios[0].eventos.add(*cls.otros_eventos)
+
+    def test_evento_detail_pagina_voluntarios(self):
+        url = reverse('evento_detail', args=[self.evento.id])
+        # Sesión/mensajes no tocan la base de datos: evento + página de voluntarios
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.context['total_voluntarios'], len(self.voluntarios))
+        self.assertEqual(len(response.context['voluntarios']), views.VOLUNTARIOS_POR_PAGINA)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'page': 2})
+        self.assertEqual(len(response.context['voluntarios']), 5)
+
+    def test_evento_detail_pagina_fuera_de_rango(self):
+        response = self.client.get(reverse('evento_detail', args=[self.evento.id]), {'page': 99})
+        self.assertEqual(response.context['pagina'].number, 2)
+
+    def test_voluntario_detail_pagina_eventos(self):
+        url = reverse('voluntario_detail', args=[self.voluntarios[0].id])
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.context['total_eventos'], len(self.otros_eventos) + 1)
+        self.assertEqual(len(response.context['eventos']), views.EVENTOS_POR_PAGINA)
+
+    def test_evento_confirm_delete_muestra_acotada(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('evento_delete', args=[self.evento.id]))
+        self.assertEqual(len(response.context['voluntarios']), views.VOLUNTARIOS_VISTA_PREVIA)
+        self.assertEqual(
+            response.context['voluntarios_restantes'],
+            len(self.voluntarios) - views.VOLUNTARIOS_VISTA_PREVIA,
+        )
+
+
+class BorradoEnLotesTests(TestCase):
+
+    def test_borrar_evento_conserva_voluntarios(self):
+        evento = Evento.objects.create(titulo='Colecta', descripcion='-', fecha=datetime.date(2025, 3, 1))
+        otro = Evento.objects.create(titulo='Feria', descripcion='-', fecha=datetime.date(2025, 3, 2))
+        voluntarios = Voluntario.objects.bulk_create([
+            Voluntario(nombre=f'V{i}', email=f'b{i}@ejemplo.com') for i in range(7)
+        ])
+        evento.voluntarios.set(voluntarios)
+        otro.voluntarios.set(voluntarios[:2])
+
+        response = self.client.post(reverse('evento_delete', args=[evento.id]))
+        self.assertRedirects(response, reverse('evento_list'))
+        self.assertFalse(Evento.objects.filter(id=evento.id).exists())
+        self.assertEqual(Voluntario.objects.count(), 7)
+        self.assertEqual(Evento.voluntarios.through.objects.count(), 2)
+
+    def test_borrar_voluntario_en_lotes(self):
+        voluntario = Voluntario.objects.create(nombre='Ana', email='ana@ejemplo.com')
+        eventos = Evento.objects.bulk_create([
+            Evento(titulo=f'E{i}', descripcion='-', fecha=datetime.date(2025, 4, i + 1)) for i in range(5)
+        ])
+        voluntario.eventos.set(eventos)
+        borrar_voluntario(voluntario, tamano_lote=2)
+        self.assertFalse(Voluntario.objects.exists())
+        self.assertEqual(Evento.objects.count(), 5)
+        self.assertFalse(Evento.voluntarios.through.objects.exists())
+
+
+class AvisoCambioEventoTests(TestCase):
+    """Editar un evento avisa a sus voluntarios en segundo plano, en lotes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.evento = Evento.objects.create(
+            titulo='Reforestación', descripcion='Cerro San Cristóbal', fecha=datetime.date(2025, 5, 3),
+        )
+        cls.voluntarios = Voluntario.objects.bulk_create([
+            Voluntario(nombre=f'Voluntario {i}', email=f'n{i}@ejemplo.com') for i in range(5)
+        ])
+        cls.evento.voluntarios.set(cls.voluntarios)
+
+    def setUp(self):
+        cache.clear()
+
+    def _editar(self, titulo):
+        return self.client.post(reverse('evento_update', args=[self.evento.id]), {
+            'titulo': titulo, 'descripcion': self.evento.descripcion,
+            'fecha': '2025-05-03', 'voluntarios': [v.id for v in self.voluntarios],
+        })
+
+    def _vencer_y_procesar(self):
+        Tarea.objects.update(disponible_en=timezone.now())
+        while procesar(10):
+            pass
+
+    def test_ediciones_seguidas_generan_un_solo_aviso(self):
+        self._editar('Reforestación (cambio de hora)')
+        self._editar('Reforestación nativa')
+        self.assertEqual(Tarea.objects.count(), 1)
+        self.assertEqual(mail.outbox, [])
+
+        self._vencer_y_procesar()
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), sorted(v.email for v in self.voluntarios))
+        # El aviso lleva el estado final del evento
+        self.assertIn('Reforestación nativa', mail.outbox[0].subject)
+
+    def test_reparto_en_lotes_con_tiempos(self):
+        with mock.patch.object(notificaciones, 'TAMANO_LOTE', 2), \
+                self.assertLogs('voluntariado.notificaciones', 'INFO') as logs:
+            self._editar('Reforestación y picnic')
+            self._vencer_y_procesar()
+        # 1 reparto + 3 lotes (2 + 2 + 1)
+        self.assertEqual(Tarea.objects.filter(estado=Tarea.HECHA).count(), 4)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(len(logs.output), 3)
+        self.assertIn('ms', logs.output[0])
+
+    def test_correo_en_texto_plano_sin_escapar(self):
+        Voluntario.objects.filter(pk=self.voluntarios[0].pk).update(nombre="Ana O'Brien")
+        self._editar('Limpieza & "Reciclaje" <y>')
+        self._vencer_y_procesar()
+        cuerpo = next(m.body for m in mail.outbox if m.to == [self.voluntarios[0].email])
+        self.assertIn("Hola Ana O'Brien:", cuerpo)
+        self.assertIn('El evento "Limpieza & "Reciclaje" <y>"', cuerpo)
+        self.assertNotIn('{% autoescape', cuerpo)
+
+    def test_sin_cambios_no_avisa(self):
+        self._editar(self.evento.titulo)
+        self.assertFalse(Tarea.objects.exists())
+
+
+class ListasParcialesTests(TestCase):
+    """Las listas principales se paginan y devuelven solo filas con ?parcial=1"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.voluntarios = Voluntario.objects.bulk_create([
+            Voluntario(nombre=f'Persona {i:03d}', email=f'p{i}@ejemplo.com')
+            for i in range(views.FILAS_POR_PAGINA + 4)
+        ])
+        cls.eventos = Evento.objects.bulk_create([
+            Evento(titulo=f'Jornada {i}', descripcion='-', fecha=datetime.date(2025, 4, i + 1))
+            for i in range(3)
+        ])
+        cls.eventos[0].voluntarios.set(cls.voluntarios[:5])
+
+    def test_voluntarios_parcial_sin_layout(self):
+        url = reverse('voluntario_list')
+        # Conteo + página con el total de eventos anotado, sin una consulta por fila
+        with self.assertNumQueries(2):
+            completa = self.client.get(url)
+        self.assertContains(completa, 'data-siguiente')
+        with self.assertNumQueries(2):
+            parcial = self.client.get(url, {'page': 2, 'parcial': 1})
+        self.assertNotContains(parcial, '<nav')
+        self.assertNotContains(parcial, 'data-siguiente')
+        self.assertEqual(len(parcial.context['voluntarios']), 4)
+        self.assertLess(len(parcial.content), len(completa.content))
 
-# Create your tests here.
+    def test_fila_y_tarjeta_de_un_objeto(self):
+        voluntario = self.voluntarios[0]
+        response = self.client.get(reverse('voluntario_fila', args=[voluntario.id]))
+        self.assertContains(response, f'id="voluntario-{voluntario.id}"')
+        self.assertContains(response, '1 evento(s)')
+        self.assertNotContains(response, '<table')
+        response = self.client.get(reverse('evento_tarjeta', args=[self.eventos[0].id]))
+        self.assertContains(response, '<span class="badge bg-info">5</span>', html=True)
+        self.assertEqual(self.client.get(reverse('evento_tarjeta', args=[0])).status_code, 404)
@@ -13,4 +13,6 @@ urlpatterns = [
     path('eventos/eliminar/<int:id>/', views.evento_delete, name='evento_delete'),
     path('voluntarios/detalle/<int:id>/', views.voluntario_detail, name='voluntario_detail'),
     path('eventos/detalle/<int:id>/', views.evento_detail, name='evento_detail'),
+    path('voluntarios/fila/<int:id>/', views.voluntario_fila, name='voluntario_fila'),
+    path('eventos/tarjeta/<int:id>/', views.evento_tarjeta, name='evento_tarjeta'),
 ]
\ No newline at end of file
@@ -1,7 +1,64 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
+from django.core.paginator import Paginator
+from django.db.models import Count, Prefetch, prefetch_related_objects
+from rendimiento.respuestas import condicion
 from .models import Voluntario, Evento
 from .forms import VoluntarioForm, EventoForm
+from .borrado import borrar_voluntario, borrar_evento
+from .notificaciones import avisar_cambio_evento
+
+
+# Tamaño de página de las listas relacionadas en las vistas de detalle
+EVENTOS_POR_PAGINA = 20
+VOLUNTARIOS_POR_PAGINA = 50
+# Cantidad de voluntarios que se listan en la confirmación de eliminación
+VOLUNTARIOS_VISTA_PREVIA = 20
+# Tamaño de página de las listas principales (el resto llega con scroll infinito)
+FILAS_POR_PAGINA = 30
+
+
+def _paginar_relacion(request, objeto, relacion, queryset, total, por_pagina):
+    """
+    Carga en `objeto` solo la página pedida de `relacion` con un único
+    prefetch y devuelve el objeto Page con esa lista.
+
+    El total viene anotado en la consulta principal, así que el paginador
+    no ejecuta su propio COUNT.
+    """
+    paginador = Paginator(range(total), por_pagina)
+    pagina = paginador.get_page(request.GET.get('page'))
+    desde = (pagina.number - 1) * por_pagina
+    prefetch_related_objects([objeto], Prefetch(
+        relacion,
+        queryset=queryset[desde:desde + por_pagina],
+        to_attr=f'{relacion}_pagina',
+    ))
+    pagina.object_list = getattr(objeto, f'{relacion}_pagina')
+    return pagina
+
+
+def _lista(request, queryset, plantilla, parcial, nombre):
+    """
+    Una página de una lista principal. Con ?parcial=1 (custom.js, scroll
+    infinito) se renderiza solo `parcial`: las filas de la página, sin layout.
+    """
+    pagina = Paginator(queryset, FILAS_POR_PAGINA).get_page(request.GET.get('page'))
+    contexto = {nombre: pagina.object_list, 'pagina': pagina}
+    return render(request, parcial if request.GET.get('parcial') else plantilla, contexto)
+
+
+def _voluntarios():
+    return Voluntario.objects.annotate(total_eventos=Count('eventos')).order_by('-fecha_registro', '-id')
+
+
+def _eventos():
+    return Evento.objects.annotate(total_voluntarios=Count('voluntarios')).order_by('-fecha', '-id')
+
+
+# Las listas solo cambian si cambian voluntarios, eventos o sus asignaciones:
+# con If-None-Match igual se contesta 304 sin consultar ni renderizar
+lista_condicional = condicion(Voluntario, Evento)
 
 
 # ============ VISTAS PRINCIPALES ============
@@ -20,19 +77,34 @@ def home(request):
 
 # ============ VISTAS DE VOLUNTARIOS ============
 
+@lista_condicional
 def voluntario_list(request):
     """Ejercicio 6: Listado de todos los voluntarios"""
-    voluntarios = Voluntario.objects.all().order_by('-fecha_registro')
-    return render(request, 'voluntario_list.html', {'voluntarios': voluntarios})
+    return _lista(request, _voluntarios(), 'voluntario_list.html', 'voluntario_filas.html', 'voluntarios')
+
+
+@lista_condicional
+def voluntario_fila(request, id):
+    """La fila de un voluntario en la lista, para refrescarla sin recargar la página"""
+    voluntario = get_object_or_404(_voluntarios(), id=id)
+    return render(request, 'voluntario_fila.html', {'voluntario': voluntario})
 
 def voluntario_detail(request, id):
     """Vista detallada de un voluntario con sus eventos"""
-    voluntario = get_object_or_404(Voluntario, id=id)
-    eventos = voluntario.eventos.all()
+    voluntario = get_object_or_404(
+        Voluntario.objects.annotate(total_eventos=Count('eventos')), id=id
+    )
+    pagina = _paginar_relacion(
+        request, voluntario, 'eventos',
+        Evento.objects.only('id', 'titulo', 'descripcion', 'fecha'),
+        voluntario.total_eventos, EVENTOS_POR_PAGINA,
+    )
     
     return render(request, 'voluntario_detail.html', {
         'voluntario': voluntario,
-        'eventos': eventos
+        'eventos': pagina.object_list,
+        'pagina': pagina,
+        'total_eventos': voluntario.total_eventos,
     })
 
 def voluntario_create(request):
@@ -75,11 +147,13 @@ def voluntario_update(request, id):
 
 def voluntario_delete(request, id):
     """Ejercicio 9: Eliminar un voluntario con confirmación"""
-    voluntario = get_object_or_404(Voluntario, id=id)
+    voluntario = get_object_or_404(
+        Voluntario.objects.annotate(total_eventos=Count('eventos')), id=id
+    )
     
     if request.method == 'POST':
         nombre = voluntario.nombre
-        voluntario.delete()
+        borrar_voluntario(voluntario)
         messages.success(request, f'Voluntario "{nombre}" eliminado exitosamente.')
         return redirect('voluntario_list')
     
@@ -88,20 +162,35 @@ def voluntario_delete(request, id):
 
 # ============ VISTAS DE EVENTOS ============
 
+@lista_condicional
 def evento_list(request):
     """Ejercicio 6: Listado de todos los eventos"""
-    eventos = Evento.objects.all().order_by('-fecha')
-    return render(request, 'evento_list.html', {'eventos': eventos})
+    return _lista(request, _eventos(), 'evento_list.html', 'evento_tarjetas.html', 'eventos')
+
+
+@lista_condicional
+def evento_tarjeta(request, id):
+    """La tarjeta de un evento en la lista, para refrescarla sin recargar la página"""
+    evento = get_object_or_404(_eventos(), id=id)
+    return render(request, 'evento_tarjeta.html', {'evento': evento})
 
 
 def evento_detail(request, id):
     """Vista detallada de un evento con sus voluntarios"""
-    evento = get_object_or_404(Evento, id=id)
-    voluntarios = evento.voluntarios.all()
+    evento = get_object_or_404(
+        Evento.objects.annotate(total_voluntarios=Count('voluntarios')), id=id
+    )
+    pagina = _paginar_relacion(
+        request, evento, 'voluntarios',
+        Voluntario.objects.only('id', 'nombre', 'email', 'telefono').order_by('nombre'),
+        evento.total_voluntarios, VOLUNTARIOS_POR_PAGINA,
+    )
     
     return render(request, 'evento_detail.html', {
         'evento': evento,
-        'voluntarios': voluntarios
+        'voluntarios': pagina.object_list,
+        'pagina': pagina,
+        'total_voluntarios': evento.total_voluntarios,
     })
 
 
@@ -132,6 +221,9 @@ def evento_update(request, id):
         if form.is_valid():
             form.save()
             messages.success(request, f'Evento "{evento.titulo}" actualizado exitosamente.')
+            # El aviso a los voluntarios sale en segundo plano (tareas)
+            if form.has_changed():
+                avisar_cambio_evento(evento)
             return redirect('evento_list')
     else:
         form = EventoForm(instance=evento)
@@ -145,12 +237,25 @@ def evento_update(request, id):
 
 def evento_delete(request, id):
     """Ejercicio 9: Eliminar un evento con confirmación"""
-    evento = get_object_or_404(Evento, id=id)
+    evento = get_object_or_404(
+        Evento.objects.annotate(total_voluntarios=Count('voluntarios')), id=id
+    )
     
     if request.method == 'POST':
         titulo = evento.titulo
-        evento.delete()
+        borrar_evento(evento)
         messages.success(request, f'Evento "{titulo}" eliminado exitosamente.')
         return redirect('evento_list')
     
-    return render(request, 'evento_confirm_delete.html', {'evento': evento})
\ No newline at end of file
+    # Solo se muestra una muestra de los voluntarios afectados, no la lista completa
+    prefetch_related_objects([evento], Prefetch(
+        'voluntarios',
+        queryset=Voluntario.objects.only('id', 'nombre', 'email').order_by('nombre')[:VOLUNTARIOS_VISTA_PREVIA],
+        to_attr='voluntarios_muestra',
+    ))
+    return render(request, 'evento_confirm_delete.html', {
+        'evento': evento,
+        'voluntarios': evento.voluntarios_muestra,
+        'total_voluntarios': evento.total_voluntarios,
+        'voluntarios_restantes': evento.total_voluntarios - len(evento.voluntarios_muestra),
+    })
\ No newline at end of file
@@ -1,5 +1,34 @@
-from django.contrib import admin
-from .models import Profesor, Curso, Estudiante, Perfil, Inscripcion
+from django.contrib import admin, messages
+from django.contrib.auth import get_permission_codename
+from .models import Profesor, Curso, Estudiante, Perfil, Inscripcion, ListaEspera
+from .borrado import borrar_profesores, resumen_borrado_profesores
+from .busqueda import TIPO_DE_MODELO, buscar
+
+# El índice del admin muestra el resumen de carga docente (academico/carga.py)
+admin.site.index_template = 'academico/admin/index.html'
+
+class BusquedaTrigramasMixin:
+    """
+    La caja de búsqueda usa el índice de trigramas en vez de icontains sobre
+    search_fields. Muestra los max_resultados_busqueda más parecidos y avisa
+    cuando hay más, para que no parezca que no existen.
+    """
+    max_resultados_busqueda = 200
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return super().get_search_results(request, queryset, search_term)
+        maximo = self.max_resultados_busqueda
+        ids = buscar(TIPO_DE_MODELO[self.model], search_term, limite=maximo + 1)
+        if len(ids) > maximo:
+            ids = ids[:maximo]
+            self.message_user(
+                request,
+                f'La búsqueda encontró más de {maximo} resultados; se muestran los {maximo} más parecidos. '
+                'Escribe un término más preciso para ver otros.',
+                messages.WARNING,
+            )
+        return queryset.filter(pk__in=ids), False
 
 # Opciones de visualización para Inscripcion en el admin de Curso y Estudiante
 class InscripcionInline(admin.TabularInline):
@@ -7,19 +36,45 @@ class InscripcionInline(admin.TabularInline):
     extra = 1 # Cuántos formularios de inscripción extra mostrar
 
 @admin.register(Profesor)
-class ProfesorAdmin(admin.ModelAdmin):
+class ProfesorAdmin(BusquedaTrigramasMixin, admin.ModelAdmin):
     list_display = ('nombre', 'email')
     search_fields = ('nombre', 'email')
 
+    # El borrado en cascada (Curso -> Inscripcion) se resume con conteos y se
+    # ejecuta en lotes, en vez de listar y cargar cada objeto dependiente.
+    def get_deleted_objects(self, objs, request):
+        profesores = Profesor.objects.filter(pk__in=[obj.pk for obj in objs])
+        resumen = resumen_borrado_profesores(profesores)
+        model_count = {
+            Profesor._meta.verbose_name_plural: len(objs),
+            Curso._meta.verbose_name_plural: resumen['total_cursos'],
+            Inscripcion._meta.verbose_name_plural: resumen['total_inscripciones'],
+        }
+        perms_needed = {
+            modelo._meta.verbose_name
+            for modelo, cantidad in ((Curso, resumen['total_cursos']), (Inscripcion, resumen['total_inscripciones']))
+            if cantidad and not request.user.has_perm(
+                f'{modelo._meta.app_label}.{get_permission_codename("delete", modelo._meta)}'
+            )
+        }
+        deleted_objects = [f'{Profesor._meta.verbose_name}: {obj}' for obj in objs]
+        return deleted_objects, model_count, perms_needed, []
+
+    def delete_model(self, request, obj):
+        borrar_profesores(Profesor.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        borrar_profesores(queryset)
+
 @admin.register(Curso)
-class CursoAdmin(admin.ModelAdmin):
-    list_display = ('nombre', 'profesor')
+class CursoAdmin(BusquedaTrigramasMixin, admin.ModelAdmin):
+    list_display = ('nombre', 'profesor', 'creditos', 'cupo_maximo', 'cupos_ocupados')
     list_filter = ('profesor',)
     search_fields = ('nombre', 'descripcion')
     inlines = [InscripcionInline] # Permite ver/añadir inscripciones desde la página del curso
 
 @admin.register(Estudiante)
-class EstudianteAdmin(admin.ModelAdmin):
+class EstudianteAdmin(BusquedaTrigramasMixin, admin.ModelAdmin):
     list_display = ('nombre', 'email')
     search_fields = ('nombre', 'email')
     inlines = [InscripcionInline] # Permite ver/añadir inscripciones desde la página del estudiante
@@ -35,3 +90,8 @@ class InscripcionAdmin(admin.ModelAdmin):
     list_filter = ('estado', 'curso')
     search_fields = ('estudiante__nombre', 'curso__nombre')
 
+@admin.register(ListaEspera)
+class ListaEsperaAdmin(admin.ModelAdmin):
+    list_display = ('estudiante', 'curso', 'creada_en')
+    list_filter = ('curso',)
+    list_select_related = ('estudiante', 'curso')
@@ -0,0 +1,227 @@
+# academico/analitica.py
+"""
+Reportes de inscripciones desde una instantánea en columnas, sin tocar la base.
+
+Los agrupamientos de reportes (aprobación por curso y estado, distribución
+de notas por profesor, inscripciones por mes) recorren toda la tabla
+Inscripcion y compiten con el tráfico normal. El comando
+instantanea_inscripciones exporta una vez por noche Inscripcion unida a
+curso y profesor a un directorio con un archivo .npy por columna (enteros
+compactos: índices de curso y profesor, estado, nota como float32 con NaN
+si falta, fecha en días desde 1970) y un meta.json con los nombres.
+
+`Instantanea` abre esas columnas con memoria mapeada (np.load con
+mmap_mode='r'): abrirla no lee el archivo y varios procesos comparten las
+mismas páginas del sistema operativo. Cada reporte es un `np.bincount`
+sobre una clave combinada (p. ej. curso·2 + estado), que en un millón de
+filas tarda unos milisegundos.
+
+Cada exportación se escribe en un subdirectorio nuevo de `directorio` y se
+publica reemplazando el archivo ACTUAL (que guarda el nombre de ese
+subdirectorio) con un rename atómico. Quien lee resuelve ACTUAL una sola vez
+y abre todo desde esa versión: nunca ve una a medio escribir ni mezcla
+columnas de dos exportaciones, y el directorio nunca desaparece. La versión
+anterior se conserva hasta la exportación siguiente, para quien la haya
+resuelto justo antes del cambio.
+
+Requiere NumPy.
+"""
+from datetime import date
+import json
+import os
+from pathlib import Path
+import shutil
+import tempfile
+
+from django.conf import settings
+
+from .models import Curso, Inscripcion, Profesor
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional para el resto del proyecto, pero este módulo lo necesita
+    np = None
+
+
+ESTADOS = [codigo for codigo, _ in Inscripcion.ESTADO_CHOICES]
+NOTA_APROBACION = 4.0
+LOTE = 20000
+# Columnas: nombre -> tipo de NumPy
+COLUMNAS = {
+    'estudiante': 'int64',
+    'curso': 'int32',
+    'profesor': 'int32',
+    'estado': 'uint8',
+    'nota': 'float32',
+    'fecha': 'int32',
+    'creditos': 'uint16',
+}
+_EPOCA = date(1970, 1, 1)
+ACTUAL = 'ACTUAL'
+
+
+def directorio_por_defecto():
+    return Path(getattr(settings, 'INSTANTANEAS_DIR', Path(settings.BASE_DIR) / 'instantaneas')) / 'inscripciones'
+
+
+def _requiere_numpy():
+    if np is None:
+        raise RuntimeError('La analítica de inscripciones requiere NumPy (pip install numpy).')
+
+
+def exportar(directorio=None):
+    """Escribe la instantánea de Inscripcion en `directorio`. Devuelve la cantidad de filas."""
+    _requiere_numpy()
+    directorio = Path(directorio or directorio_por_defecto())
+    directorio.mkdir(parents=True, exist_ok=True)
+    # Se lee de lo general a lo particular y las filas que apuntan a algo
+    # creado después (un curso nuevo, el profesor de un curso nuevo) se
+    # omiten: quedan para la próxima exportación
+    profesores = list(Profesor.objects.order_by('pk').values_list('pk', 'nombre'))
+    indice_profesor = {pk: i for i, (pk, _) in enumerate(profesores)}
+    cursos = [
+        curso for curso in Curso.objects.order_by('pk').values_list('pk', 'nombre', 'profesor_id', 'creditos')
+        if curso[2] in indice_profesor
+    ]
+    indice_curso = {pk: i for i, (pk, *_) in enumerate(cursos)}
+    indice_estado = {codigo: i for i, codigo in enumerate(ESTADOS)}
+    profesor_de_curso = np.array([indice_profesor[profesor_id] for _, _, profesor_id, _ in cursos], dtype='int32')
+    creditos_de_curso = np.array([creditos for *_, creditos in cursos], dtype=COLUMNAS['creditos'])
+
+    total = Inscripcion.objects.count()
+    columnas = {nombre: np.empty(total, dtype=tipo) for nombre, tipo in COLUMNAS.items()}
+    filas = Inscripcion.objects.order_by('pk').values_list(
+        'estudiante_id', 'curso_id', 'estado', 'nota_final', 'fecha_inscripcion',
+    )
+    n = 0
+    for estudiante_id, curso_id, estado, nota, fecha in filas.iterator(chunk_size=LOTE):
+        if n == total:  # llegaron filas nuevas mientras se exportaba: quedan para la próxima
+            break
+        if curso_id not in indice_curso:
+            continue
+        columnas['estudiante'][n] = estudiante_id
+        columnas['curso'][n] = indice_curso[curso_id]
+        columnas['estado'][n] = indice_estado[estado]
+        columnas['nota'][n] = np.nan if nota is None else nota
+        columnas['fecha'][n] = (fecha - _EPOCA).days
+        n += 1
+    columnas = {nombre: columna[:n] for nombre, columna in columnas.items()}
+    # Profesor y créditos se derivan del curso con un solo gather vectorizado
+    columnas['profesor'] = profesor_de_curso[columnas['curso']]
+    columnas['creditos'] = creditos_de_curso[columnas['curso']]
+
+    version = Path(tempfile.mkdtemp(prefix='v-', dir=directorio))
+    for nombre, columna in columnas.items():
+        np.save(version / f'{nombre}.npy', columna)
+    meta = {
+        'filas': n,
+        'estados': ESTADOS,
+        'cursos': [[pk, nombre] for pk, nombre, *_ in cursos],
+        'profesores': [list(fila) for fila in profesores],
+    }
+    (version / 'meta.json').write_text(json.dumps(meta, ensure_ascii=False), encoding='utf-8')
+    _publicar(directorio, version.name)
+    return n
+
+
+def _version_actual(directorio):
+    try:
+        return (directorio / ACTUAL).read_text(encoding='utf-8').strip()
+    except FileNotFoundError:
+        return None
+
+
+def _publicar(directorio, version):
+    """Apunta ACTUAL a `version` y borra las versiones anteriores a la que reemplaza."""
+    anterior = _version_actual(directorio)
+    puntero = directorio / f'.{ACTUAL}-{version}'
+    puntero.write_text(version, encoding='utf-8')
+    os.replace(puntero, directorio / ACTUAL)
+    for ruta in directorio.iterdir():
+        if ruta.name in (version, anterior, ACTUAL):
+            continue
+        if ruta.is_dir():
+            shutil.rmtree(ruta, ignore_errors=True)
+        else:  # columnas sueltas del formato anterior, sin versiones
+            ruta.unlink(missing_ok=True)
+
+
+class Instantanea:
+    """Columnas de la última instantánea, con memoria mapeada, y los reportes sobre ellas."""
+
+    def __init__(self, directorio=None):
+        _requiere_numpy()
+        directorio = Path(directorio or directorio_por_defecto())
+        version = _version_actual(directorio)
+        if version is None:
+            raise FileNotFoundError(f'No hay ninguna instantánea publicada en {directorio}')
+        directorio /= version
+        self.meta = json.loads((directorio / 'meta.json').read_text(encoding='utf-8'))
+        # Cada columna queda como atributo: self.curso, self.nota, ...
+        for nombre in COLUMNAS:
+            setattr(self, nombre, np.load(directorio / f'{nombre}.npy', mmap_mode='r'))
+
+    def __len__(self):
+        return self.meta['filas']
+
+    def por_curso_y_estado(self):
+        """{curso_id: {'nombre', estado: cantidad, ..., 'evaluadas', 'aprobadas', 'tasa_aprobacion'}}."""
+        cursos = self.meta['cursos']
+        estados = len(self.meta['estados'])
+        conteos = np.bincount(
+            self.curso.astype(np.int64) * estados + self.estado, minlength=len(cursos) * estados,
+        ).reshape(len(cursos), estados)
+        con_nota = ~np.isnan(self.nota)
+        evaluadas = np.bincount(self.curso[con_nota], minlength=len(cursos))
+        aprobadas = np.bincount(self.curso[con_nota & (self.nota >= NOTA_APROBACION)], minlength=len(cursos))
+        tasas = np.divide(aprobadas, evaluadas, out=np.full(len(cursos), np.nan), where=evaluadas > 0)
+        return {
+            pk: {
+                'nombre': nombre,
+                **dict(zip(self.meta['estados'], conteos[i].tolist())),
+                'evaluadas': int(evaluadas[i]),
+                'aprobadas': int(aprobadas[i]),
+                'tasa_aprobacion': None if np.isnan(tasas[i]) else round(float(tasas[i]), 4),
+            }
+            for i, (pk, nombre) in enumerate(cursos)
+        }
+
+    def distribucion_notas_por_profesor(self, bordes=(1, 2, 3, 4, 5, 6, 7)):
+        """
+        {profesor_id: {'nombre', 'intervalos': [cantidad por intervalo], 'promedio'}}.
+        Los intervalos son [bordes[i], bordes[i + 1]); el último incluye su borde superior.
+        """
+        profesores = self.meta['profesores']
+        bordes = np.asarray(bordes, dtype=np.float32)
+        intervalos = len(bordes) - 1
+        con_nota = ~np.isnan(self.nota)
+        notas = self.nota[con_nota]
+        profesor = self.profesor[con_nota].astype(np.int64)
+        dentro = (notas >= bordes[0]) & (notas <= bordes[-1])
+        intervalo = np.minimum(np.searchsorted(bordes, notas[dentro], side='right') - 1, intervalos - 1)
+        histograma = np.bincount(
+            profesor[dentro] * intervalos + intervalo, minlength=len(profesores) * intervalos,
+        ).reshape(len(profesores), intervalos)
+        cantidad = np.bincount(profesor, minlength=len(profesores))
+        suma = np.bincount(profesor, weights=notas, minlength=len(profesores))
+        return {
+            pk: {
+                'nombre': nombre,
+                'intervalos': histograma[i].tolist(),
+                'promedio': round(float(suma[i] / cantidad[i]), 2) if cantidad[i] else None,
+            }
+            for i, (pk, nombre) in enumerate(profesores)
+        }
+
+    def tendencia_inscripciones(self):
+        """[(mes 'AAAA-MM', inscripciones)] en orden cronológico."""
+        if not len(self):
+            return []
+        # Meses desde 1970: contar con bincount evita ordenar las fechas
+        meses = self.fecha.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+        primero = int(meses.min())
+        conteos = np.bincount(meses - primero)
+        return [
+            (str(np.datetime64(primero + i, 'M')), int(conteo))
+            for i, conteo in enumerate(conteos.tolist()) if conteo
+        ]
@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class AcademicoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'academico'
+
+    def ready(self):
+        from rendimiento.arranque import al_precalentar
+        from rendimiento.versiones import vigilar
+        from . import busqueda, carga, cupos
+        from .models import Curso, Profesor
+        busqueda.conectar_senales()
+        cupos.conectar_senales()
+        # Versiones para los ETags de la lista de cursos (rendimiento/respuestas.py)
+        vigilar(Curso, Profesor)
+        # El resumen de carga recorre todas las inscripciones: que no lo pague el primer request
+        al_precalentar(carga.resumen_carga)
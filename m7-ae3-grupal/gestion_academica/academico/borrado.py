@@ -0,0 +1,44 @@
+"""
+Borrado de profesores sin pasar por el Collector de Django.
+
+Borrar un Profesor arrastra sus Cursos y las Inscripciones de esos cursos.
+`Model.delete()` carga en memoria cada una de esas filas antes de borrarlas,
+lo que con decenas de miles de inscripciones deja la transacción abierta
+varios minutos. Aquí los dependientes se cuentan con un agregado (para la
+confirmación del admin) y se borran con
+`rendimiento.lotes.borrar_en_lotes()`, de las hojas hacia la raíz, cada lote
+en su propia transacción. Los profesores se borran al final: si el borrado
+falla a mitad de camino siguen en el admin y volver a borrarlos termina lo
+que faltaba.
+
+Ojo: al ser SQL directo no se emiten las señales pre_delete/post_delete;
+el índice de búsqueda y las versiones de los ETags se actualizan a mano.
+"""
+from django.db.models import Count
+
+from rendimiento.lotes import TAMANO_LOTE, borrar_en_lotes
+from rendimiento.versiones import tocar
+
+from .models import Profesor, Curso, Inscripcion, ListaEspera, Trigrama
+from .busqueda import olvidar
+
+
+def resumen_borrado_profesores(profesores):
+    """Cantidad de cursos e inscripciones que arrastra borrar `profesores`, en una sola consulta."""
+    return profesores.aggregate(
+        total_cursos=Count('cursos', distinct=True),
+        total_inscripciones=Count('cursos__inscripcion'),
+    )
+
+
+def borrar_profesores(profesores, tamano_lote=TAMANO_LOTE):
+    """Borra `profesores` en orden: inscripciones y listas de espera de sus cursos, cursos y profesores."""
+    ids = list(profesores.values_list('pk', flat=True))
+    cursos = Curso.objects.filter(profesor_id__in=ids)
+    borrar_en_lotes(Inscripcion.objects.filter(curso__profesor_id__in=ids), tamano_lote)
+    borrar_en_lotes(ListaEspera.objects.filter(curso__profesor_id__in=ids), tamano_lote)
+    olvidar(Trigrama.CURSO, cursos.values_list('pk', flat=True))
+    borrar_en_lotes(cursos, tamano_lote)
+    olvidar(Trigrama.PROFESOR, ids)
+    borrar_en_lotes(Profesor.objects.filter(pk__in=ids), tamano_lote)
+    tocar(Profesor, Curso)
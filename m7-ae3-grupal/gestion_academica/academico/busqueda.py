@@ -0,0 +1,212 @@
+# academico/busqueda.py
+"""
+Búsqueda por trigramas en estudiantes, profesores y cursos.
+
+`icontains` recorre la tabla completa. Aquí cada objeto se indexa en la
+tabla Trigrama: su texto (nombre y email, o nombre y descripción) se
+normaliza (minúsculas, sin tildes, lo que no es letra o dígito pasa a ser
+espacio) y se parte en palabras; cada palabra, rellenada con dos espacios a
+la izquierda y uno a la derecha, aporta sus trigramas ("  ju", " jua",
+"jua", "uan", "an "), guardados como enteros de 0 a 37³.
+
+Una consulta usa los trigramas internos de cada palabra (sin relleno, así
+"erez" encuentra "perez" dentro de un email) y el puntaje de un objeto es la
+fracción de esos trigramas que contiene: 1 es una coincidencia de
+subcadena y UMBRAL deja pasar errores de tipeo ("gonzales" → "gonzalez").
+
+La búsqueda nunca agrupa listas completas de trigramas comunes:
+
+- Coincidencias exactas (puntaje 1): se recorre la lista del trigrama más
+  raro en orden de id y cada objeto se confirma con un EXISTS por índice
+  (tipo, objeto, trigrama) para el resto; el LIMIT corta apenas hay
+  `limite` resultados.
+- Solo si faltan, errores de tipeo con filtro por prefijo: un objeto con
+  puntaje >= UMBRAL comparte al menos `minimo` de los `n` trigramas de la
+  consulta, así que tiene por fuerza alguno de los n-minimo+1 más raros.
+  Los candidatos (hasta MAX_CANDIDATOS) salen solo de esos y se puntúan con
+  todos los trigramas.
+
+La rareza sale de FrecuenciaTrigrama. Las frecuencias solo ordenan: si están
+atrasadas los resultados son los mismos, solo más lentos; el comando
+reindexar_busqueda las recalcula.
+
+El índice se mantiene en post_save/post_delete; el borrado en lotes de
+borrado.py llama a `olvidar()` porque no emite señales.
+"""
+import math
+import unicodedata
+
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef
+from django.db.models.signals import post_delete, post_save
+
+from .models import Profesor, Curso, Estudiante, Trigrama, FrecuenciaTrigrama
+
+
+UMBRAL = 0.5
+# Tope de candidatos que se puntúan por consulta
+MAX_CANDIDATOS = 1000
+# Caracteres de texto largo (descripción) que se indexan
+MAX_TEXTO = 1000
+LOTE = 5000
+
+ALFABETO = ' abcdefghijklmnopqrstuvwxyz0123456789'
+_CODIGO = {caracter: i for i, caracter in enumerate(ALFABETO)}
+BASE = len(ALFABETO)
+
+TIPOS = {
+    Trigrama.ESTUDIANTE: (Estudiante, ('nombre', 'email')),
+    Trigrama.PROFESOR: (Profesor, ('nombre', 'email')),
+    Trigrama.CURSO: (Curso, ('nombre', 'descripcion')),
+}
+TIPO_DE_MODELO = {modelo: tipo for tipo, (modelo, campos) in TIPOS.items()}
+
+
+def palabras(texto):
+    """Palabras normalizadas de `texto`: minúsculas, sin tildes y solo letras y dígitos."""
+    texto = unicodedata.normalize('NFKD', (texto or '')[:MAX_TEXTO].casefold())
+    return ''.join(c if c in _CODIGO else ' ' for c in texto if not unicodedata.combining(c)).split()
+
+
+def codificar(trigrama):
+    a, b, c = trigrama
+    return (_CODIGO[a] * BASE + _CODIGO[b]) * BASE + _CODIGO[c]
+
+
+def trigramas_texto(*textos):
+    """Trigramas (codificados) de los textos de un objeto, con relleno de palabra."""
+    resultado = set()
+    for texto in textos:
+        for palabra in palabras(texto):
+            rellena = f'  {palabra} '
+            resultado.update(codificar(rellena[i:i + 3]) for i in range(len(rellena) - 2))
+    return resultado
+
+
+def trigramas_consulta(texto):
+    """Trigramas de una consulta: los internos de cada palabra (con relleno si es corta)."""
+    resultado = set()
+    for palabra in palabras(texto):
+        if len(palabra) < 3:
+            palabra = f'  {palabra} '
+        resultado.update(codificar(palabra[i:i + 3]) for i in range(len(palabra) - 2))
+    return resultado
+
+
+def _texto(tipo, objeto):
+    return [getattr(objeto, campo) for campo in TIPOS[tipo][1]]
+
+
+def indexar(tipo, objeto_id, textos):
+    """Deja en el índice exactamente los trigramas de `textos` para el objeto."""
+    nuevos = trigramas_texto(*textos)
+    filas = Trigrama.objects.filter(tipo=tipo, objeto_id=objeto_id)
+    actuales = set(filas.values_list('trigrama', flat=True))
+    with transaction.atomic():
+        if actuales - nuevos:
+            filas.filter(trigrama__in=actuales - nuevos).delete()
+        Trigrama.objects.bulk_create(
+            [Trigrama(tipo=tipo, objeto_id=objeto_id, trigrama=trigrama) for trigrama in nuevos - actuales]
+        )
+
+
+def olvidar(tipo, objeto_ids):
+    """Saca del índice los objetos `objeto_ids` del tipo dado."""
+    return Trigrama.objects.filter(tipo=tipo, objeto_id__in=list(objeto_ids)).delete()[0]
+
+
+def reindexar(tipos=None):
+    """Reconstruye el índice y las frecuencias de `tipos` (todos por defecto). Devuelve los objetos indexados."""
+    total = 0
+    for tipo in tipos or TIPOS:
+        modelo, campos = TIPOS[tipo]
+        Trigrama.objects.filter(tipo=tipo).delete()
+        filas = []
+        for objeto_id, *textos in modelo.objects.order_by('pk').values_list('pk', *campos).iterator(chunk_size=LOTE):
+            filas.extend(Trigrama(tipo=tipo, objeto_id=objeto_id, trigrama=t) for t in trigramas_texto(*textos))
+            total += 1
+            if len(filas) >= LOTE:
+                Trigrama.objects.bulk_create(filas, batch_size=LOTE)
+                filas = []
+        Trigrama.objects.bulk_create(filas, batch_size=LOTE)
+        recalcular_frecuencias(tipo)
+    return total
+
+
+def recalcular_frecuencias(tipo):
+    frecuencias = Trigrama.objects.filter(tipo=tipo).values('trigrama').annotate(objetos=Count('pk')).order_by()
+    with transaction.atomic():
+        FrecuenciaTrigrama.objects.filter(tipo=tipo).delete()
+        FrecuenciaTrigrama.objects.bulk_create(
+            [FrecuenciaTrigrama(tipo=tipo, **fila) for fila in frecuencias.iterator()], batch_size=LOTE,
+        )
+
+
+def _exactos(tipo, consulta, limite):
+    """Ids con todos los trigramas de `consulta` (ordenada del más raro al más común), por id."""
+    primero, *resto = consulta
+    filas = Trigrama.objects.filter(tipo=tipo, trigrama=primero)
+    for trigrama in resto:
+        filas = filas.filter(Exists(
+            Trigrama.objects.filter(tipo=tipo, objeto_id=OuterRef('objeto_id'), trigrama=trigrama)
+        ))
+    return list(filas.order_by('objeto_id').values_list('objeto_id', flat=True)[:limite])
+
+
+def _parecidos(tipo, consulta, minimo, limite, excluir):
+    """Ids con al menos `minimo` trigramas de `consulta`, del más parecido al menos."""
+    raros = consulta[:len(consulta) - minimo + 1]
+    candidatos = set(
+        Trigrama.objects.filter(tipo=tipo, trigrama__in=raros).values_list('objeto_id', flat=True)[:MAX_CANDIDATOS]
+    ) - set(excluir)
+    if not candidatos:
+        return []
+    filas = (
+        Trigrama.objects.filter(tipo=tipo, objeto_id__in=candidatos, trigrama__in=consulta)
+        .values('objeto_id').annotate(comunes=Count('trigrama')).filter(comunes__gte=minimo)
+        .order_by('-comunes', 'objeto_id').values_list('objeto_id', flat=True)
+    )
+    return list(filas[:limite])
+
+
+def buscar(tipo, texto, limite=50, umbral=UMBRAL):
+    """
+    Ids de objetos de `tipo` que coinciden con `texto`, del más parecido al
+    menos (a igual puntaje, por id). Vacío si la consulta no tiene letras ni dígitos.
+    """
+    consulta = trigramas_consulta(texto)
+    if not consulta:
+        return []
+    frecuencias = dict(
+        FrecuenciaTrigrama.objects.filter(tipo=tipo, trigrama__in=consulta).values_list('trigrama', 'objetos')
+    )
+    # Los que no están en las frecuencias son nuevos, o sea raros: van primero
+    consulta = sorted(consulta, key=lambda t: (frecuencias.get(t, 0), t))
+    ids = _exactos(tipo, consulta, limite)
+    minimo = max(1, math.ceil(umbral * len(consulta)))
+    if len(ids) < limite and minimo < len(consulta):
+        ids += _parecidos(tipo, consulta, minimo, limite - len(ids), ids)
+    return ids
+
+
+def filtrar(queryset, texto, limite=50):
+    """`queryset` restringido a los resultados de buscar(), en orden de puntaje. Devuelve una lista."""
+    tipo = TIPO_DE_MODELO[queryset.model]
+    ids = buscar(tipo, texto, limite)
+    objetos = queryset.in_bulk(ids)
+    return [objetos[pk] for pk in ids if pk in objetos]
+
+
+def _guardado(sender, instance, **kwargs):
+    tipo = TIPO_DE_MODELO[sender]
+    indexar(tipo, instance.pk, _texto(tipo, instance))
+
+
+def _borrado(sender, instance, **kwargs):
+    olvidar(TIPO_DE_MODELO[sender], [instance.pk])
+
+
+def conectar_senales():
+    for modelo in TIPO_DE_MODELO:
+        post_save.connect(_guardado, sender=modelo, dispatch_uid=f'busqueda_{modelo.__name__}_guardado')
+        post_delete.connect(_borrado, sender=modelo, dispatch_uid=f'busqueda_{modelo.__name__}_borrado')
@@ -0,0 +1,74 @@
+# academico/carga.py
+"""
+Carga docente: cursos, estudiantes e inscripciones por profesor.
+
+Contar varias relaciones con JOINs en la misma consulta multiplica las filas
+(cursos × inscripciones) y obliga a Count(distinct) sobre el producto. Aquí
+cada columna es una subconsulta correlacionada agregada sobre una sola
+relación, sin JOIN ni GROUP BY en la consulta externa (con el GROUP BY, el
+motor reevalúa las subconsultas por cada fila agrupada): `carga_profesores()`
+es una sola consulta sin filas repetidas y se ordena y pagina en la base.
+
+`resumen_carga()` (el recuadro del índice del admin) se cachea
+TIEMPO_CACHE segundos: es un tablero, unos minutos de atraso no importan.
+"""
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Profesor, Curso, Inscripcion
+
+
+TIEMPO_CACHE = 60 * 5
+CLAVE_RESUMEN = 'academico:resumen_carga'
+# Criterios de orden de la vista: nombre público -> campos de order_by
+ORDENES = {
+    'carga': ('-total_estudiantes', '-total_cursos', 'nombre'),
+    'cursos': ('-total_cursos', '-total_estudiantes', 'nombre'),
+    'activas': ('-activas', 'nombre'),
+    'finalizadas': ('-finalizadas', 'nombre'),
+    'nombre': ('nombre',),
+}
+ORDEN_POR_DEFECTO = 'carga'
+
+
+def _cursos():
+    cursos = Curso.objects.filter(profesor=OuterRef('pk')).order_by().values('profesor').annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(cursos, output_field=IntegerField()), 0)
+
+
+def _por_profesor(agregado, **filtros):
+    """Subconsulta con `agregado` sobre las inscripciones de los cursos de cada profesor."""
+    inscripciones = (
+        Inscripcion.objects.filter(curso__profesor=OuterRef('pk'), **filtros)
+        .order_by().values('curso__profesor').annotate(total=agregado).values('total')
+    )
+    return Coalesce(Subquery(inscripciones, output_field=IntegerField()), 0)
+
+
+def carga_profesores(orden=ORDEN_POR_DEFECTO):
+    """Profesores anotados con total_cursos, total_estudiantes, activas y finalizadas, en una consulta."""
+    return Profesor.objects.annotate(
+        total_cursos=_cursos(),
+        total_estudiantes=_por_profesor(Count('estudiante', distinct=True)),
+        activas=_por_profesor(Count('pk'), estado='A'),
+        finalizadas=_por_profesor(Count('pk'), estado='F'),
+    ).order_by(*ORDENES.get(orden, ORDENES[ORDEN_POR_DEFECTO]))
+
+
+def resumen_carga(mas_cargados=5):
+    """Totales de la plataforma y los profesores con más estudiantes, desde la caché."""
+    resumen = cache.get(CLAVE_RESUMEN)
+    if resumen is None:
+        resumen = Inscripcion.objects.aggregate(
+            activas=Count('pk', filter=Q(estado='A')),
+            finalizadas=Count('pk', filter=Q(estado='F')),
+            estudiantes=Count('estudiante', distinct=True),
+        )
+        resumen['profesores'] = Profesor.objects.count()
+        resumen['cursos'] = Curso.objects.count()
+        resumen['mas_cargados'] = list(
+            carga_profesores().values('pk', 'nombre', 'total_cursos', 'total_estudiantes')[:mas_cargados]
+        )
+        cache.set(CLAVE_RESUMEN, resumen, TIEMPO_CACHE)
+    return resumen
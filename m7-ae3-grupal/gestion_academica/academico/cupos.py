@@ -0,0 +1,159 @@
+# academico/cupos.py
+"""
+Cupos de los cursos y lista de espera.
+
+`Curso.cupos_ocupados` cuenta las inscripciones activas. Tomar un cupo es un
+UPDATE condicional (`SET cupos_ocupados = cupos_ocupados + 1 WHERE id = ?
+AND cupos_ocupados < cupo_maximo`), como el stock en productos: comprobar y
+ocupar es una sola sentencia, que bloquea solo la fila del curso y solo
+durante una transacción corta, así que miles de estudiantes inscribiéndose a
+la vez no pasan el cupo ni hacen cola detrás de un bloqueo de tabla.
+
+Sin cupo, el estudiante queda en ListaEspera. Cuando una inscripción activa
+se finaliza o se borra el cupo se devuelve y, al confirmar la transacción,
+`promover()` pasa a los primeros de la fila: cada uno toma el cupo con el
+mismo UPDATE condicional y, si ya no queda nadie esperando, lo devuelve.
+Anotarse en la lista también llama a promover(), así un cupo que se liberó
+mientras alguien se anotaba no queda vacío.
+
+Las inscripciones creadas o cambiadas por otros caminos (admin, ORM) mueven
+el contador con señales, sin condición: el admin puede pasar el cupo a
+propósito. `recalcular_cupos()` rehace los contadores desde las inscripciones.
+"""
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .models import Curso, Inscripcion, ListaEspera
+
+
+ACTIVO = 'A'
+
+
+class CursoLleno(Exception):
+    """El curso no tiene cupos disponibles."""
+
+
+class YaInscrito(Exception):
+    """El estudiante ya tiene una inscripción en el curso."""
+
+
+def tomar_cupo(curso_id):
+    """Ocupa un cupo del curso si queda alguno, en una sola sentencia. Devuelve True si lo tomó."""
+    return bool(
+        Curso.objects.filter(pk=curso_id)
+        .filter(Q(cupo_maximo__isnull=True) | Q(cupos_ocupados__lt=F('cupo_maximo')))
+        .update(cupos_ocupados=F('cupos_ocupados') + 1)
+    )
+
+
+def devolver_cupo(curso_id):
+    Curso.objects.filter(pk=curso_id, cupos_ocupados__gt=0).update(cupos_ocupados=F('cupos_ocupados') - 1)
+
+
+def _inscribir_con_cupo(estudiante_id, curso_id):
+    inscripcion = Inscripcion(estudiante_id=estudiante_id, curso_id=curso_id, estado=ACTIVO)
+    # El cupo ya está contado: la señal no lo vuelve a sumar
+    inscripcion._cupo_tomado = True
+    inscripcion.save()
+    return inscripcion
+
+
+def inscribir(estudiante_id, curso_id, esperar=True):
+    """
+    Inscribe al estudiante si hay cupo y devuelve la Inscripcion. Sin cupo lo
+    anota en la lista de espera y devuelve la ListaEspera, o lanza CursoLleno
+    si `esperar` es False. Lanza YaInscrito si ya estaba inscrito.
+    """
+    try:
+        with transaction.atomic():
+            if tomar_cupo(curso_id):
+                return _inscribir_con_cupo(estudiante_id, curso_id)
+    except IntegrityError:
+        # La transacción se deshizo, cupo incluido
+        raise YaInscrito(f'El estudiante {estudiante_id} ya está inscrito en el curso {curso_id}')
+    if not esperar:
+        raise CursoLleno(f'El curso {curso_id} no tiene cupos disponibles')
+    if Inscripcion.objects.filter(estudiante_id=estudiante_id, curso_id=curso_id).exists():
+        raise YaInscrito(f'El estudiante {estudiante_id} ya está inscrito en el curso {curso_id}')
+    entrada, creada = ListaEspera.objects.get_or_create(curso_id=curso_id, estudiante_id=estudiante_id)
+    if creada:
+        transaction.on_commit(lambda: promover(curso_id))
+    return entrada
+
+
+def promover(curso_id):
+    """Inscribe a los primeros de la lista de espera mientras haya cupo. Devuelve las inscripciones creadas."""
+    promovidas = []
+    while True:
+        with transaction.atomic():
+            if not tomar_cupo(curso_id):
+                return promovidas
+            fila = ListaEspera.objects.filter(curso_id=curso_id).order_by('creada_en', 'pk')
+            if connection.features.has_select_for_update_skip_locked:
+                fila = fila.select_for_update(skip_locked=True)
+            entrada = fila.values_list('pk', 'estudiante_id').first()
+            # Sin SKIP LOCKED dos procesos pueden elegir al mismo: el DELETE decide quién lo promueve
+            if entrada is None or not ListaEspera.objects.filter(pk=entrada[0]).delete()[0]:
+                devolver_cupo(curso_id)
+                if entrada is None:
+                    return promovidas
+                continue
+            try:
+                with transaction.atomic():
+                    promovidas.append(_inscribir_con_cupo(entrada[1], curso_id))
+            except IntegrityError:
+                # Ya tenía una inscripción (p. ej. finalizada): sale de la fila sin ocupar cupo
+                devolver_cupo(curso_id)
+
+
+def liberar_cupo(curso_id):
+    """Devuelve un cupo y, al confirmar, promueve a la lista de espera."""
+    devolver_cupo(curso_id)
+    transaction.on_commit(lambda: promover(curso_id))
+
+
+def recalcular_cupos():
+    """Rehace cupos_ocupados de todos los cursos con un solo UPDATE."""
+    activas = (
+        Inscripcion.objects.filter(curso=OuterRef('pk'), estado=ACTIVO)
+        .order_by().values('curso').annotate(total=Count('pk')).values('total')
+    )
+    return Curso.objects.update(cupos_ocupados=Coalesce(Subquery(activas), 0))
+
+
+def _antes_de_guardar(sender, instance, **kwargs):
+    instance._anterior = None
+    if not instance._state.adding:
+        instance._anterior = Inscripcion.objects.filter(pk=instance.pk).values_list('curso_id', 'estado').first()
+
+
+def _inscripcion_guardada(sender, instance, created, **kwargs):
+    anterior = getattr(instance, '_anterior', None)
+    ahora = (instance.curso_id, instance.estado)
+    if anterior == ahora:
+        return
+    if anterior and anterior[1] == ACTIVO:
+        liberar_cupo(anterior[0])
+    if instance.estado == ACTIVO and not getattr(instance, '_cupo_tomado', False):
+        Curso.objects.filter(pk=instance.curso_id).update(cupos_ocupados=F('cupos_ocupados') + 1)
+    instance._cupo_tomado = False
+
+
+def _inscripcion_borrada(sender, instance, **kwargs):
+    if instance.estado == ACTIVO:
+        liberar_cupo(instance.curso_id)
+
+
+def _curso_guardado(sender, instance, created, **kwargs):
+    # Si se amplió el cupo, entran los que esperaban
+    if not created:
+        transaction.on_commit(lambda: promover(instance.pk))
+
+
+def conectar_senales():
+    pre_save.connect(_antes_de_guardar, sender=Inscripcion, dispatch_uid='cupos_inscripcion_anterior')
+    post_save.connect(_inscripcion_guardada, sender=Inscripcion, dispatch_uid='cupos_inscripcion_guardada')
+    post_delete.connect(_inscripcion_borrada, sender=Inscripcion, dispatch_uid='cupos_inscripcion_borrada')
+    post_save.connect(_curso_guardado, sender=Curso, dispatch_uid='cupos_curso_guardado')
@@ -0,0 +1,115 @@
+# academico/expedientes.py
+"""
+Expediente académico: promedio ponderado, créditos y promedios por semestre.
+
+El promedio es la media de `nota_final` ponderada por los créditos del
+curso, sobre las inscripciones que ya tienen nota; los créditos aprobados
+son los de cursos con nota >= NOTA_APROBACION. Todo sale de agregados en la
+base: `promedios()` resume a todos los estudiantes con un único
+GROUP BY estudiante_id y `expediente()` a uno solo con un GROUP BY por
+semestre (el total se suma de los semestres).
+
+El expediente de un estudiante se cachea con una clave que incluye la
+última `actualizada_en` de sus inscripciones y cuántas tiene, leídas por el
+índice (estudiante, actualizada_en): cualquier alta, cambio o baja genera
+una clave nueva y no hace falta invalidar nada. Ojo: `QuerySet.update()` no
+toca `auto_now`, así que quien actualice inscripciones en bloque debe poner
+`actualizada_en=Now()`. Un cambio de créditos de un curso se ve al vencer
+TIEMPO_CACHE.
+"""
+from datetime import date
+
+from django.core.cache import cache
+from django.db.models import Case, Count, F, FloatField, Max, Min, Q, Sum, Value, When
+from django.db.models.functions import ExtractYear
+
+from .models import Inscripcion
+
+
+NOTA_APROBACION = 4.0
+TIEMPO_CACHE = 60 * 60 * 24
+
+
+def _totales():
+    con_nota = Q(nota_final__isnull=False)
+    return {
+        'puntos': Sum(F('nota_final') * F('curso__creditos'), filter=con_nota, output_field=FloatField()),
+        'creditos_evaluados': Sum('curso__creditos', filter=con_nota),
+        'creditos_aprobados': Sum('curso__creditos', filter=Q(nota_final__gte=NOTA_APROBACION)),
+        'creditos_inscritos': Sum('curso__creditos'),
+        'cursos': Count('pk'),
+    }
+
+
+def _resumen(fila):
+    """Pasa una fila de _totales() (o la suma de varias) a promedio y créditos."""
+    evaluados = fila['creditos_evaluados'] or 0
+    return {
+        'promedio': round(fila['puntos'] / evaluados, 2) if evaluados else None,
+        'creditos_aprobados': fila['creditos_aprobados'] or 0,
+        'creditos_inscritos': fila['creditos_inscritos'] or 0,
+        'cursos': fila['cursos'],
+    }
+
+
+def _por_estudiante():
+    return Inscripcion.objects.values('estudiante_id').annotate(**_totales()).order_by()
+
+
+def promedios():
+    """{estudiante_id: resumen} de todos los estudiantes con inscripciones, en una consulta."""
+    return {fila['estudiante_id']: _resumen(fila) for fila in _por_estudiante()}
+
+
+def _clave(estudiante_id):
+    version = Inscripcion.objects.filter(estudiante_id=estudiante_id).aggregate(
+        ultima=Max('actualizada_en'), total=Count('pk'),
+    )
+    marca = version['ultima'].timestamp() if version['ultima'] else 0
+    return f'academico:expediente:{estudiante_id}:{marca}:{version["total"]}'
+
+
+def expediente(estudiante_id):
+    """Resumen del estudiante con la lista `periodos` (año, semestre y su resumen), desde la caché."""
+    clave = _clave(estudiante_id)
+    datos = cache.get(clave)
+    if datos is None:
+        filas = list(
+            Inscripcion.objects.filter(estudiante_id=estudiante_id)
+            .annotate(
+                anio=ExtractYear('fecha_inscripcion'),
+                semestre=Case(When(fecha_inscripcion__month__lte=6, then=Value(1)), default=Value(2)),
+            )
+            .values('anio', 'semestre').annotate(**_totales()).order_by('anio', 'semestre')
+        )
+        total = {campo: sum(fila[campo] or 0 for fila in filas) for campo in _totales()}
+        datos = _resumen(total)
+        datos['periodos'] = [
+            {'anio': fila['anio'], 'semestre': fila['semestre'], **_resumen(fila)} for fila in filas
+        ]
+        cache.set(clave, datos, TIEMPO_CACHE)
+    return datos
+
+
+def ranking(cohorte=None):
+    """
+    Tabla de posiciones por promedio: lista de dicts con posición, percentil y
+    resumen de cada estudiante con nota. `cohorte` filtra por el año de la
+    primera inscripción. Un empate en el promedio comparte la posición.
+    """
+    filas = _por_estudiante()
+    if cohorte is not None:
+        filas = filas.annotate(ingreso=Min('fecha_inscripcion')).filter(
+            ingreso__gte=date(cohorte, 1, 1), ingreso__lt=date(cohorte + 1, 1, 1),
+        )
+    tabla = [{'estudiante_id': fila['estudiante_id'], **_resumen(fila)} for fila in filas]
+    tabla = [fila for fila in tabla if fila['promedio'] is not None]
+    tabla.sort(key=lambda fila: (-fila['promedio'], fila['estudiante_id']))
+    total = len(tabla)
+    anterior = None
+    for indice, fila in enumerate(tabla):
+        if fila['promedio'] != anterior:
+            posicion, anterior = indice + 1, fila['promedio']
+        fila['posicion'] = posicion
+        fila['percentil'] = round(100 * (total - posicion + 1) / total, 1)
+    return tabla
@@ -0,0 +1,66 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from academico.busqueda import buscar, reindexar
+from academico.models import Estudiante, Trigrama
+
+
+NOMBRES = ['Juan', 'María', 'José', 'Ana', 'Pedro', 'Camila', 'Diego', 'Valentina', 'Matías', 'Fernanda',
+           'Tomás', 'Josefa', 'Benjamín', 'Catalina', 'Vicente', 'Isidora', 'Martín', 'Antonia', 'Lucas', 'Sofía']
+APELLIDOS = ['González', 'Muñoz', 'Rojas', 'Díaz', 'Pérez', 'Soto', 'Contreras', 'Silva', 'Martínez', 'Sepúlveda',
+             'Morales', 'Rodríguez', 'López', 'Fuentes', 'Hernández', 'Torres', 'Araya', 'Flores', 'Espinoza', 'Valenzuela']
+
+
+class Command(BaseCommand):
+    help = (
+        'Latencia de la búsqueda por trigramas frente a icontains sobre N estudiantes '
+        'de prueba (emails bench.*). Con --borrar elimina los estudiantes y su índice al final.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--estudiantes', type=int, default=100000)
+        parser.add_argument('--repeticiones', type=int, default=20)
+        parser.add_argument('--borrar', action='store_true')
+
+    def handle(self, *args, **options):
+        aleatorio = random.Random(7)
+        existentes = Estudiante.objects.filter(email__startswith='bench.').count()
+        faltan = options['estudiantes'] - existentes
+        if faltan > 0:
+            inicio = time.perf_counter()
+            for desde in range(existentes, options['estudiantes'], 10000):
+                Estudiante.objects.bulk_create([
+                    Estudiante(
+                        nombre=f'{aleatorio.choice(NOMBRES)} {aleatorio.choice(APELLIDOS)} {aleatorio.choice(APELLIDOS)}',
+                        email=f'bench.{numero}@estudiante.cl',
+                    )
+                    for numero in range(desde, min(desde + 10000, options['estudiantes']))
+                ])
+            self.stdout.write(f'{faltan} estudiantes creados en {time.perf_counter() - inicio:.1f} s')
+            inicio = time.perf_counter()
+            reindexar([Trigrama.ESTUDIANTE])
+            self.stdout.write(f'Índice reconstruido en {time.perf_counter() - inicio:.1f} s')
+
+        consultas = ['valenzuela', 'sepulbeda', 'josefa araya', 'bench.123456', 'ntrer']
+        for consulta in consultas:
+            tiempos = []
+            for _ in range(options['repeticiones']):
+                inicio = time.perf_counter()
+                resultados = buscar(Trigrama.ESTUDIANTE, consulta)
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            inicio = time.perf_counter()
+            list(Estudiante.objects.filter(nombre__icontains=consulta).values_list('pk', flat=True)[:50])
+            icontains = (time.perf_counter() - inicio) * 1000
+            tiempos.sort()
+            self.stdout.write(
+                f'  {consulta!r}: {len(resultados)} resultados, mediana {statistics.median(tiempos):.1f} ms, '
+                f'p95 {tiempos[int(len(tiempos) * 0.95) - 1]:.1f} ms (icontains {icontains:.1f} ms)'
+            )
+
+        if options['borrar']:
+            ids = Estudiante.objects.filter(email__startswith='bench.').values_list('pk', flat=True)
+            Trigrama.objects.filter(tipo=Trigrama.ESTUDIANTE, objeto_id__in=ids).delete()
+            Estudiante.objects.filter(email__startswith='bench.').delete()
@@ -0,0 +1,99 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, OperationalError
+
+from academico.borrado import borrar_profesores
+from academico.cupos import YaInscrito, inscribir
+from academico.models import Profesor, Curso, Estudiante, Inscripcion, ListaEspera
+
+
+class Command(BaseCommand):
+    help = (
+        'Apertura de inscripciones: N estudiantes se inscriben a la vez en el mismo curso '
+        'desde varios hilos. Comprueba que no se pase el cupo, que nadie quede inscrito y '
+        'en espera a la vez y que al finalizar inscripciones entren los que esperaban. Usa '
+        'la base de datos configurada (no sirve con SQLite en memoria) y borra lo que crea.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--estudiantes', type=int, default=5000)
+        parser.add_argument('--hilos', type=int, default=32)
+        parser.add_argument('--cupo', type=int, default=300)
+        parser.add_argument('--liberar', type=int, default=50, help='Inscripciones que se finalizan al final.')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            raise CommandError('Con SQLite en memoria cada hilo vería una base distinta; usa un archivo.')
+
+        profesor = Profesor.objects.create(nombre='bench-inscripciones', email='bench-inscripciones@bench.cl')
+        curso = Curso.objects.create(nombre='bench', descripcion='-', profesor=profesor, cupo_maximo=options['cupo'])
+        Estudiante.objects.bulk_create([
+            Estudiante(nombre=f'bench {i}', email=f'bench-inscripciones.{i}@bench.cl')
+            for i in range(options['estudiantes'])
+        ], batch_size=1000)
+        ids = list(Estudiante.objects.filter(email__startswith='bench-inscripciones.').values_list('pk', flat=True))
+        resultados = {'inscritos': 0, 'en_espera': 0, 'bloqueos': 0}
+        candado = threading.Lock()
+
+        def trabajar(parte):
+            locales = dict.fromkeys(resultados, 0)
+            try:
+                for estudiante_id in parte:
+                    # SQLite admite un escritor a la vez: se reintenta si la base estaba ocupada
+                    for _ in range(20):
+                        try:
+                            resultado = inscribir(estudiante_id, curso.pk)
+                        except OperationalError:
+                            locales['bloqueos'] += 1
+                            continue
+                        except YaInscrito:
+                            break
+                        locales['inscritos' if isinstance(resultado, Inscripcion) else 'en_espera'] += 1
+                        break
+            finally:
+                connections.close_all()
+            with candado:
+                for clave, valor in locales.items():
+                    resultados[clave] += valor
+
+        hilos = [threading.Thread(target=trabajar, args=(ids[i::options['hilos']],)) for i in range(options['hilos'])]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        duracion = time.perf_counter() - inicio
+
+        curso.refresh_from_db()
+        activas = Inscripcion.objects.filter(curso=curso, estado='A').count()
+        esperando = ListaEspera.objects.filter(curso=curso).count()
+        duplicados = ListaEspera.objects.filter(curso=curso, estudiante__inscripcion__curso=curso).count()
+        self.stdout.write(
+            f'{connection.vendor}: {len(ids)} estudiantes, {options["hilos"]} hilos, {duracion:.2f}s '
+            f'({len(ids) / duracion:.0f} inscripciones/s); inscritos={resultados["inscritos"]} '
+            f'en_espera={resultados["en_espera"]} reintentos={resultados["bloqueos"]}; '
+            f'contador={curso.cupos_ocupados} activas={activas} en_lista={esperando}'
+        )
+        errores = []
+        if activas > options['cupo'] or curso.cupos_ocupados != activas:
+            errores.append(f'cupo {options["cupo"]}, contador {curso.cupos_ocupados}, activas {activas}')
+        if duplicados or activas + esperando != len(ids):
+            errores.append(f'{activas} inscritos + {esperando} en espera != {len(ids)} ({duplicados} en ambos)')
+
+        # Al finalizar inscripciones entran los primeros de la lista
+        for inscripcion in Inscripcion.objects.filter(curso=curso, estado='A')[:options['liberar']]:
+            inscripcion.estado = 'F'
+            inscripcion.save()
+        promovidos = esperando - ListaEspera.objects.filter(curso=curso).count()
+        activas = Inscripcion.objects.filter(curso=curso, estado='A').count()
+        self.stdout.write(f'Finalizadas {options["liberar"]}: promovidos {promovidos}, activas {activas}')
+        if esperando and (promovidos != min(options['liberar'], esperando) or activas != options['cupo']):
+            errores.append(f'promovidos {promovidos} de {options["liberar"]} cupos liberados')
+
+        borrar_profesores(Profesor.objects.filter(pk=profesor.pk))
+        Estudiante.objects.filter(pk__in=ids).delete()
+        if errores:
+            raise CommandError('; '.join(errores))
+        self.stdout.write(self.style.SUCCESS('Sin sobrecupo.'))
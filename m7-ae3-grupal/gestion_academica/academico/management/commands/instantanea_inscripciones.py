@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from academico import analitica
+from academico.models import Inscripcion
+
+
+class Command(BaseCommand):
+    help = (
+        'Exporta Inscripcion (con curso y profesor) a la instantánea en columnas que usan '
+        'los reportes de academico/analitica.py. Pensado para correr cada noche. Con '
+        '--reportes mide cada reporte sobre la instantánea y su equivalente en la base.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--directorio', help='Por defecto INSTANTANEAS_DIR/inscripciones.')
+        parser.add_argument('--reportes', action='store_true')
+
+    def handle(self, *args, **options):
+        if analitica.np is None:
+            raise CommandError('Requiere NumPy (pip install numpy).')
+        inicio = time.perf_counter()
+        filas = analitica.exportar(options['directorio'])
+        self.stdout.write(f'{filas} inscripciones exportadas en {time.perf_counter() - inicio:.1f} s')
+        if not options['reportes']:
+            return
+
+        inicio = time.perf_counter()
+        instantanea = analitica.Instantanea(options['directorio'])
+        self.stdout.write(f'Apertura: {(time.perf_counter() - inicio) * 1000:.1f} ms')
+        equivalentes = {
+            'por_curso_y_estado': lambda: list(Inscripcion.objects.values('curso_id', 'estado').annotate(n=Count('pk')).order_by()),
+            'distribucion_notas_por_profesor': lambda: list(
+                Inscripcion.objects.filter(nota_final__isnull=False)
+                .values('curso__profesor_id', 'nota_final').annotate(n=Count('pk')).order_by()
+            ),
+            'tendencia_inscripciones': lambda: list(
+                Inscripcion.objects.values('fecha_inscripcion__year', 'fecha_inscripcion__month')
+                .annotate(n=Count('pk')).order_by()
+            ),
+        }
+        for nombre, consulta in equivalentes.items():
+            inicio = time.perf_counter()
+            getattr(instantanea, nombre)()
+            columnas = (time.perf_counter() - inicio) * 1000
+            inicio = time.perf_counter()
+            consulta()
+            base = (time.perf_counter() - inicio) * 1000
+            self.stdout.write(f'  {nombre}: instantánea {columnas:.1f} ms, base de datos {base:.1f} ms')
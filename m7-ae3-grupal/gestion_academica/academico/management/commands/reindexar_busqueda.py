@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from academico.busqueda import TIPOS, reindexar
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstruye el índice de trigramas y sus frecuencias. Hace falta tras cargas '
+        'masivas (bulk_create no emite señales) y conviene de vez en cuando para que las '
+        'frecuencias que ordenan la búsqueda estén al día.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('tipos', nargs='*', help=f'Tipos a reindexar ({", ".join(TIPOS)}); por defecto todos.')
+
+    def handle(self, *args, **options):
+        desconocidos = set(options['tipos']) - set(TIPOS)
+        if desconocidos:
+            raise CommandError(f'Tipos desconocidos: {", ".join(sorted(desconocidos))}')
+        inicio = time.perf_counter()
+        total = reindexar(options['tipos'])
+        self.stdout.write(f'{total} objetos indexados en {time.perf_counter() - inicio:.1f} s')
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academico', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='curso',
+            name='creditos',
+            field=models.PositiveSmallIntegerField(default=4),
+        ),
+        migrations.AddField(
+            model_name='inscripcion',
+            name='actualizada_en',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='inscripcion',
+            index=models.Index(fields=['estudiante', 'actualizada_en'], name='inscripcion_est_actualiz_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academico', '0002_expedientes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inscripcion',
+            index=models.Index(fields=['curso', 'estado', 'estudiante'], name='inscripcion_curso_estado_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academico', '0003_carga_docente'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FrecuenciaTrigrama',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('E', 'Estudiante'), ('P', 'Profesor'), ('C', 'Curso')], max_length=1)),
+                ('trigrama', models.PositiveIntegerField()),
+                ('objetos', models.PositiveIntegerField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('tipo', 'trigrama'), name='frecuencia_trigrama_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Trigrama',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('E', 'Estudiante'), ('P', 'Profesor'), ('C', 'Curso')], max_length=1)),
+                ('objeto_id', models.BigIntegerField()),
+                ('trigrama', models.PositiveIntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tipo', 'trigrama', 'objeto_id'], name='trigrama_busqueda_idx'), models.Index(fields=['tipo', 'objeto_id', 'trigrama'], name='trigrama_objeto_idx')],
+            },
+        ),
+    ]
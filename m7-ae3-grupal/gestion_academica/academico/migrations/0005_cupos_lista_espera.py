@@ -0,0 +1,50 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def contar_cupos(apps, schema_editor):
+    Curso = apps.get_model('academico', 'Curso')
+    Inscripcion = apps.get_model('academico', 'Inscripcion')
+    activas = (
+        Inscripcion.objects.filter(curso=OuterRef('pk'), estado='A')
+        .order_by().values('curso').annotate(total=Count('pk')).values('total')
+    )
+    Curso.objects.update(cupos_ocupados=Coalesce(Subquery(activas), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academico', '0004_busqueda_trigramas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='curso',
+            name='cupo_maximo',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='curso',
+            name='cupos_ocupados',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='ListaEspera',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('creada_en', models.DateTimeField(auto_now_add=True)),
+                ('curso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lista_espera', to='academico.curso')),
+                ('estudiante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='academico.estudiante')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['curso', 'creada_en', 'id'], name='lista_espera_orden_idx')],
+                'constraints': [models.UniqueConstraint(fields=('curso', 'estudiante'), name='lista_espera_curso_estudiante_uniq')],
+            },
+        ),
+        migrations.RunPython(contar_cupos, migrations.RunPython.noop),
+    ]
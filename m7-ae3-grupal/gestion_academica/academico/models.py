@@ -12,11 +12,24 @@ class Curso(models.Model):
     nombre = models.CharField(max_length=100)
     descripcion = models.TextField()
     profesor = models.ForeignKey(Profesor, on_delete=models.CASCADE, related_name='cursos')
+    creditos = models.PositiveSmallIntegerField(default=4)
+    # Sin cupo máximo no hay límite. cupos_ocupados cuenta las inscripciones activas (ver cupos.py)
+    cupo_maximo = models.PositiveIntegerField(null=True, blank=True)
+    cupos_ocupados = models.PositiveIntegerField(default=0, editable=False)
     estudiantes = models.ManyToManyField('Estudiante', through='Inscripcion')
 
     def __str__(self):
         return self.nombre
 
+    def save(self, *args, **kwargs):
+        # cupos_ocupados solo cambia con UPDATE atómicos (cupos.py): un save() con datos viejos no debe pisarlo
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                campo.name for campo in self._meta.concrete_fields
+                if not campo.primary_key and campo.name != 'cupos_ocupados'
+            ]
+        super().save(*args, **kwargs)
+
 # 2.2. Relación Muchos a Muchos (ManyToManyField) con Entidad Intermedia
 class Estudiante(models.Model):
     nombre = models.CharField(max_length=100)
@@ -35,13 +48,37 @@ class Inscripcion(models.Model):
     fecha_inscripcion = models.DateField(auto_now_add=True)
     estado = models.CharField(max_length=1, choices=ESTADO_CHOICES, default='A')
     nota_final = models.FloatField(null=True, blank=True)
+    # Versión del expediente del estudiante (ver expedientes.py)
+    actualizada_en = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('estudiante', 'curso')
+        indexes = [
+            models.Index(fields=['estudiante', 'actualizada_en'], name='inscripcion_est_actualiz_idx'),
+            # Cubre los conteos por curso de la carga docente (ver carga.py)
+            models.Index(fields=['curso', 'estado', 'estudiante'], name='inscripcion_curso_estado_idx'),
+        ]
 
     def __str__(self):
         return f'{self.estudiante.nombre} en {self.curso.nombre}'
 
+class ListaEspera(models.Model):
+    curso = models.ForeignKey(Curso, on_delete=models.CASCADE, related_name='lista_espera')
+    estudiante = models.ForeignKey(Estudiante, on_delete=models.CASCADE)
+    creada_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['curso', 'estudiante'], name='lista_espera_curso_estudiante_uniq'),
+        ]
+        indexes = [
+            # El primero de la fila de cada curso
+            models.Index(fields=['curso', 'creada_en', 'id'], name='lista_espera_orden_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.estudiante.nombre} esperando {self.curso.nombre}'
+
 # 2.3. Relación Uno a Uno (OneToOneField)
 class Perfil(models.Model):
     estudiante = models.OneToOneField(Estudiante, on_delete=models.CASCADE, primary_key=True)
@@ -52,3 +89,43 @@ class Perfil(models.Model):
     def __str__(self):
         return f'Perfil de {self.estudiante.nombre}'
 
+
+# Índice de búsqueda por trigramas (ver busqueda.py)
+class Trigrama(models.Model):
+    ESTUDIANTE = 'E'
+    PROFESOR = 'P'
+    CURSO = 'C'
+    TIPO_CHOICES = [
+        (ESTUDIANTE, 'Estudiante'),
+        (PROFESOR, 'Profesor'),
+        (CURSO, 'Curso'),
+    ]
+    tipo = models.CharField(max_length=1, choices=TIPO_CHOICES)
+    objeto_id = models.BigIntegerField()
+    # Los tres caracteres codificados como entero (busqueda.codificar)
+    trigrama = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [
+            # Listas de objetos por trigrama, para generar candidatos
+            models.Index(fields=['tipo', 'trigrama', 'objeto_id'], name='trigrama_busqueda_idx'),
+            # Trigramas de un objeto, para puntuar candidatos y reindexar
+            models.Index(fields=['tipo', 'objeto_id', 'trigrama'], name='trigrama_objeto_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.tipo}:{self.objeto_id}:{self.trigrama}'
+
+class FrecuenciaTrigrama(models.Model):
+    """Cuántos objetos de cada tipo tienen un trigrama; lo recalcula el comando reindexar_busqueda."""
+    tipo = models.CharField(max_length=1, choices=Trigrama.TIPO_CHOICES)
+    trigrama = models.PositiveIntegerField()
+    objetos = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tipo', 'trigrama'], name='frecuencia_trigrama_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.tipo}:{self.trigrama} ({self.objetos})'
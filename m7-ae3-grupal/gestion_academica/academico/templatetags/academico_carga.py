@@ -0,0 +1,12 @@
+from django import template
+
+from academico.carga import resumen_carga as _resumen_carga
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def resumen_carga():
+    """Resumen de carga docente (cacheado) para el índice del admin."""
+    return _resumen_carga()
@@ -1,3 +1,435 @@
+import datetime
+from io import StringIO
+from pathlib import Path
+import tempfile
+from unittest import skipIf
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+
+from .models import Profesor, Curso, Estudiante, Inscripcion, ListaEspera, Trigrama
+from .borrado import borrar_profesores, resumen_borrado_profesores
+from .busqueda import buscar, reindexar
+from . import analitica
+from .cupos import CursoLleno, YaInscrito, inscribir, recalcular_cupos
+from .carga import CLAVE_RESUMEN, carga_profesores, resumen_carga
+from .expedientes import expediente, promedios, ranking
+
+
+class BorradoProfesorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profesor = Profesor.objects.create(nombre='Dr. Juan Pérez', email='juan.perez@universidad.cl')
+        cls.otro = Profesor.objects.create(nombre='Dra. María González', email='maria.gonzalez@universidad.cl')
+        cls.cursos = [
+            Curso.objects.create(nombre=f'Curso {i}', descripcion='-', profesor=cls.profesor)
+            for i in range(3)
+        ]
+        cls.curso_otro = Curso.objects.create(nombre='Base de Datos', descripcion='-', profesor=cls.otro)
+        estudiantes = Estudiante.objects.bulk_create([
+            Estudiante(nombre=f'Estudiante {i}', email=f'e{i}@estudiante.cl') for i in range(4)
+        ])
+        Inscripcion.objects.bulk_create([
+            Inscripcion(estudiante=e, curso=c) for e in estudiantes for c in cls.cursos + [cls.curso_otro]
+        ])
+
+    def test_resumen_en_una_consulta(self):
+        with self.assertNumQueries(1):
+            resumen = resumen_borrado_profesores(Profesor.objects.filter(pk=self.profesor.pk))
+        self.assertEqual(resumen, {'total_cursos': 3, 'total_inscripciones': 12})
+
+    def test_borrar_en_lotes_respeta_otros_profesores(self):
+        borrar_profesores(Profesor.objects.filter(pk=self.profesor.pk), tamano_lote=5)
+        self.assertFalse(Profesor.objects.filter(pk=self.profesor.pk).exists())
+        self.assertEqual(list(Curso.objects.all()), [self.curso_otro])
+        self.assertEqual(Inscripcion.objects.count(), 4)
+        self.assertEqual(Estudiante.objects.count(), 4)
+
+    def test_admin_confirmacion_y_borrado(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@x.cl', 'x'))
+        url = reverse('admin:academico_profesor_delete', args=[self.profesor.pk])
+        response = self.client.get(url)
+        self.assertContains(response, 'Inscripcions')
+        self.assertEqual(dict(response.context['model_count'])['cursos'], 3)
+
+        response = self.client.post(url, {'post': 'yes'})
+        self.assertRedirects(response, reverse('admin:academico_profesor_changelist'))
+        self.assertEqual(Inscripcion.objects.count(), 4)
+
+
+class ExpedienteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        profesor = Profesor.objects.create(nombre='Dr. Juan Pérez', email='juan.perez@universidad.cl')
+        cls.calculo = Curso.objects.create(nombre='Cálculo', descripcion='-', profesor=profesor, creditos=6)
+        cls.historia = Curso.objects.create(nombre='Historia', descripcion='-', profesor=profesor, creditos=2)
+        cls.taller = Curso.objects.create(nombre='Taller', descripcion='-', profesor=profesor, creditos=4)
+        cls.ana, cls.beto, cls.carla, cls.dani = Estudiante.objects.bulk_create([
+            Estudiante(nombre=nombre, email=f'{nombre.lower()}@estudiante.cl')
+            for nombre in ('Ana', 'Beto', 'Carla', 'Dani')
+        ])
+        inscripciones = Inscripcion.objects.bulk_create([
+            Inscripcion(estudiante=cls.ana, curso=cls.calculo, estado='F', nota_final=6.0),
+            Inscripcion(estudiante=cls.ana, curso=cls.historia, estado='F', nota_final=3.0),
+            Inscripcion(estudiante=cls.ana, curso=cls.taller),
+            Inscripcion(estudiante=cls.beto, curso=cls.calculo, estado='F', nota_final=5.25),
+            Inscripcion(estudiante=cls.carla, curso=cls.historia, estado='F', nota_final=5.25),
+            Inscripcion(estudiante=cls.dani, curso=cls.taller),
+        ])
+        # Ana cursó Cálculo e Historia el primer semestre y Taller el segundo
+        fechas = [datetime.date(2024, 3, 1), datetime.date(2024, 3, 1), datetime.date(2024, 8, 1)]
+        for inscripcion, fecha in zip(inscripciones, fechas):
+            Inscripcion.objects.filter(pk=inscripcion.pk).update(fecha_inscripcion=fecha)
+        Inscripcion.objects.filter(estudiante=cls.beto).update(fecha_inscripcion=datetime.date(2024, 3, 1))
+        Inscripcion.objects.filter(estudiante=cls.carla).update(fecha_inscripcion=datetime.date(2023, 4, 1))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_promedios_de_todos_en_una_consulta(self):
+        with self.assertNumQueries(1):
+            resumenes = promedios()
+        # (6.0 * 6 + 3.0 * 2) / 8; Historia reprobada no suma créditos aprobados
+        self.assertEqual(resumenes[self.ana.pk], {
+            'promedio': 5.25, 'creditos_aprobados': 6, 'creditos_inscritos': 12, 'cursos': 3,
+        })
+        self.assertIsNone(resumenes[self.dani.pk]['promedio'])
+
+    def test_expediente_por_semestre_y_cache_por_version(self):
+        datos = expediente(self.ana.pk)
+        self.assertEqual(
+            [(p['anio'], p['semestre'], p['promedio'], p['cursos']) for p in datos['periodos']],
+            [(2024, 1, 5.25, 2), (2024, 2, None, 1)],
+        )
+        self.assertEqual(datos['promedio'], 5.25)
+        with self.assertNumQueries(1):
+            self.assertEqual(expediente(self.ana.pk), datos)
+
+        taller = Inscripcion.objects.get(estudiante=self.ana, curso=self.taller)
+        taller.nota_final = 7.0
+        taller.save()
+        self.assertEqual(expediente(self.ana.pk)['promedio'], 5.83)
+        taller.delete()
+        self.assertEqual(expediente(self.ana.pk)['cursos'], 2)
+
+    def test_ranking_con_empates_y_cohorte(self):
+        tabla = ranking()
+        self.assertEqual(
+            [(f['posicion'], f['estudiante_id']) for f in tabla],
+            [(1, self.ana.pk), (1, self.beto.pk), (1, self.carla.pk)],
+        )
+        self.assertEqual([f['estudiante_id'] for f in ranking(cohorte=2023)], [self.carla.pk])
+
+    def test_comando_ranking_en_csv(self):
+        salida = StringIO()
+        call_command('ranking_cohorte', '--cohorte', '2024', stdout=salida, stderr=StringIO())
+        lineas = salida.getvalue().splitlines()
+        self.assertEqual(lineas[0].split(',')[:4], ['posicion', 'percentil', 'estudiante_id', 'nombre'])
+        self.assertEqual([linea.split(',')[3] for linea in lineas[1:]], ['Ana', 'Beto'])
+
+
+class CargaDocenteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.juan = Profesor.objects.create(nombre='Dr. Juan Pérez', email='juan.perez@universidad.cl')
+        cls.maria = Profesor.objects.create(nombre='Dra. María González', email='maria.gonzalez@universidad.cl')
+        cls.libre = Profesor.objects.create(nombre='Dr. Sin Cursos', email='libre@universidad.cl')
+        cursos_juan = [Curso.objects.create(nombre=f'Curso {i}', descripcion='-', profesor=cls.juan) for i in range(3)]
+        curso_maria = Curso.objects.create(nombre='Base de Datos', descripcion='-', profesor=cls.maria)
+        estudiantes = Estudiante.objects.bulk_create([
+            Estudiante(nombre=f'Estudiante {i}', email=f'e{i}@estudiante.cl') for i in range(5)
+        ])
+        # Juan: 2 estudiantes en sus 3 cursos (6 inscripciones); María: 5 estudiantes
+        Inscripcion.objects.bulk_create(
+            [Inscripcion(estudiante=e, curso=c, estado='F') for e in estudiantes[:2] for c in cursos_juan]
+            + [Inscripcion(estudiante=e, curso=curso_maria) for e in estudiantes]
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_carga_en_una_consulta_sin_duplicar(self):
+        with self.assertNumQueries(1):
+            filas = list(carga_profesores().values_list(
+                'nombre', 'total_cursos', 'total_estudiantes', 'activas', 'finalizadas'
+            ))
+        self.assertEqual(filas, [
+            ('Dra. María González', 1, 5, 5, 0),
+            ('Dr. Juan Pérez', 3, 2, 0, 6),
+            ('Dr. Sin Cursos', 0, 0, 0, 0),
+        ])
+        self.assertEqual(carga_profesores('cursos')[0], self.juan)
+
+    def test_vista_paginada_y_ordenable(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('academico:profesor_carga'), {'orden': 'finalizadas'})
+        self.assertEqual(response.context['orden'], 'finalizadas')
+        self.assertEqual(response.context['profesores'][0], self.juan)
+        # Un orden desconocido cae en el de por defecto
+        response = self.client.get(reverse('academico:profesor_carga'), {'orden': 'email; DROP'})
+        self.assertEqual(response.context['orden'], 'carga')
+
+    def test_resumen_cacheado_en_el_admin(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@x.cl', 'x'))
+        response = self.client.get(reverse('admin:index'))
+        self.assertContains(response, 'Carga docente')
+        self.assertEqual(cache.get(CLAVE_RESUMEN)['activas'], 5)
+        with self.assertNumQueries(0):
+            resumen = resumen_carga()
+        self.assertEqual((resumen['profesores'], resumen['cursos'], resumen['estudiantes']), (3, 4, 5))
+
+
+class BusquedaTrigramasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profesor = Profesor.objects.create(nombre='Dra. María González', email='maria.gonzalez@universidad.cl')
+        cls.curso = Curso.objects.create(
+            nombre='Programación en Python', descripcion='Introducción a Django y bases de datos', profesor=cls.profesor,
+        )
+        cls.juan = Estudiante.objects.create(nombre='Juan Pérez', email='juan.perez@estudiante.cl')
+        cls.ana = Estudiante.objects.create(nombre='Ana Rojas', email='ana.rojas@estudiante.cl')
+        # Sin señales: quedan fuera del índice hasta reindexar
+        Estudiante.objects.bulk_create([
+            Estudiante(nombre=f'Relleno {i}', email=f'relleno{i}@estudiante.cl') for i in range(20)
+        ])
+
+    def test_subcadena_tildes_y_errores_de_tipeo(self):
+        self.assertEqual(buscar(Trigrama.ESTUDIANTE, 'perez'), [self.juan.pk])
+        self.assertEqual(buscar(Trigrama.ESTUDIANTE, 'JUAN.PÉR'), [self.juan.pk])
+        self.assertEqual(buscar(Trigrama.ESTUDIANTE, 'erez'), [self.juan.pk])
+        self.assertEqual(buscar(Trigrama.PROFESOR, 'gonzales'), [self.profesor.pk])
+        self.assertEqual(buscar(Trigrama.CURSO, 'djang'), [self.curso.pk])
+        self.assertEqual(buscar(Trigrama.ESTUDIANTE, 'zzz'), [])
+        self.assertEqual(buscar(Trigrama.ESTUDIANTE, '!!'), [])
+
+    def test_indice_se_mantiene_al_guardar_y_borrar(self):
+        self.juan.nombre = 'Juan Soto'
+        self.juan.save()
+        self.assertEqual(buscar(Trigrama.ESTUDIANTE, 'perez'), [self.juan.pk])  # sigue en el email
+        self.assertEqual(buscar(Trigrama.ESTUDIANTE, 'soto'), [self.juan.pk])
+        self.ana.delete()
+        self.assertEqual(buscar(Trigrama.ESTUDIANTE, 'rojas'), [])
+        borrar_profesores(Profesor.objects.all())
+        self.assertFalse(Trigrama.objects.filter(tipo__in=[Trigrama.PROFESOR, Trigrama.CURSO]).exists())
+
+    def test_reindexar_y_frecuencias(self):
+        self.assertEqual(buscar(Trigrama.ESTUDIANTE, 'relleno7'), [])
+        self.assertEqual(reindexar([Trigrama.ESTUDIANTE]), 22)
+        self.assertEqual(buscar(Trigrama.ESTUDIANTE, 'relleno7')[0], Estudiante.objects.get(nombre='Relleno 7').pk)
+        # Frecuencias, exactas, candidatos y puntaje; la coincidencia completa va primero
+        with self.assertNumQueries(4):
+            resultados = buscar(Trigrama.ESTUDIANTE, 'juan estudiante')
+        self.assertEqual(resultados[0], self.juan.pk)
+
+    def test_listas_y_admin_usan_el_indice(self):
+        response = self.client.get(reverse('academico:estudiante_list'), {'q': 'perez'})
+        self.assertEqual(list(response.context['estudiantes']), [self.juan])
+        self.assertContains(response, 'value="perez"')
+        response = self.client.get(reverse('academico:curso_list'), {'q': 'pythom'})
+        self.assertEqual(list(response.context['cursos']), [self.curso])
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@x.cl', 'x'))
+        response = self.client.get(reverse('admin:academico_estudiante_changelist'), {'q': 'rojas'})
+        self.assertEqual(list(response.context['cl'].result_list), [self.ana])
+
+    def test_admin_avisa_si_la_busqueda_se_corta(self):
+        from .admin import EstudianteAdmin
+        reindexar([Trigrama.ESTUDIANTE])
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@x.cl', 'x'))
+        url = reverse('admin:academico_estudiante_changelist')
+        with patch.object(EstudianteAdmin, 'max_resultados_busqueda', 5):
+            response = self.client.get(url, {'q': 'relleno'})
+            self.assertEqual(response.context['cl'].result_count, 5)
+            self.assertContains(response, 'más de 5 resultados')
+            response = self.client.get(url, {'q': 'rojas'})
+            self.assertNotContains(response, 'resultados; se muestran')
+
+
+class CuposTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        profesor = Profesor.objects.create(nombre='Dr. Juan Pérez', email='juan.perez@universidad.cl')
+        cls.curso = Curso.objects.create(nombre='Cálculo', descripcion='-', profesor=profesor, cupo_maximo=2)
+        cls.estudiantes = Estudiante.objects.bulk_create([
+            Estudiante(nombre=f'Estudiante {i}', email=f'e{i}@estudiante.cl') for i in range(5)
+        ])
+
+    def _ocupados(self):
+        self.curso.refresh_from_db()
+        return self.curso.cupos_ocupados
+
+    def test_inscribe_hasta_el_cupo_y_luego_lista_de_espera(self):
+        primero, segundo, tercero, cuarto, _ = [e.pk for e in self.estudiantes]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertIsInstance(inscribir(primero, self.curso.pk), Inscripcion)
+            self.assertIsInstance(inscribir(segundo, self.curso.pk), Inscripcion)
+            self.assertIsInstance(inscribir(tercero, self.curso.pk), ListaEspera)
+            self.assertIsInstance(inscribir(cuarto, self.curso.pk), ListaEspera)
+        with self.assertRaises(CursoLleno):
+            inscribir(cuarto, self.curso.pk, esperar=False)
+        with self.assertRaises(YaInscrito):
+            inscribir(primero, self.curso.pk)
+        self.assertEqual(self._ocupados(), 2)
+        self.assertEqual(ListaEspera.objects.count(), 2)
+
+    def test_finalizar_o_borrar_promueve_en_orden(self):
+        primero, segundo, tercero, cuarto, _ = [e.pk for e in self.estudiantes]
+        with self.captureOnCommitCallbacks(execute=True):
+            for estudiante_id in (primero, segundo, tercero, cuarto):
+                inscribir(estudiante_id, self.curso.pk)
+        inscripcion = Inscripcion.objects.get(estudiante_id=primero)
+        inscripcion.estado = 'F'
+        with self.captureOnCommitCallbacks(execute=True):
+            inscripcion.save()
+        self.assertTrue(Inscripcion.objects.filter(estudiante_id=tercero, estado='A').exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            Inscripcion.objects.get(estudiante_id=segundo).delete()
+        self.assertTrue(Inscripcion.objects.filter(estudiante_id=cuarto, estado='A').exists())
+        self.assertFalse(ListaEspera.objects.exists())
+        self.assertEqual(self._ocupados(), 2)
+
+    def test_ampliar_cupo_promueve_y_save_no_pisa_el_contador(self):
+        ids = [e.pk for e in self.estudiantes]
+        with self.captureOnCommitCallbacks(execute=True):
+            for estudiante_id in ids:
+                inscribir(estudiante_id, self.curso.pk)
+        curso = Curso.objects.get(pk=self.curso.pk)
+        curso.cupo_maximo = 4
+        with self.captureOnCommitCallbacks(execute=True):
+            curso.save()
+        self.assertEqual(self._ocupados(), 4)
+        self.assertEqual(ListaEspera.objects.count(), 1)
+        # Una instancia vieja (cupos_ocupados=0 en memoria) no borra el contador
+        self.curso.nombre = 'Cálculo I'
+        self.curso.cupos_ocupados = 0
+        self.curso.save()
+        self.assertEqual(self._ocupados(), 4)
+
+    def test_admin_y_recalculo_mantienen_el_contador(self):
+        Inscripcion.objects.create(estudiante=self.estudiantes[0], curso=self.curso)
+        Inscripcion.objects.create(estudiante=self.estudiantes[1], curso=self.curso, estado='F')
+        self.assertEqual(self._ocupados(), 1)
+        Curso.objects.filter(pk=self.curso.pk).update(cupos_ocupados=7)
+        recalcular_cupos()
+        self.assertEqual(self._ocupados(), 1)
+
+
+@skipIf(analitica.np is None, 'requiere NumPy')
+class AnaliticaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.juan = Profesor.objects.create(nombre='Dr. Juan Pérez', email='juan.perez@universidad.cl')
+        cls.maria = Profesor.objects.create(nombre='Dra. María González', email='maria.gonzalez@universidad.cl')
+        cls.calculo = Curso.objects.create(nombre='Cálculo', descripcion='-', profesor=cls.juan)
+        cls.datos = Curso.objects.create(nombre='Base de Datos', descripcion='-', profesor=cls.maria)
+        estudiantes = Estudiante.objects.bulk_create([
+            Estudiante(nombre=f'Estudiante {i}', email=f'e{i}@estudiante.cl') for i in range(4)
+        ])
+        inscripciones = Inscripcion.objects.bulk_create([
+            Inscripcion(estudiante=estudiantes[0], curso=cls.calculo, estado='F', nota_final=6.5),
+            Inscripcion(estudiante=estudiantes[1], curso=cls.calculo, estado='F', nota_final=3.2),
+            Inscripcion(estudiante=estudiantes[2], curso=cls.calculo),
+            Inscripcion(estudiante=estudiantes[3], curso=cls.datos, estado='F', nota_final=7.0),
+        ])
+        fechas = [datetime.date(2025, 3, 1), datetime.date(2025, 3, 20), datetime.date(2025, 8, 2), datetime.date(2025, 8, 5)]
+        for inscripcion, fecha in zip(inscripciones, fechas):
+            Inscripcion.objects.filter(pk=inscripcion.pk).update(fecha_inscripcion=fecha)
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.ruta = f'{self.directorio.name}/inscripciones'
+        self.addCleanup(self.directorio.cleanup)
+
+    def test_reportes_sin_consultas(self):
+        self.assertEqual(analitica.exportar(self.ruta), 4)
+        with self.assertNumQueries(0):
+            instantanea = analitica.Instantanea(self.ruta)
+            cursos = instantanea.por_curso_y_estado()
+            profesores = instantanea.distribucion_notas_por_profesor()
+            tendencia = instantanea.tendencia_inscripciones()
+        self.assertEqual(len(instantanea), 4)
+        self.assertEqual(cursos[self.calculo.pk], {
+            'nombre': 'Cálculo', 'A': 1, 'F': 2, 'evaluadas': 2, 'aprobadas': 1, 'tasa_aprobacion': 0.5,
+        })
+        self.assertEqual(profesores[self.juan.pk]['intervalos'], [0, 0, 1, 0, 0, 1])
+        self.assertEqual(profesores[self.juan.pk]['promedio'], 4.85)
+        # La nota máxima cae en el último intervalo
+        self.assertEqual(profesores[self.maria.pk]['intervalos'], [0, 0, 0, 0, 0, 1])
+        self.assertEqual(tendencia, [('2025-03', 2), ('2025-08', 2)])
+
+    def test_comando_reemplaza_la_instantanea(self):
+        call_command('instantanea_inscripciones', '--directorio', self.ruta, stdout=StringIO())
+        Inscripcion.objects.filter(curso=self.datos).delete()
+        salida = StringIO()
+        call_command('instantanea_inscripciones', '--directorio', self.ruta, '--reportes', stdout=salida)
+        self.assertIn('3 inscripciones exportadas', salida.getvalue())
+        self.assertEqual(len(analitica.Instantanea(self.ruta)), 3)
+
+    def test_versiones_publicadas_con_el_puntero(self):
+        analitica.exportar(self.ruta)
+        abierta = analitica.Instantanea(self.ruta)
+        Inscripcion.objects.filter(curso=self.datos).delete()
+        analitica.exportar(self.ruta)
+        analitica.exportar(self.ruta)
+        directorio = Path(self.ruta)
+        # ACTUAL, la versión publicada y la que reemplazó; la primera ya se borró
+        self.assertEqual(len(list(directorio.iterdir())), 3)
+        self.assertTrue((directorio / (directorio / analitica.ACTUAL).read_text()).is_dir())
+        self.assertEqual(len(analitica.Instantanea(self.ruta)), 3)
+        # Quien la abrió antes sigue leyendo su versión completa
+        self.assertEqual(len(abierta), 4)
+        self.assertEqual(int(abierta.curso.size), 4)
+
+    def test_creditos_mayores_a_255(self):
+        Curso.objects.filter(pk=self.calculo.pk).update(creditos=300)
+        analitica.exportar(self.ruta)
+        instantanea = analitica.Instantanea(self.ruta)
+        self.assertEqual(sorted(set(instantanea.creditos.tolist())), [Curso.objects.get(pk=self.datos.pk).creditos, 300])
+
+    def test_omite_inscripciones_de_cursos_no_leidos(self):
+        # Un curso creado después de leer la lista de cursos, con inscripciones ya en la tabla
+        solo_calculo = Curso.objects.filter(pk=self.calculo.pk).order_by('pk')
+        with patch.object(Curso.objects, 'order_by', return_value=solo_calculo):
+            self.assertEqual(analitica.exportar(self.ruta), 3)
+        instantanea = analitica.Instantanea(self.ruta)
+        self.assertEqual(list(instantanea.por_curso_y_estado()), [self.calculo.pk])
+
+
+class ListaParcialTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        profesor = Profesor.objects.create(nombre='Dr. Juan Pérez', email='juan.perez@universidad.cl')
+        cls.cursos = Curso.objects.bulk_create([
+            Curso(nombre=f'Curso {i:02d}', descripcion='-', profesor=profesor) for i in range(30)
+        ])
+
+    def test_parcial_solo_filas(self):
+        url = reverse('academico:curso_list')
+        # Conteo + página con el profesor en el mismo JOIN
+        with self.assertNumQueries(2):
+            completa = self.client.get(url)
+        self.assertContains(completa, 'href="?page=2"')
+        with self.assertNumQueries(2):
+            parcial = self.client.get(url, {'page': 2, 'parcial': 1})
+        self.assertNotContains(parcial, '<nav>')
+        self.assertNotContains(parcial, 'data-siguiente')
+        self.assertEqual(len(parcial.context['cursos']), 5)
+        self.assertLess(len(parcial.content), len(completa.content))
 
-# Create your tests here.
+    def test_fila_de_un_curso(self):
+        curso = self.cursos[3]
+        response = self.client.get(reverse('academico:curso_fila', args=[curso.pk]))
+        self.assertContains(response, f'id="curso-{curso.pk}"')
+        self.assertContains(response, 'Profesor: Dr. Juan Pérez')
+        self.assertNotContains(response, '<ul')
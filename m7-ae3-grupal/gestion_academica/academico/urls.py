@@ -1,7 +1,7 @@
 from django.urls import path
 from .views import (
-    ProfesorListView, ProfesorDetailView,
-    CursoListView, CursoDetailView,
+    ProfesorListView, ProfesorDetailView, ProfesorCargaView,
+    CursoListView, CursoDetailView, CursoFilaView,
     EstudianteListView, EstudianteDetailView,
     welcome_view
 )
@@ -10,9 +10,11 @@ app_name = 'academico'
 urlpatterns = [
     path('', welcome_view, name='welcome'),
     path('profesores/', ProfesorListView.as_view(), name='profesor_list'),
+    path('profesores/carga/', ProfesorCargaView.as_view(), name='profesor_carga'),
     path('profesores/<int:pk>/', ProfesorDetailView.as_view(), name='profesor_detail'),
     path('cursos/', CursoListView.as_view(), name='curso_list'),
     path('cursos/<int:pk>/', CursoDetailView.as_view(), name='curso_detail'),
+    path('cursos/<int:pk>/fila/', CursoFilaView.as_view(), name='curso_fila'),
     path('estudiantes/', EstudianteListView.as_view(), name='estudiante_list'),
     path('estudiantes/<int:pk>/', EstudianteDetailView.as_view(), name='estudiante_detail'),
 ]
@@ -1,12 +1,45 @@
 from django.shortcuts import render
 from .models import Profesor, Curso, Estudiante, Perfil, Inscripcion
+from django.utils.decorators import method_decorator
 from django.views.generic import ListView, DetailView
+from rendimiento.respuestas import condicion
+from .busqueda import filtrar
+from .carga import ORDENES, ORDEN_POR_DEFECTO, carga_profesores
+from .expedientes import expediente
 
 
 def welcome_view(request):
     return render(request, 'academico/base.html')
 
-class ProfesorListView(ListView):
+class BusquedaMixin:
+    """Con ?q= la lista muestra los resultados del índice de trigramas (busqueda.py)."""
+
+    def get_busqueda(self):
+        return self.request.GET.get('q', '').strip()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        busqueda = self.get_busqueda()
+        return filtrar(queryset, busqueda) if busqueda else queryset
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['q'] = self.get_busqueda()
+        return context
+
+class ParcialMixin:
+    """
+    Con ?parcial=1 (custom.js, scroll infinito) responde solo las filas de
+    la página con `template_name_parcial`, sin el layout.
+    """
+    template_name_parcial = None
+
+    def get_template_names(self):
+        if self.request.GET.get('parcial'):
+            return [self.template_name_parcial]
+        return super().get_template_names()
+
+class ProfesorListView(BusquedaMixin, ListView):
     model = Profesor
     template_name = 'academico/profesor_list.html'
     context_object_name = 'profesores'
@@ -16,17 +49,46 @@ class ProfesorDetailView(DetailView):
     template_name = 'academico/profesor_detail.html'
     context_object_name = 'profesor'
 
-class CursoListView(ListView):
-    model = Curso
+class ProfesorCargaView(ListView):
+    template_name = 'academico/profesor_carga.html'
+    context_object_name = 'profesores'
+    paginate_by = 25
+
+    def get_orden(self):
+        orden = self.request.GET.get('orden')
+        return orden if orden in ORDENES else ORDEN_POR_DEFECTO
+
+    def get_queryset(self):
+        return carga_profesores(self.get_orden())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['orden'] = self.get_orden()
+        context['ordenes'] = list(ORDENES)
+        return context
+
+# La lista de cursos solo muestra nombre y profesor: con If-None-Match igual se contesta 304 sin consultar
+@method_decorator(condicion(Curso, Profesor), name='dispatch')
+class CursoListView(ParcialMixin, BusquedaMixin, ListView):
+    queryset = Curso.objects.select_related('profesor').order_by('pk')
     template_name = 'academico/curso_list.html'
+    template_name_parcial = 'academico/curso_filas.html'
     context_object_name = 'cursos'
+    paginate_by = 25
+
+@method_decorator(condicion(Curso, Profesor), name='dispatch')
+class CursoFilaView(DetailView):
+    """La fila de un curso en la lista, para refrescarla sin recargar la página."""
+    queryset = Curso.objects.select_related('profesor')
+    template_name = 'academico/curso_fila.html'
+    context_object_name = 'curso'
 
 class CursoDetailView(DetailView):
     model = Curso
     template_name = 'academico/curso_detail.html'
     context_object_name = 'curso'
 
-class EstudianteListView(ListView):
+class EstudianteListView(BusquedaMixin, ListView):
     model = Estudiante
     template_name = 'academico/estudiante_list.html'
     context_object_name = 'estudiantes'
@@ -36,3 +98,8 @@ class EstudianteDetailView(DetailView):
     template_name = 'academico/estudiante_detail.html'
     context_object_name = 'estudiante'
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['expediente'] = expediente(self.object.pk)
+        return context
+
@@ -2,6 +2,8 @@
 ASGI config for gestion_academica project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+La aplicación sale precalentada (urls, plantillas, cachés) y con /healthz y
+/readyz: ver rendimiento/arranque.py y gunicorn.conf.py.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -9,8 +11,8 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+from rendimiento.arranque import aplicacion_asgi
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gestion_academica.settings')
 
-application = get_asgi_application()
+application = aplicacion_asgi()
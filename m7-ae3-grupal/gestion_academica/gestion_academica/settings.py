@@ -38,10 +38,18 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'academico',
+    'tareas',
+    'rendimiento',
 ]
 
 MIDDLEWARE = [
+    # /healthz y /readyz contestan antes que sesiones y autenticación
+    'rendimiento.arranque.SaludMiddleware',
+    # Mide todo lo que sigue y sirve /metrics (rendimiento/metricas.py)
+    'rendimiento.metricas.MetricasMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Comprime al final de la respuesta: va antes que todo lo que modifica el cuerpo
+    'rendimiento.respuestas.CompresionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -121,7 +129,14 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Instantáneas en columnas para reportes (academico/analitica.py)
+INSTANTANEAS_DIR = BASE_DIR / 'instantaneas'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Perfil de rendimiento: DJANGO_PERFIL=dev (por defecto), bench o prod (rendimiento/perfiles.py)
+from rendimiento.perfiles import aplicar_perfil  # noqa: E402
+aplicar_perfil(globals())
@@ -19,6 +19,7 @@ from django.urls import path, include
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('rendimiento/', include('rendimiento.urls')),
     path('academico/', include('academico.urls')),
     path('', include('academico.urls')),
 ]
@@ -2,6 +2,8 @@
 WSGI config for gestion_academica project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
+La aplicación sale precalentada (urls, plantillas, cachés) y con /healthz y
+/readyz: ver rendimiento/arranque.py y gunicorn.conf.py.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
@@ -9,8 +11,8 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 
-from django.core.wsgi import get_wsgi_application
+from rendimiento.arranque import aplicacion_wsgi
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gestion_academica.settings')
 
-application = get_wsgi_application()
+application = aplicacion_wsgi()
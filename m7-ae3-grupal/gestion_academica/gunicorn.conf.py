@@ -0,0 +1,58 @@
+# gunicorn.conf.py
+"""
+gunicorn en producción: `DJANGO_PERFIL=prod gunicorn -c gunicorn.conf.py`.
+
+preload_app: el maestro importa wsgi.py una sola vez (apps, urls,
+plantillas y cachés precalentadas, rendimiento/arranque.py) y los workers
+lo heredan con fork, compartiendo esas páginas de memoria: un worker
+nuevo (por max_requests o HUP) nace caliente. Con preload el código nuevo
+se carga reiniciando el maestro (o con USR2), que vuelve a precalentar
+antes de aceptar. Sin preload cada worker precalienta por su cuenta.
+
+Dimensionamiento (WEB_WORKERS y WEB_THREADS lo ajustan por máquina):
+- workers: un proceso por núcleo más uno. Con threads no hace falta el
+  2·núcleos+1 de los workers sync: la espera de I/O la cubren los hilos.
+- threads (gthread): mientras un hilo espera a la base otro usa la CPU.
+  Cada hilo tiene su propia conexión (CONN_MAX_AGE la mantiene abierta).
+  workers × threads × instancias tiene que caber en max_connections de
+  MySQL (151 por defecto), con margen para los workers de tareas.
+- max_requests con jitter recicla los workers de a uno, para acotar
+  fugas de memoria sin reiniciarlos todos juntos.
+- timeout: un request que pasa de 30 s mata al worker. Lo pesado va a
+  la cola de tareas (tareas/cola.py), no al request.
+
+Con uvicorn (sin preload): `uvicorn gestion_academica.asgi:application --workers N`.
+El balanceador pregunta por /readyz: 503 hasta que el worker precalentó.
+
+Métricas (/metrics, rendimiento/metricas.py): cada worker escribe las
+suyas en DJANGO_METRICAS_DIR; el maestro limpia el directorio al arrancar
+y archiva las de cada worker que termina. Prometheus se autentica con
+DJANGO_METRICAS_TOKEN.
+"""
+import os
+import tempfile
+
+
+wsgi_app = 'gestion_academica.wsgi:application'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+preload_app = True
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_WORKERS', os.cpu_count() + 1))
+threads = int(os.environ.get('WEB_THREADS', 4))
+max_requests = 1000
+max_requests_jitter = 100
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+
+os.environ.setdefault('DJANGO_METRICAS_DIR', os.path.join(tempfile.gettempdir(), f'metricas-{os.getpid()}'))
+
+
+def on_starting(server):
+    from rendimiento.metricas import limpiar
+    limpiar(os.environ['DJANGO_METRICAS_DIR'])
+
+
+def child_exit(server, worker):
+    from rendimiento.metricas import archivar
+    archivar(os.environ['DJANGO_METRICAS_DIR'], worker.pid)
@@ -0,0 +1,179 @@
+# rendimiento/arranque.py
+"""
+Arranque de los workers: aplicación precalentada y endpoints de salud.
+
+`aplicacion_wsgi()` (y `aplicacion_asgi()`) reemplazan a
+get_wsgi_application() en wsgi.py. Además de cargar apps y modelos,
+`precalentar()` hace antes del primer request lo que si no pagaría ese
+request:
+
+- urls: importa todas las vistas y arma los índices de resolve() y
+  reverse(), también los de cada include() con namespace.
+- plantillas: compila las plantillas de las apps del proyecto en el
+  cached.Loader (solo con plantillas cacheadas, perfiles bench y prod).
+- lo que cada app registre con `al_precalentar(funcion)` en su ready():
+  mapas en memoria del proceso o agregados en la caché compartida.
+
+Con gunicorn --preload (gunicorn.conf.py de cada proyecto) esto corre una
+vez en el proceso maestro y los workers lo heredan al hacer fork; por eso
+al terminar se cierran las conexiones a la base y a la caché, que no se
+pueden compartir entre procesos. Con uvicorn, que no tiene preload, cada
+worker precalienta al importar asgi.py.
+
+`SaludMiddleware` va primero en MIDDLEWARE y contesta antes que sesiones,
+autenticación, CSRF y la redirección a HTTPS, sin validar el Host (el
+balanceador suele preguntar por IP):
+
+- /healthz: el proceso responde. No toca la base: si la base se cae no hay
+  que reiniciar los workers.
+- /readyz: el worker ya precalentó y llegan la base y la caché. Hasta
+  entonces 503, así en un reinicio escalonado el balanceador no le manda
+  tráfico a un worker en frío.
+
+Con DJANGO_PRECALENTAR=0 se omite el precalentamiento (para comparar con
+bench_reinicio).
+"""
+import logging
+import os
+from pathlib import Path
+import time
+
+from django.http import HttpResponse
+
+
+logger = logging.getLogger('rendimiento.arranque')
+
+RUTA_VIVO = '/healthz'
+RUTA_LISTO = '/readyz'
+
+_funciones = []
+_estado = {'listo': False}
+
+
+def al_precalentar(funcion):
+    """Registra `funcion` (sin argumentos) para correr en precalentar(). Se llama desde AppConfig.ready()."""
+    if funcion not in _funciones:
+        _funciones.append(funcion)
+    return funcion
+
+
+def _urls():
+    from django.urls import URLResolver, get_resolver
+
+    pendientes = [get_resolver()]
+    while pendientes:
+        resolver = pendientes.pop()
+        resolver.reverse_dict  # arma reverse_dict, namespace_dict y app_dict
+        pendientes.extend(p for p in resolver.url_patterns if isinstance(p, URLResolver))
+
+
+def _plantillas():
+    from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+    from django.template.backends.django import DjangoTemplates
+
+    from .importaciones import apps_del_proyecto
+    from .perfiles import _cacheado
+
+    for motor in engines.all():
+        if not isinstance(motor, DjangoTemplates) or not _cacheado(motor.engine.loaders):
+            continue
+        directorios = [*map(Path, motor.engine.dirs), *(Path(c.path) / 'templates' for c in apps_del_proyecto())]
+        for directorio in directorios:
+            for archivo in directorio.rglob('*.html'):
+                try:
+                    motor.get_template(archivo.relative_to(directorio).as_posix())
+                except (TemplateDoesNotExist, TemplateSyntaxError) as error:
+                    logger.warning('No se pudo precompilar %s: %s', archivo, error)
+
+
+def precalentar():
+    """Corre cada paso del precalentamiento y devuelve {paso: ms}. Un paso que falla no detiene el arranque."""
+    tiempos = {}
+    for funcion in [_urls, _plantillas, *_funciones]:
+        nombre = f'{funcion.__module__}.{funcion.__qualname__}'.removeprefix(f'{__name__}._')
+        inicio = time.perf_counter()
+        try:
+            funcion()
+        except Exception:
+            logger.exception('Falló el precalentamiento %s', nombre)
+        tiempos[nombre] = (time.perf_counter() - inicio) * 1000
+    return tiempos
+
+
+def _cerrar_conexiones():
+    from django.core.cache import caches
+    from django.db import connections
+
+    connections.close_all()
+    for cache in caches.all(initialized_only=True):
+        cache.close()
+
+
+def _preparar():
+    if os.environ.get('DJANGO_PRECALENTAR', '1') != '0':
+        tiempos = precalentar()
+        logger.info('Precalentado en %.0f ms: %s', sum(tiempos.values()), tiempos)
+        _cerrar_conexiones()
+    _estado['listo'] = True
+
+
+def aplicacion_wsgi():
+    """get_wsgi_application() precalentada. Para wsgi.py."""
+    from django.core.wsgi import get_wsgi_application
+
+    aplicacion = get_wsgi_application()
+    _preparar()
+    return aplicacion
+
+
+def aplicacion_asgi():
+    """get_asgi_application() precalentada. Para asgi.py."""
+    from django.core.asgi import get_asgi_application
+
+    aplicacion = get_asgi_application()
+    _preparar()
+    return aplicacion
+
+
+def listo():
+    return _estado['listo']
+
+
+def _problemas_de_conexion():
+    from django.core.cache import cache
+    from django.db import connection
+
+    problemas = []
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except Exception as error:
+        problemas.append(f'base: {error.__class__.__name__}')
+    try:
+        cache.get('rendimiento:readyz')
+    except Exception as error:
+        problemas.append(f'cache: {error.__class__.__name__}')
+    return problemas
+
+
+def _texto(contenido, status=200):
+    response = HttpResponse(contenido, content_type='text/plain; charset=utf-8', status=status)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+class SaludMiddleware:
+    """/healthz y /readyz sin pasar por el resto del stack. Va primero en MIDDLEWARE."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path_info == RUTA_VIVO:
+            return _texto('ok')
+        if request.path_info == RUTA_LISTO:
+            if not listo():
+                return _texto('precalentando', status=503)
+            problemas = _problemas_de_conexion()
+            return _texto('\n'.join(problemas), status=503) if problemas else _texto('ok')
+        return self.get_response(request)
@@ -0,0 +1,52 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Arranque en frío: tiempo de pared de `manage.py check` y de crear la aplicación WSGI '
+        '(lo que paga cada worker al reiniciarse), cada uno en un proceso nuevo, contra un '
+        'intérprete que solo arranca Python.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=5)
+
+    def _correr(self, argumentos, entorno, repeticiones):
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            proceso = subprocess.run(
+                [sys.executable, *argumentos], cwd=settings.BASE_DIR, env=entorno, capture_output=True, text=True,
+            )
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+            if proceso.returncode != 0:
+                raise CommandError(f'{" ".join(argumentos)} falló:\n{proceso.stderr.strip()}')
+        return tiempos
+
+    def handle(self, *args, **options):
+        repeticiones = options['repeticiones']
+        entorno = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE}
+        manage = Path(settings.BASE_DIR) / 'manage.py'
+        modulo_wsgi = settings.WSGI_APPLICATION.rpartition('.')[0]
+        casos = [
+            ('python', ['-c', 'pass']),
+            ('manage.py check', [str(manage), 'check']),
+            ('WSGI', ['-c', f'from {modulo_wsgi} import application']),
+        ]
+        if os.environ.get('PYTHONDONTWRITEBYTECODE'):
+            self.stdout.write('PYTHONDONTWRITEBYTECODE está activo: los tiempos incluyen compilar cada módulo')
+        self.stdout.write(f'{repeticiones} arranques por caso (ms de pared)')
+        for nombre, argumentos in casos:
+            tiempos = self._correr(argumentos, entorno, repeticiones)
+            self.stdout.write(
+                f'  {nombre:<16} mediana {statistics.median(tiempos):7.1f}  '
+                f'mín {min(tiempos):7.1f}  máx {max(tiempos):7.1f}'
+            )
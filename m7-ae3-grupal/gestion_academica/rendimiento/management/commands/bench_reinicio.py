@@ -0,0 +1,85 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Corre en un proceso nuevo, como un worker recién reiniciado: crea la
+# aplicación de wsgi.py y le pasa dos veces cada URL, midiendo todo.
+PROCESO = '''
+import json, sys, time
+from wsgiref.util import setup_testing_defaults
+inicio = time.perf_counter()
+from importlib import import_module
+aplicacion = getattr(import_module(sys.argv[1]), sys.argv[2])
+tiempos = {'listo': time.perf_counter() - inicio, 'primero': [], 'segundo': []}
+
+def pedir(url):
+    ruta, _, consulta = url.partition('?')
+    entorno = {'PATH_INFO': ruta, 'QUERY_STRING': consulta, 'HTTP_HOST': sys.argv[3], 'SERVER_NAME': sys.argv[3]}
+    setup_testing_defaults(entorno)
+    estado = []
+    inicio = time.perf_counter()
+    cuerpo = aplicacion(entorno, lambda status, headers, exc_info=None: estado.append(status))
+    b''.join(cuerpo)
+    getattr(cuerpo, 'close', lambda: None)()
+    if not estado[0].startswith(('200', '304')):
+        raise SystemExit(f'{url} respondió {estado[0]}')
+    return time.perf_counter() - inicio
+
+for url in sys.argv[4:]:
+    tiempos['primero'].append(pedir(url))
+    tiempos['segundo'].append(pedir(url))
+print(json.dumps(tiempos))
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Tiempo hasta el primer request después de reiniciar un worker, con y sin el '
+        'precalentamiento de rendimiento/arranque.py: cada repetición es un proceso nuevo que '
+        'crea la aplicación de WSGI_APPLICATION y pide las URLs dos veces (la segunda es la '
+        'referencia en caliente). Medir con DJANGO_PERFIL=bench.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='+')
+        parser.add_argument('--repeticiones', type=int, default=5)
+        parser.add_argument('--host', default='localhost')
+
+    def _correr(self, urls, host, precalentar, repeticiones):
+        modulo, _, nombre = settings.WSGI_APPLICATION.rpartition('.')
+        entorno = {
+            **os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE,
+            'DJANGO_PRECALENTAR': '1' if precalentar else '0',
+        }
+        resultados = []
+        for _ in range(repeticiones):
+            proceso = subprocess.run(
+                [sys.executable, '-c', PROCESO, modulo, nombre, host, *urls],
+                cwd=settings.BASE_DIR, env=entorno, capture_output=True, text=True,
+            )
+            if proceso.returncode != 0:
+                raise CommandError(proceso.stderr.strip() or proceso.stdout.strip())
+            resultados.append(json.loads(proceso.stdout.strip().splitlines()[-1]))
+        return resultados
+
+    def _mediana(self, resultados, clave, indice=None):
+        valores = [r[clave] if indice is None else r[clave][indice] for r in resultados]
+        return statistics.median(valores) * 1000
+
+    def handle(self, *args, **options):
+        urls, repeticiones = options['urls'], options['repeticiones']
+        self.stdout.write(f'Perfil {getattr(settings, "PERFIL", "dev")}, {repeticiones} reinicios por variante (ms, mediana)')
+        for precalentar in (False, True):
+            resultados = self._correr(urls, options['host'], precalentar, repeticiones)
+            listo = self._mediana(resultados, 'listo')
+            self.stdout.write(f'{"precalentado" if precalentar else "sin precalentar"}: aplicación lista en {listo:7.1f}')
+            for indice, url in enumerate(urls):
+                primero = self._mediana(resultados, 'primero', indice)
+                segundo = self._mediana(resultados, 'segundo', indice)
+                self.stdout.write(f'  {url:<30} primer request {primero:7.1f}  en caliente {segundo:7.1f}')
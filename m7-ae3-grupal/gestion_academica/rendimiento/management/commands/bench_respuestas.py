@@ -0,0 +1,59 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from rendimiento.respuestas import brotli
+
+
+class Command(BaseCommand):
+    help = (
+        'Bytes transferidos y CPU por request de las URLs dadas, pasando por todo el '
+        'stack de middleware: sin comprimir, gzip, Brotli (si está instalado) y la '
+        'revalidación con If-None-Match cuando la vista entrega ETag.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='+')
+        parser.add_argument('--repeticiones', type=int, default=30)
+        parser.add_argument('--host', default='localhost')
+
+    def _medir(self, cliente, url, repeticiones, **encabezados):
+        cpu, respuesta = [], None
+        for _ in range(repeticiones):
+            inicio = time.process_time()
+            respuesta = cliente.get(url, headers=encabezados)
+            cpu.append((time.process_time() - inicio) * 1000)
+        if respuesta.status_code not in (200, 304):
+            raise CommandError(f'{url} respondió {respuesta.status_code}')
+        cuerpo = b''.join(respuesta.streaming_content) if respuesta.streaming else respuesta.content
+        return respuesta, len(cuerpo), statistics.median(cpu)
+
+    def handle(self, *args, **options):
+        cliente = Client(HTTP_HOST=options['host'])
+        repeticiones = options['repeticiones']
+        variantes = [('sin comprimir', {}), ('gzip', {'Accept-Encoding': 'gzip'})]
+        if brotli is not None:
+            variantes.append(('br', {'Accept-Encoding': 'br, gzip'}))
+        for url in options['urls']:
+            self.stdout.write(url)
+            base = None
+            for nombre, encabezados in variantes:
+                respuesta, tamano, cpu = self._medir(cliente, url, repeticiones, **encabezados)
+                base = base or tamano
+                self.stdout.write(
+                    f'  {nombre:<14} {tamano:>9} bytes ({tamano / base:6.1%})  CPU {cpu:6.2f} ms/request'
+                    f'  [{respuesta.get("Content-Encoding", "-")}]'
+                )
+            etag = respuesta.get('ETag')
+            if etag:
+                respuesta, tamano, cpu = self._medir(
+                    cliente, url, repeticiones, **{'If-None-Match': etag, **variantes[-1][1]}
+                )
+                self.stdout.write(
+                    f'  {"If-None-Match":<14} {tamano:>9} bytes ({tamano / base:6.1%})  CPU {cpu:6.2f} ms/request'
+                    f'  [{respuesta.status_code}]'
+                )
+            else:
+                self.stdout.write('  (sin ETag: la vista no usa @condicion)')
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from rendimiento.importaciones import OBJETIVOS, apps_del_proyecto, de_la_app, hijos, medir, por_paquete
+
+
+class Command(BaseCommand):
+    help = (
+        'Costo de importar el proyecto en un proceso nuevo (python -X importtime): por cada '
+        'app del proyecto, sus módulos con el tiempo propio y el acumulado, y las dependencias '
+        'externas caras que cada uno trae; al final, los paquetes que más tiempo suman.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--apps', nargs='+', help='Por defecto, las apps que viven en BASE_DIR')
+        parser.add_argument('--objetivo', choices=OBJETIVOS, default='urls')
+        parser.add_argument('--umbral', type=float, default=5, help='ms desde los que se lista una dependencia')
+        parser.add_argument('--top', type=int, default=10)
+
+    def handle(self, *args, **options):
+        try:
+            importaciones = medir(options['objetivo'])
+        except RuntimeError as error:
+            raise CommandError(f'No se pudo importar el proyecto: {error}')
+        arbol = hijos(importaciones)
+        umbral = options['umbral'] * 1000
+        total = sum(i.propio for i in importaciones)
+        self.stdout.write(f'{len(importaciones)} módulos, {total / 1000:.1f} ms (objetivo {options["objetivo"]})')
+
+        for app in options['apps'] or [c.name for c in apps_del_proyecto()]:
+            modulos = de_la_app(importaciones, app)
+            propio = sum(m.propio for m in modulos)
+            self.stdout.write(f'\n{app}: {len(modulos)} módulos, {propio / 1000:.1f} ms propios')
+            for modulo in modulos:
+                self.stdout.write(
+                    f'  {modulo.modulo:<40} {modulo.propio / 1000:7.1f} ms {modulo.acumulado / 1000:8.1f} ms acumulado'
+                )
+                for hijo in arbol.get(modulo.modulo, []):
+                    if hijo.paquete != app and hijo.acumulado >= umbral:
+                        self.stdout.write(f'    <- {hijo.modulo:<37} {hijo.acumulado / 1000:17.1f} ms')
+
+        self.stdout.write('\nPaquetes (tiempo propio sumado):')
+        for paquete, microsegundos in list(por_paquete(importaciones).items())[:options['top']]:
+            self.stdout.write(f'  {paquete:<40} {microsegundos / 1000:7.1f} ms')
@@ -0,0 +1,466 @@
+# rendimiento/metricas.py
+"""
+Métricas en formato de texto de Prometheus, en /metrics.
+
+Contadores e histogramas propios (sin prometheus_client) con lo que hace
+Django por dentro:
+
+- django_http_requests_total / django_http_request_duration_seconds: por
+  nombre de URL (`productos:lista`, `voluntariado:evento_list`, ...),
+  método y código. Las rutas que no existen van como view="<sin ruta>".
+- django_db_query_duration_seconds: cada consulta, por alias y vista (el
+  _count del histograma es la cantidad de consultas).
+- django_cache_requests_total: aciertos y fallos de get()/get_many().
+- django_template_render_duration_seconds: render de cada plantilla.
+- django_model_writes_total: altas, cambios y bajas por modelo (las que
+  emiten señales: `update()` y `bulk_create` no cuentan).
+
+Los nombres de métricas y etiquetas siguen la convención de Prometheus, en
+inglés, para que sirvan los tableros que ya existen para Django.
+
+Varios procesos: con DJANGO_METRICAS_DIR (o RENDIMIENTO_METRICAS['DIRECTORIO'])
+cada proceso suma en su propio archivo metricas_<pid>.db, mapeado en
+memoria, y /metrics lee y suma los de todos. Sumar es escribir un double en
+el mmap, sin llamadas al sistema. Cada entrada se escribe completa antes de
+avanzar el largo usado del encabezado, así quien lee nunca ve una a medias.
+gunicorn.conf.py limpia el directorio al arrancar y, cuando un worker
+termina, `archivar()` pasa sus números a metricas_archivo.db para que los
+contadores no retrocedan ni se junten archivos de workers muertos. Sin
+directorio (desarrollo, tests) todo queda en memoria del proceso.
+
+/metrics contesta a quien manda `Authorization: Bearer <TOKEN>` (TOKEN sale
+de DJANGO_METRICAS_TOKEN; Prometheus lo manda con `authorization:
+credentials`) y a las IPs de IPS, que por defecto está vacío. Detrás de un
+proxy en la misma máquina todos los requests llegan desde 127.0.0.1: por
+eso localhost no entra por defecto, y IPS solo sirve cuando REMOTE_ADDR es
+de verdad el cliente. Para el resto es un 404.
+"""
+from contextvars import ContextVar
+from functools import lru_cache, wraps
+import hmac
+import json
+import mmap
+import os
+from pathlib import Path
+import struct
+import threading
+import time
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin gunicorn no hay workers que archivar
+    fcntl = None
+
+
+POR_DEFECTO = {
+    'DIRECTORIO': os.environ.get('DJANGO_METRICAS_DIR'),
+    'IPS': (),
+    'TOKEN': os.environ.get('DJANGO_METRICAS_TOKEN'),
+    'RUTA': '/metrics',
+}
+CUBETAS_REQUEST = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+CUBETAS_CONSULTA = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+SIN_RUTA = '<sin ruta>'
+ARCHIVO = 'metricas_archivo.db'
+# Bytes con que nace el archivo de cada proceso; crece al doble cuando se llena
+TAMANO_INICIAL = 64 * 1024
+
+_vista = ContextVar('metricas_vista', default='-')
+_registro = {}
+_estado = {'almacen': None, 'pid': None}
+_bloqueo = threading.Lock()
+
+
+def configuracion():
+    return {**POR_DEFECTO, **getattr(settings, 'RENDIMIENTO_METRICAS', {})}
+
+
+def vista_actual():
+    """Nombre de URL del request en curso ('-' fuera de un request)."""
+    return _vista.get()
+
+
+class _Memoria:
+    """Almacén de un solo proceso."""
+
+    def __init__(self):
+        self.valores = {}
+
+    def sumar(self, clave, valor):
+        with _bloqueo:
+            self.valores[clave] = self.valores.get(clave, 0.0) + valor
+
+
+def _alinear(n):
+    return n + (-n % 8)
+
+
+def _leer_entradas(datos):
+    """(clave, valor, desplazamiento del valor) de un archivo de métricas."""
+    usado = struct.unpack_from('<I', datos, 0)[0] if len(datos) >= 8 else 0
+    posicion = 8
+    while posicion < usado:
+        largo = struct.unpack_from('<I', datos, posicion)[0]
+        clave = bytes(datos[posicion + 4:posicion + 4 + largo]).decode()
+        posicion = _alinear(posicion + 4 + largo)
+        yield clave, struct.unpack_from('<d', datos, posicion)[0], posicion
+        posicion += 8
+
+
+class _Archivo:
+    """
+    Almacén de un proceso en un archivo mapeado: encabezado de 8 bytes con
+    el largo usado y entradas [largo][clave][relleno][double], alineadas a 8.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = Path(ruta)
+        self.archivo = open(self.ruta, 'a+b')
+        if os.fstat(self.archivo.fileno()).st_size == 0:
+            self.archivo.truncate(TAMANO_INICIAL)
+        self.mapa = mmap.mmap(self.archivo.fileno(), 0)
+        if struct.unpack_from('<I', self.mapa, 0)[0] == 0:
+            struct.pack_into('<I', self.mapa, 0, 8)
+        self.posiciones = {clave: posicion for clave, _, posicion in _leer_entradas(self.mapa)}
+
+    def _agregar(self, clave):
+        codificada = clave.encode()
+        usado = struct.unpack_from('<I', self.mapa, 0)[0]
+        posicion = _alinear(usado + 4 + len(codificada))
+        while posicion + 8 > len(self.mapa):
+            tamano = len(self.mapa) * 2
+            self.mapa.close()
+            self.archivo.truncate(tamano)
+            self.mapa = mmap.mmap(self.archivo.fileno(), 0)
+        struct.pack_into(f'<I{len(codificada)}s', self.mapa, usado, len(codificada), codificada)
+        struct.pack_into('<d', self.mapa, posicion, 0.0)
+        # Recién ahora la entrada existe para quien lee
+        struct.pack_into('<I', self.mapa, 0, posicion + 8)
+        self.posiciones[clave] = posicion
+        return posicion
+
+    def sumar(self, clave, valor):
+        with _bloqueo:
+            posicion = self.posiciones.get(clave)
+            if posicion is None:
+                posicion = self._agregar(clave)
+            actual = struct.unpack_from('<d', self.mapa, posicion)[0]
+            struct.pack_into('<d', self.mapa, posicion, actual + valor)
+
+    def cerrar(self):
+        self.mapa.close()
+        self.archivo.close()
+
+
+def _almacen():
+    pid = os.getpid()
+    if _estado['pid'] != pid:
+        # Primera vez en este proceso, o un fork: el hijo no escribe en el archivo del padre
+        directorio = configuracion()['DIRECTORIO']
+        if directorio:
+            Path(directorio).mkdir(parents=True, exist_ok=True)
+            _estado['almacen'] = _Archivo(Path(directorio) / f'metricas_{pid}.db')
+        else:
+            _estado['almacen'] = _Memoria()
+        _estado['pid'] = pid
+    return _estado['almacen']
+
+
+def _clave(nombre, sufijo, etiquetas):
+    return _serializar(nombre, sufijo, tuple(sorted(etiquetas.items())))
+
+
+@lru_cache(maxsize=4096)
+def _serializar(nombre, sufijo, etiquetas):
+    return json.dumps([nombre, sufijo, etiquetas], separators=(',', ':'))
+
+
+class Metrica:
+    tipo = None
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre, self.ayuda, self.etiquetas = nombre, ayuda, tuple(etiquetas)
+        _registro[nombre] = self
+
+    def _validar(self, etiquetas):
+        if set(etiquetas) != set(self.etiquetas):
+            raise ValueError(f'{self.nombre} lleva las etiquetas {self.etiquetas}, no {tuple(etiquetas)}')
+        return {k: str(v) for k, v in etiquetas.items()}
+
+
+class Contador(Metrica):
+    tipo = 'counter'
+
+    def inc(self, valor=1, **etiquetas):
+        _almacen().sumar(_clave(self.nombre, '', self._validar(etiquetas)), valor)
+
+
+class Histograma(Metrica):
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), cubetas=CUBETAS_REQUEST):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.cubetas = tuple(cubetas)
+
+    def observar(self, valor, **etiquetas):
+        etiquetas = self._validar(etiquetas)
+        almacen = _almacen()
+        # Se guarda solo la cubeta que corresponde; las acumuladas se arman al exportar
+        for limite in self.cubetas:
+            if valor <= limite:
+                almacen.sumar(_clave(self.nombre, '_bucket', {**etiquetas, 'le': repr(float(limite))}), 1)
+                break
+        almacen.sumar(_clave(self.nombre, '_sum', etiquetas), valor)
+        almacen.sumar(_clave(self.nombre, '_count', etiquetas), 1)
+
+
+REQUESTS = Contador(
+    'django_http_requests_total', 'Requests por nombre de URL, método y código.', ('view', 'method', 'status'),
+)
+DURACION_REQUEST = Histograma(
+    'django_http_request_duration_seconds', 'Duración de los requests por nombre de URL.', ('view', 'method'),
+)
+CONSULTAS = Histograma(
+    'django_db_query_duration_seconds', 'Duración de cada consulta SQL por alias y vista.', ('alias', 'view'),
+    cubetas=CUBETAS_CONSULTA,
+)
+CACHE = Contador('django_cache_requests_total', 'Lecturas de la caché: hit o miss.', ('backend', 'result'))
+PLANTILLAS = Histograma(
+    'django_template_render_duration_seconds', 'Render de cada plantilla.', ('template',), cubetas=CUBETAS_CONSULTA,
+)
+ESCRITURAS = Contador(
+    'django_model_writes_total', 'Filas escritas por modelo (con señales).', ('model', 'operation'),
+)
+
+
+# Lectura y exportación
+
+def _bloquear(directorio, modo):
+    if fcntl is None:
+        return None
+    candado = open(Path(directorio) / '.candado', 'a')
+    fcntl.flock(candado, modo)
+    return candado
+
+
+def _soltar(candado):
+    if candado is not None:
+        fcntl.flock(candado, fcntl.LOCK_UN)
+        candado.close()
+
+
+def valores():
+    """{clave: valor} sumando los archivos de todos los procesos (o la memoria de este)."""
+    directorio = configuracion()['DIRECTORIO']
+    if not directorio:
+        with _bloqueo:
+            return dict(_almacen().valores)
+    sumados = {}
+    candado = _bloquear(directorio, fcntl.LOCK_SH if fcntl else None)
+    try:
+        for ruta in Path(directorio).glob('metricas_*.db'):
+            for clave, valor, _ in _leer_entradas(ruta.read_bytes()):
+                sumados[clave] = sumados.get(clave, 0.0) + valor
+    finally:
+        _soltar(candado)
+    return sumados
+
+
+def _escapar(valor):
+    return valor.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _muestra(nombre, etiquetas, valor):
+    if etiquetas:
+        nombre += '{' + ','.join(f'{k}="{_escapar(v)}"' for k, v in etiquetas) + '}'
+    return f'{nombre} {valor:.17g}'
+
+
+def exportar():
+    """Texto de todas las métricas en el formato de exposición de Prometheus (0.0.4)."""
+    por_metrica = {}
+    for clave, valor in valores().items():
+        nombre, sufijo, etiquetas = json.loads(clave)
+        por_metrica.setdefault(nombre, []).append((sufijo, tuple(map(tuple, etiquetas)), valor))
+
+    lineas = []
+    for nombre, metrica in _registro.items():
+        lineas += [f'# HELP {nombre} {metrica.ayuda}', f'# TYPE {nombre} {metrica.tipo}']
+        muestras = por_metrica.get(nombre, [])
+        if metrica.tipo == 'counter':
+            lineas += [_muestra(nombre, etiquetas, valor) for _, etiquetas, valor in sorted(muestras)]
+            continue
+        series = {}
+        for sufijo, etiquetas, valor in muestras:
+            base = tuple(par for par in etiquetas if par[0] != 'le')
+            serie = series.setdefault(base, {'_bucket': {}, '_sum': 0.0, '_count': 0.0})
+            if sufijo == '_bucket':
+                serie['_bucket'][float(dict(etiquetas)['le'])] = valor
+            else:
+                serie[sufijo] = valor
+        for base, serie in sorted(series.items()):
+            acumulado = 0.0
+            for limite in metrica.cubetas:
+                acumulado += serie['_bucket'].get(float(limite), 0.0)
+                lineas.append(_muestra(f'{nombre}_bucket', (*base, ('le', repr(float(limite)))), acumulado))
+            lineas.append(_muestra(f'{nombre}_bucket', (*base, ('le', '+Inf')), serie['_count']))
+            lineas.append(_muestra(f'{nombre}_sum', base, serie['_sum']))
+            lineas.append(_muestra(f'{nombre}_count', base, serie['_count']))
+    return '\n'.join(lineas) + '\n'
+
+
+# Directorio compartido (hooks de gunicorn.conf.py)
+
+def limpiar(directorio):
+    """Borra los archivos de una corrida anterior. Al arrancar el maestro, antes de los workers."""
+    Path(directorio).mkdir(parents=True, exist_ok=True)
+    for ruta in Path(directorio).glob('metricas_*.db'):
+        ruta.unlink()
+
+
+def archivar(directorio, pid):
+    """Suma los números del proceso `pid`, que ya terminó, a metricas_archivo.db y borra su archivo."""
+    ruta = Path(directorio) / f'metricas_{pid}.db'
+    if not ruta.exists():
+        return
+    candado = _bloquear(directorio, fcntl.LOCK_EX if fcntl else None)
+    try:
+        archivo = _Archivo(Path(directorio) / ARCHIVO)
+        for clave, valor, _ in _leer_entradas(ruta.read_bytes()):
+            archivo.sumar(clave, valor)
+        archivo.cerrar()
+        ruta.unlink()
+    finally:
+        _soltar(candado)
+
+
+# Instrumentación
+
+def _medir_consulta(execute, sql, params, many, context):
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        CONSULTAS.observar(time.perf_counter() - inicio, alias=context['connection'].alias, view=vista_actual())
+
+
+def _conexion_creada(sender, connection, **kwargs):
+    if _medir_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_medir_consulta)
+
+
+_NO_ESTA = object()
+
+
+def _instrumentar_cache(clase):
+    from django.core.cache.backends.base import BaseCache
+
+    if getattr(clase.get, 'con_metricas', False):
+        return
+    get, get_many = clase.get, clase.get_many
+
+    @wraps(get)
+    def get_medido(self, key, default=None, version=None):
+        valor = get(self, key, _NO_ESTA, version=version)
+        CACHE.inc(backend=type(self).__name__, result='miss' if valor is _NO_ESTA else 'hit')
+        return default if valor is _NO_ESTA else valor
+    get_medido.con_metricas = True
+    clase.get = get_medido
+
+    # El get_many de BaseCache llama a get(): ya queda contado
+    if get_many is not BaseCache.get_many:
+        @wraps(get_many)
+        def get_many_medido(self, keys, version=None):
+            keys = list(keys)
+            encontrados = get_many(self, keys, version=version)
+            backend = type(self).__name__
+            if encontrados:
+                CACHE.inc(len(encontrados), backend=backend, result='hit')
+            if len(keys) > len(encontrados):
+                CACHE.inc(len(keys) - len(encontrados), backend=backend, result='miss')
+            return encontrados
+        clase.get_many = get_many_medido
+
+
+def _instrumentar_plantillas():
+    from django.template.backends.django import Template
+
+    render = Template.render
+    if getattr(render, 'con_metricas', False):
+        return
+
+    @wraps(render)
+    def render_medido(self, context=None, request=None):
+        inicio = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            PLANTILLAS.observar(time.perf_counter() - inicio, template=self.origin.template_name or '-')
+    render_medido.con_metricas = True
+    Template.render = render_medido
+
+
+def _escrito(sender, created=None, **kwargs):
+    operacion = 'delete' if created is None else ('insert' if created else 'update')
+    ESCRITURAS.inc(model=sender._meta.label, operation=operacion)
+
+
+def instrumentar():
+    """Conecta consultas, caché, plantillas y señales de modelos. Se llama una vez desde RendimientoConfig.ready()."""
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+    from django.db.models.signals import post_delete, post_save
+    from django.utils.module_loading import import_string
+
+    connection_created.connect(_conexion_creada, dispatch_uid='metricas_consultas')
+    for conexion in connections.all(initialized_only=True):
+        _conexion_creada(None, conexion)
+    for alias in settings.CACHES:
+        _instrumentar_cache(import_string(settings.CACHES[alias]['BACKEND']))
+    _instrumentar_plantillas()
+    post_save.connect(_escrito, dispatch_uid='metricas_guardado')
+    post_delete.connect(_escrito, dispatch_uid='metricas_borrado')
+
+
+class MetricasMiddleware:
+    """Mide cada request por nombre de URL y sirve /metrics. Va después de SaludMiddleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.ruta = configuracion()['RUTA']
+
+    def __call__(self, request):
+        if request.path_info == self.ruta:
+            return self.metricas(request)
+        token = _vista.set(SIN_RUTA)
+        inicio = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            vista = _vista.get()
+            _vista.reset(token)
+        DURACION_REQUEST.observar(time.perf_counter() - inicio, view=vista, method=request.method)
+        REQUESTS.inc(view=vista, method=request.method, status=response.status_code)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        _vista.set(request.resolver_match.view_name)
+
+    def autorizado(self, request):
+        conf = configuracion()
+        if request.META.get('REMOTE_ADDR') in conf['IPS']:
+            return True
+        esquema, _, credencial = request.headers.get('Authorization', '').partition(' ')
+        return bool(conf['TOKEN']) and esquema.lower() == 'bearer' and hmac.compare_digest(
+            credencial.strip().encode(), conf['TOKEN'].encode(),
+        )
+
+    def metricas(self, request):
+        if not self.autorizado(request):
+            raise Http404
+        response = HttpResponse(exportar(), content_type='text/plain; version=0.0.4; charset=utf-8')
+        response.headers['Cache-Control'] = 'no-store'
+        return response
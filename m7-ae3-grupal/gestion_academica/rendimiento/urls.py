@@ -0,0 +1,9 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'rendimiento'
+
+urlpatterns = [
+    path('consultas-lentas/', views.consultas_lentas, name='consultas_lentas'),
+]
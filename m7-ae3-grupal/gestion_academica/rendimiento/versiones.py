@@ -0,0 +1,81 @@
+# rendimiento/versiones.py
+"""
+Versiones de modelos para ETags sin renderizar ni hashear la respuesta.
+
+Cada modelo vigilado tiene un contador en la caché que sube cada vez que se
+escribe una fila (post_save, post_delete, m2m_changed). Una vista que depende
+de Producto y Stock puede contestar 304 comparando el ETag con esas dos
+versiones, antes de tocar la base o renderizar la plantilla.
+
+El contador sube al confirmar la transacción: si subiera antes, un request
+concurrente vería la versión nueva con los datos viejos y los dejaría
+cacheados con el ETag nuevo. Si la clave no está (caché vacía o desalojada)
+arranca en la hora actual en milisegundos, nunca en un número ya usado.
+
+Las escrituras que no emiten señales (`QuerySet.update()`, `bulk_create`,
+borrados con SQL directo) deben llamar a `tocar()`. Con varios procesos la
+caché tiene que ser compartida (Redis, Memcached o base de datos); con
+LocMemCache cada proceso tiene sus propias versiones.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+
+def _clave(modelo):
+    return f'rendimiento:version:{modelo._meta.label_lower}'
+
+
+def _inicial():
+    return int(time.time() * 1000)
+
+
+def _incrementar(claves):
+    for clave in claves:
+        try:
+            cache.incr(clave)
+        except ValueError:
+            cache.add(clave, _inicial(), None)
+
+
+def tocar(*modelos):
+    """Sube la versión de `modelos` cuando se confirme la transacción en curso."""
+    claves = [_clave(modelo) for modelo in modelos]
+    transaction.on_commit(lambda: _incrementar(claves))
+
+
+def versiones(*modelos):
+    """
+    Versión actual de cada modelo, en el orden recibido, con una sola lectura
+    de la caché. None si la caché no la guarda (DummyCache, o se desalojó
+    apenas creada): sin versión no hay ETag posible.
+    """
+    claves = [_clave(modelo) for modelo in modelos]
+    encontradas = cache.get_many(claves)
+    for clave in claves:
+        if clave not in encontradas:
+            cache.add(clave, _inicial(), None)
+            encontradas[clave] = cache.get(clave)
+    return [encontradas[clave] for clave in claves]
+
+
+def _escrito(sender, **kwargs):
+    tocar(sender)
+
+
+def _relacion_cambiada(sender, instance, action, model, **kwargs):
+    if action.startswith('post_'):
+        tocar(sender, type(instance), model)
+
+
+def vigilar(*modelos):
+    """Conecta las señales que versionan `modelos` y sus tablas intermedias."""
+    for modelo in modelos:
+        uid = f'versiones_{modelo._meta.label_lower}'
+        post_save.connect(_escrito, sender=modelo, dispatch_uid=f'{uid}_guardado')
+        post_delete.connect(_escrito, sender=modelo, dispatch_uid=f'{uid}_borrado')
+        for campo in modelo._meta.local_many_to_many:
+            m2m_changed.connect(_relacion_cambiada, sender=campo.remote_field.through,
+                                dispatch_uid=f'{uid}_{campo.name}')
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import Tarea
+
+
+@admin.register(Tarea)
+class TareaAdmin(admin.ModelAdmin):
+    list_display = ('funcion', 'estado', 'intentos', 'disponible_en', 'terminada_en')
+    list_filter = ('estado', 'funcion')
+    readonly_fields = ('tomada_en', 'tomada_por', 'terminada_en', 'error')
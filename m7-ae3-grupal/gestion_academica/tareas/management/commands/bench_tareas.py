@@ -0,0 +1,56 @@
+from collections import Counter
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from tareas import trabajador
+from tareas.cola import encolar
+from tareas.models import Tarea
+
+
+# Ejecuciones de tarea_vacia por argumento, para detectar duplicados
+ejecuciones = Counter()
+_candado = threading.Lock()
+
+
+def tarea_vacia(numero):
+    with _candado:
+        ejecuciones[numero] += 1
+
+
+class Command(BaseCommand):
+    help = (
+        'Rendimiento de la cola: mide el costo de encolar (lo que paga el request) y '
+        'cuántas tareas por segundo vacía el worker con distintos hilos. Comprueba que '
+        'ninguna tarea se ejecute dos veces y borra lo que crea.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tareas', type=int, default=2000)
+        parser.add_argument('--hilos', default='1,4,8', help='Lista de cantidades de hilos a probar.')
+        parser.add_argument('--lote', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            raise CommandError('Con SQLite en memoria cada hilo vería una base distinta; usa un archivo.')
+        modo = 'SKIP LOCKED' if connection.features.has_select_for_update_skip_locked else 'UPDATE condicional'
+        self.stdout.write(f'{connection.vendor} ({modo}), {options["tareas"]} tareas')
+        for hilos in [int(h) for h in options['hilos'].split(',')]:
+            ejecuciones.clear()
+            inicio = time.perf_counter()
+            tareas = [encolar(tarea_vacia, numero).pk for numero in range(options['tareas'])]
+            encolado = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            trabajador.correr(hilos=hilos, lote=options['lote'], una_vez=True)
+            duracion = time.perf_counter() - inicio
+            hechas = Tarea.objects.filter(pk__in=tareas, estado=Tarea.HECHA).count()
+            repetidas = sum(1 for veces in ejecuciones.values() if veces > 1)
+            Tarea.objects.filter(pk__in=tareas).delete()
+            self.stdout.write(
+                f'  {hilos} hilo(s): encolar {encolado / options["tareas"] * 1000:.2f} ms/tarea, '
+                f'worker {hechas / duracion:.0f} tareas/s, hechas={hechas} repetidas={repetidas}'
+            )
+            if hechas != options['tareas'] or repetidas:
+                raise CommandError('La cola perdió o repitió tareas')
@@ -0,0 +1,50 @@
+# tareas/models.py
+from django.db import models
+from django.utils import timezone
+
+
+class Tarea(models.Model):
+    """
+    Trabajo pendiente para el worker (ver tareas/cola.py).
+
+    `funcion` es la ruta importable de la función ("app.modulo.funcion") y
+    `argumentos` sus args/kwargs en JSON. Un worker toma la tarea pasándola a
+    EN_CURSO; si falla vuelve a PENDIENTE con `disponible_en` en el futuro
+    hasta agotar `max_intentos`.
+    """
+    PENDIENTE = 'P'
+    EN_CURSO = 'E'
+    HECHA = 'H'
+    FALLIDA = 'F'
+    ESTADO_CHOICES = [
+        (PENDIENTE, 'Pendiente'),
+        (EN_CURSO, 'En curso'),
+        (HECHA, 'Hecha'),
+        (FALLIDA, 'Fallida'),
+    ]
+    funcion = models.CharField(max_length=200)
+    argumentos = models.JSONField(default=dict)
+    estado = models.CharField(max_length=1, choices=ESTADO_CHOICES, default=PENDIENTE)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    max_intentos = models.PositiveSmallIntegerField(default=5)
+    creada_en = models.DateTimeField(default=timezone.now)
+    disponible_en = models.DateTimeField(default=timezone.now)
+    tomada_en = models.DateTimeField(null=True, blank=True)
+    tomada_por = models.CharField(max_length=100, blank=True)
+    terminada_en = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    
+    class Meta:
+        # Lo que recorre el worker al buscar trabajo
+        indexes = [
+            models.Index(fields=['estado', 'disponible_en'], name='tarea_estado_disponible_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.funcion} ({self.get_estado_display()})"
+    
+    def metadata(self):
+        return {
+            'verbose_name': 'Tarea',
+            'verbose_name_plural': 'Tareas'
+        }
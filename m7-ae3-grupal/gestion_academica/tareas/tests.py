@@ -0,0 +1,105 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from . import cola
+from .models import Tarea
+
+
+LLAMADAS = []
+
+
+def anotar(*args, **kwargs):
+    LLAMADAS.append((args, kwargs))
+
+
+def fallar():
+    raise ValueError('falla a propósito')
+
+
+class ColaTests(TestCase):
+
+    def setUp(self):
+        LLAMADAS.clear()
+
+    def test_encolar_y_procesar(self):
+        cola.encolar(anotar, 1, 'dos', clave=[3])
+        cola.encolar('tareas.tests.anotar', 4)
+        self.assertEqual(LLAMADAS, [])
+        self.assertEqual(cola.procesar(lote=10), 2)
+        self.assertEqual(LLAMADAS, [((1, 'dos'), {'clave': [3]}), ((4,), {})])
+        self.assertEqual(Tarea.objects.filter(estado=Tarea.HECHA).count(), 2)
+        self.assertEqual(cola.procesar(), 0)
+
+    def test_una_tarea_tomada_no_se_vuelve_a_tomar(self):
+        cola.encolar(anotar)
+        cola.encolar(anotar, demora=60)
+        self.assertEqual(len(cola.tomar(lote=10, trabajador='a')), 1)
+        self.assertEqual(cola.tomar(lote=10, trabajador='b'), [])
+
+    def test_reintentos_con_espera_y_fallo_final(self):
+        tarea = cola.encolar(fallar, max_intentos=2)
+        antes = timezone.now()
+        cola.procesar()
+        tarea.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.intentos), (Tarea.PENDIENTE, 1))
+        self.assertGreaterEqual(tarea.disponible_en, antes + timedelta(seconds=cola.retraso(1)))
+        self.assertIn('falla a propósito', tarea.error)
+        # Todavía no le toca
+        self.assertEqual(cola.procesar(), 0)
+        Tarea.objects.filter(pk=tarea.pk).update(disponible_en=timezone.now())
+        cola.procesar()
+        tarea.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.intentos), (Tarea.FALLIDA, 2))
+        self.assertEqual([cola.retraso(n) for n in (1, 2, 3)], [2, 4, 8])
+
+    def abandonar(self, tarea):
+        Tarea.objects.filter(pk=tarea.pk).update(tomada_en=timezone.now() - timedelta(hours=1))
+
+    def test_recuperar_abandonadas(self):
+        tarea = cola.encolar(anotar)
+        cola.tomar()
+        self.abandonar(tarea)
+        self.assertEqual(cola.recuperar_abandonadas(), 1)
+        tarea.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.intentos), (Tarea.PENDIENTE, 1))
+        self.assertEqual(cola.procesar(), 1)
+        self.assertEqual(len(LLAMADAS), 1)
+
+    def test_abandonada_agota_sus_intentos(self):
+        tarea = cola.encolar(anotar, max_intentos=2)
+        for estado in (Tarea.PENDIENTE, Tarea.FALLIDA):
+            cola.tomar()
+            self.abandonar(tarea)
+            self.assertEqual(cola.recuperar_abandonadas(), 1)
+            tarea.refresh_from_db()
+            self.assertEqual(tarea.estado, estado)
+        self.assertEqual(tarea.intentos, 2)
+        self.assertIn('Abandonada', tarea.error)
+        self.assertEqual(cola.procesar(), 0)
+
+    def test_el_latido_evita_recuperar_una_tarea_larga(self):
+        tarea = cola.encolar(anotar)
+        otra = cola.encolar(anotar)
+        cola.tomar(lote=1)
+        cola.tomar(lote=1, trabajador='otro-host:1:1')
+        self.abandonar(tarea)
+        self.abandonar(otra)
+        self.assertEqual(cola.latido(), 1)
+        self.assertEqual(cola.recuperar_abandonadas(), 1)
+        tarea.refresh_from_db()
+        self.assertEqual(tarea.estado, Tarea.EN_CURSO)
+
+    def test_una_tarea_recuperada_no_la_cierra_su_dueño_anterior(self):
+        tarea = cola.encolar(anotar)
+        [vieja] = cola.tomar(trabajador='a')
+        self.abandonar(tarea)
+        cola.recuperar_abandonadas()
+        [nueva] = cola.tomar(trabajador='b')
+        self.assertTrue(cola.ejecutar(vieja))
+        tarea.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.tomada_por), (Tarea.EN_CURSO, 'b'))
+        cola.ejecutar(nueva)
+        tarea.refresh_from_db()
+        self.assertEqual(tarea.estado, Tarea.HECHA)
@@ -0,0 +1,77 @@
+# tareas/trabajador.py
+"""
+Bucle del worker. No importa modelos al cargarse, para que los procesos
+hijos (multiprocessing con spawn) puedan importarlo antes de django.setup().
+"""
+import threading
+import time
+
+
+# Segundos entre latidos: cada uno renueva las tareas en curso de este
+# proceso y recupera las abandonadas por otros. Muy por debajo de
+# cola.MINUTOS_ABANDONO, para que una tarea larga nunca parezca abandonada.
+INTERVALO_LATIDO = 60
+
+
+def _hilo(lote, espera, una_vez, detener):
+    from django.db import OperationalError, close_old_connections, connections
+    from .cola import procesar
+    try:
+        while not detener.is_set():
+            # Descarta la conexión si quedó inservible (el servidor la cortó
+            # por wait_timeout, un error anterior) o pasó CONN_MAX_AGE
+            close_old_connections()
+            try:
+                hechas = procesar(lote)
+            except OperationalError:
+                # p. ej. "database is locked" en SQLite: se reintenta en la próxima vuelta
+                detener.wait(espera)
+                continue
+            if not hechas:
+                if una_vez:
+                    return
+                detener.wait(espera)
+    finally:
+        connections.close_all()
+
+
+def latir():
+    """Renueva las tareas en curso de este proceso y recupera las abandonadas por workers caídos."""
+    from django.db import OperationalError, close_old_connections
+    from .cola import latido, recuperar_abandonadas
+    close_old_connections()
+    try:
+        latido()
+        recuperar_abandonadas()
+    except OperationalError:
+        pass  # se reintenta en el próximo latido
+
+
+def correr(hilos=4, lote=10, espera=1.0, una_vez=False, detener=None):
+    """Corre `hilos` hilos tomando y ejecutando tareas hasta que se active `detener` (o se vacíe la cola con una_vez)."""
+    detener = detener or threading.Event()
+    trabajadores = [
+        threading.Thread(target=_hilo, args=(lote, espera, una_vez, detener), daemon=True)
+        for _ in range(hilos)
+    ]
+    latir()
+    proximo_latido = time.monotonic() + INTERVALO_LATIDO
+    for trabajador in trabajadores:
+        trabajador.start()
+    try:
+        while any(trabajador.is_alive() for trabajador in trabajadores):
+            if time.monotonic() >= proximo_latido:
+                latir()
+                proximo_latido = time.monotonic() + INTERVALO_LATIDO
+            trabajadores[0].join(timeout=0.5)
+    except KeyboardInterrupt:
+        detener.set()
+        for trabajador in trabajadores:
+            trabajador.join()
+
+
+def proceso(hilos, lote, espera, una_vez):
+    """Punto de entrada de cada proceso del pool."""
+    import django
+    django.setup()
+    correr(hilos, lote, espera, una_vez)
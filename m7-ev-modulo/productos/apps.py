@@ -4,3 +4,19 @@ from django.apps import AppConfig
 class ProductosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'productos'
+
+    def ready(self):
+        from rendimiento.arranque import al_precalentar
+        from rendimiento.versiones import vigilar
+        from . import auditoria, estadisticas, etiquetas, recomendaciones, tiendas
+        from .models import Categoria, DetalleProducto, Producto, Stock
+        tiendas.conectar_senales()
+        # estadisticas y recomendaciones van primero: necesitan la foto previa que auditoria actualiza en post_save
+        estadisticas.conectar_senales()
+        recomendaciones.conectar_senales()
+        auditoria.conectar_senales()
+        etiquetas.conectar_senales()
+        # Versiones para los ETags de la lista de productos (rendimiento/respuestas.py)
+        vigilar(Producto, Stock, Categoria, DetalleProducto)
+        # Mapa código/dominio -> tienda en memoria del proceso, que lee TiendaMiddleware en cada request
+        al_precalentar(tiendas._tiendas)
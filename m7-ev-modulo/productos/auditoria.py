@@ -0,0 +1,134 @@
+# productos/auditoria.py
+"""
+Registro de cambios (historial de precios) de Producto y DetalleProducto.
+
+Al cargar una instancia se guarda una foto de los campos auditados; al
+guardarla se compara contra esa foto y se anota solo lo que cambió. Dentro de
+`registro_de_cambios()` las filas se acumulan y se insertan con un único
+bulk_create al final de la transacción; fuera de él, cada save inserta su
+propia fila.
+"""
+from contextlib import contextmanager
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_init, post_save
+from django.utils import timezone
+
+from .models import Producto, DetalleProducto, CambioProducto
+
+
+CAMPOS_AUDITADOS = {
+    Producto: ('nombre', 'precio', 'categoria_id'),
+    DetalleProducto: ('dimensiones', 'peso', 'material'),
+}
+
+_estado = threading.local()
+
+
+def _mes(fecha):
+    return fecha.year * 100 + fecha.month
+
+
+def _valores(instance):
+    """Valores normalizados de los campos auditados (los diferidos se omiten)."""
+    valores = {}
+    cargados = instance.__dict__
+    for attname in CAMPOS_AUDITADOS[type(instance)]:
+        if attname in cargados:
+            campo = instance._meta.get_field(attname.removesuffix('_id'))
+            valores[attname] = campo.to_python(cargados[attname])
+    return valores
+
+
+def valor_anterior(instance, attname):
+    """
+    Valor de `attname` en la última foto auditada de `instance` (al cargarla
+    o al guardarla), o None si no hay foto. En un post_save conectado antes
+    que el de la auditoría es el valor previo al save.
+    """
+    return getattr(instance, '_valores_auditados', {}).get(attname)
+
+
+def _serializable(valor):
+    return valor if valor is None or isinstance(valor, (int, str)) else str(valor)
+
+
+def _guardar_foto(sender, instance, **kwargs):
+    instance._valores_auditados = _valores(instance)
+
+
+def _anotar_cambio(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    anteriores = {} if created else instance._valores_auditados
+    actuales = _valores(instance)
+    instance._valores_auditados = actuales
+    cambios = {
+        campo: _serializable(valor)
+        for campo, valor in actuales.items()
+        if created or (campo in anteriores and anteriores[campo] != valor)
+    }
+    if not cambios:
+        return
+
+    ahora = timezone.now()
+    es_producto = sender is Producto
+    cambio = CambioProducto(
+        producto_id=instance.pk if es_producto else instance.producto_id,
+        modelo=CambioProducto.PRODUCTO if es_producto else CambioProducto.DETALLE,
+        fecha_cambio=ahora,
+        mes=_mes(ahora),
+        precio=actuales['precio'] if es_producto and 'precio' in cambios else None,
+        cambios=cambios,
+    )
+    pila = getattr(_estado, 'pila', None)
+    if pila:
+        pila[-1].append(cambio)
+    else:
+        CambioProducto.objects.bulk_create([cambio])
+
+
+def conectar_senales():
+    for modelo in CAMPOS_AUDITADOS:
+        post_init.connect(_guardar_foto, sender=modelo, dispatch_uid=f'auditoria_foto_{modelo.__name__}')
+        post_save.connect(_anotar_cambio, sender=modelo, dispatch_uid=f'auditoria_cambio_{modelo.__name__}')
+
+
+@contextmanager
+def registro_de_cambios():
+    """
+    Abre una transacción y agrupa los cambios auditados que ocurran dentro,
+    insertándolos con un solo bulk_create antes del commit.
+    """
+    if not hasattr(_estado, 'pila'):
+        _estado.pila = []
+    with transaction.atomic():
+        pendientes = []
+        _estado.pila.append(pendientes)
+        try:
+            yield pendientes
+        finally:
+            _estado.pila.pop()
+        CambioProducto.objects.bulk_create(pendientes)
+
+
+def precio_en_fecha(producto, fecha):
+    """Precio vigente de `producto` en `fecha` según el historial, o None si no hay registro."""
+    return (
+        CambioProducto.objects
+        .filter(producto_id=getattr(producto, 'pk', producto), fecha_cambio__lte=fecha, precio__isnull=False)
+        .order_by('-fecha_cambio')
+        .values_list('precio', flat=True)
+        .first()
+    )
+
+
+def historial_precios(producto):
+    """Lista de (fecha_cambio, precio) del producto, del más antiguo al más reciente."""
+    return list(
+        CambioProducto.objects
+        .filter(producto_id=getattr(producto, 'pk', producto), precio__isnull=False)
+        .order_by('fecha_cambio')
+        .values_list('fecha_cambio', 'precio')
+    )
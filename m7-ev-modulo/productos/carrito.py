@@ -0,0 +1,145 @@
+# productos/carrito.py
+"""
+Carrito de compras y confirmación de pedidos.
+
+El carrito no ocupa filas ni sesión: vive en una cookie firmada con solo
+ids y cantidades ("12:1|40:3"), así que agregar o quitar un producto no
+toca la base de datos. Los precios nunca salen de la cookie: al mostrar el
+carrito y al confirmar el pedido se leen todos los productos con un único
+`in_bulk`, y el pedido se escribe en una sola transacción (Pedido, stock
+descontado con UPDATE condicional y `bulk_create` de las líneas).
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .inventario import descontar
+from .models import Producto, Pedido, LineaPedido
+
+
+class PreciosCambiados(Exception):
+    """El total recalculado no coincide con el que vio el usuario."""
+
+    def __init__(self, total):
+        super().__init__(f'El total del carrito cambió a {total}')
+        self.total = total
+
+
+class CarritoVacio(Exception):
+    """No hay productos disponibles en el carrito."""
+
+
+class Carrito:
+    """Cantidades por id de producto, guardadas en una cookie firmada."""
+    COOKIE = 'carrito'
+    SALT = 'productos.carrito'
+    MAX_LINEAS = 50
+    MAX_CANTIDAD = 99
+    DURACION = 60 * 60 * 24 * 14
+
+    def __init__(self, lineas=None):
+        self.lineas = dict(lineas or {})
+
+    @classmethod
+    def desde_request(cls, request):
+        """Lee el carrito de la cookie; si falta, está alterada o mal formada, devuelve uno vacío."""
+        valor = request.get_signed_cookie(cls.COOKIE, default='', salt=cls.SALT, max_age=cls.DURACION)
+        carrito = cls()
+        for parte in valor.split('|') if valor else ():
+            try:
+                producto_id, cantidad = map(int, parte.split(':'))
+            except ValueError:
+                return cls()
+            carrito.agregar(producto_id, cantidad)
+        return carrito
+
+    def serializar(self):
+        return '|'.join(f'{producto_id}:{cantidad}' for producto_id, cantidad in self.lineas.items())
+
+    def agregar(self, producto_id, cantidad=1):
+        if producto_id <= 0 or cantidad <= 0:
+            return
+        if producto_id not in self.lineas and len(self.lineas) >= self.MAX_LINEAS:
+            return
+        self.lineas[producto_id] = min(self.lineas.get(producto_id, 0) + cantidad, self.MAX_CANTIDAD)
+
+    def quitar(self, producto_id):
+        self.lineas.pop(producto_id, None)
+
+    def vaciar(self):
+        self.lineas.clear()
+
+    def guardar(self, response):
+        """Escribe el carrito en la respuesta (o borra la cookie si quedó vacío)."""
+        if self.lineas:
+            response.set_signed_cookie(self.COOKIE, self.serializar(), salt=self.SALT,
+                                       max_age=self.DURACION, httponly=True, samesite='Lax')
+        else:
+            response.delete_cookie(self.COOKIE, samesite='Lax')
+        return response
+
+    @property
+    def total_unidades(self):
+        return sum(self.lineas.values())
+
+    def __len__(self):
+        return len(self.lineas)
+
+    def detalle(self):
+        """
+        Líneas del carrito con los precios actuales, en una sola consulta.
+        Los productos que ya no existen (o no son de la tienda activa) se omiten.
+        Devuelve (lineas, total).
+        """
+        productos = Producto.objects.only('id', 'nombre', 'precio').in_bulk(list(self.lineas))
+        lineas = []
+        total = Decimal('0')
+        for producto_id, cantidad in sorted(self.lineas.items()):
+            producto = productos.get(producto_id)
+            if producto is None:
+                continue
+            subtotal = producto.precio * cantidad
+            lineas.append({'producto': producto, 'cantidad': cantidad, 'subtotal': subtotal})
+            total += subtotal
+        return lineas, total
+
+
+def _importe(valor):
+    """Decimal de un importe que viene del formulario, o None si no es un número finito."""
+    try:
+        importe = Decimal(valor)
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    return importe if importe.is_finite() else None
+
+
+def confirmar_pedido(carrito, usuario=None, total_mostrado=None):
+    """
+    Crea el pedido del carrito con los precios vigentes.
+
+    Si se pasa `total_mostrado` y no coincide con el recalculado (o no es un
+    número), lanza PreciosCambiados sin escribir nada. Si algún producto no tiene stock,
+    lanza StockInsuficiente y la transacción entera se deshace.
+    """
+    lineas, total = carrito.detalle()
+    if not lineas:
+        raise CarritoVacio('El carrito no tiene productos disponibles')
+    if total_mostrado is not None and _importe(total_mostrado) != total:
+        raise PreciosCambiados(total)
+    with transaction.atomic():
+        pedido = Pedido.objects.create(usuario=usuario if getattr(usuario, 'is_authenticated', False) else None,
+                                       total=total)
+        # Por id ascendente: dos pedidos con los mismos productos bloquean en el mismo orden
+        for linea in lineas:
+            descontar(linea['producto'].pk, linea['cantidad'])
+        LineaPedido.objects.bulk_create([
+            LineaPedido(
+                pedido=pedido,
+                producto_id=linea['producto'].pk,
+                nombre=linea['producto'].nombre,
+                precio_unitario=linea['producto'].precio,
+                cantidad=linea['cantidad'],
+            )
+            for linea in lineas
+        ])
+    return pedido
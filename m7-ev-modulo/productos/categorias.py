@@ -0,0 +1,126 @@
+# productos/categorias.py
+"""
+Árbol de categorías con rutas materializadas.
+
+Cada categoría guarda en `ruta` los ids de sus ancestros y el suyo
+("1/7/12/"), así que:
+
+- el subárbol (y los productos de todo el subárbol) es una sola consulta
+  `ruta LIKE '1/7/%'` sobre el índice de `ruta`;
+- las migas de pan salen de la propia ruta con un único `in_bulk`;
+- mover una rama reescribe las rutas de todo el subárbol con un UPDATE.
+
+La ruta la mantiene `Categoria.save()`; quien cree categorías con
+`bulk_create` debe llamar después a `reconstruir_rutas()`.
+"""
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
+
+from rendimiento.versiones import tocar
+
+from .models import Categoria, Producto
+
+
+SEPARADOR = '/'
+
+
+def ids_de_ruta(ruta):
+    """Ids de la ruta, de la raíz a la hoja."""
+    return [int(parte) for parte in ruta.split(SEPARADOR) if parte]
+
+
+def _ruta_de(categoria_id):
+    if categoria_id is None:
+        return ''
+    return Categoria.todas_las_tiendas.filter(pk=categoria_id).values_list('ruta', flat=True).get()
+
+
+def validar_padre(categoria):
+    """
+    Lanza ValueError si el padre de `categoria` está dentro de su propia rama
+    (o es ella misma). La ruta del padre es la cadena de sus ancestros: se
+    mira antes de guardar, para no escribir nunca un ciclo.
+    """
+    if categoria.pk is None or categoria.padre_id is None:
+        return
+    if categoria.pk in ids_de_ruta(_ruta_de(categoria.padre_id)) or categoria.padre_id == categoria.pk:
+        raise ValueError('No se puede mover una categoría dentro de su propia rama')
+
+
+def asignar_ruta(categoria):
+    """
+    Deja la ruta de `categoria` (ya guardada) acorde a su padre. Si el padre
+    cambió desde la última vez, mueve todo el subárbol.
+    """
+    ids = ids_de_ruta(categoria.ruta)
+    padre_en_ruta = ids[-2] if len(ids) > 1 else None
+    if categoria.ruta and padre_en_ruta == categoria.padre_id:
+        return
+    if categoria.ruta:
+        mover(categoria, categoria.padre_id)
+        return
+    categoria.ruta = f'{_ruta_de(categoria.padre_id)}{categoria.pk}{SEPARADOR}'
+    categoria.profundidad = categoria.ruta.count(SEPARADOR) - 1
+    Categoria.todas_las_tiendas.filter(pk=categoria.pk).update(ruta=categoria.ruta, profundidad=categoria.profundidad)
+
+
+def mover(categoria, nuevo_padre):
+    """
+    Cuelga `categoria` (con toda su rama) de `nuevo_padre` (instancia, id o
+    None para dejarla como raíz). Lanza ValueError si el destino está dentro
+    de la propia rama.
+    """
+    nuevo_padre_id = getattr(nuevo_padre, 'pk', nuevo_padre)
+    with transaction.atomic():
+        vieja = _ruta_de(categoria.pk)
+        ruta_padre = _ruta_de(nuevo_padre_id)
+        if ruta_padre.startswith(vieja):
+            raise ValueError('No se puede mover una categoría dentro de su propia rama')
+        nueva = f'{ruta_padre}{categoria.pk}{SEPARADOR}'
+        Categoria.todas_las_tiendas.filter(pk=categoria.pk).update(padre_id=nuevo_padre_id)
+        Categoria.todas_las_tiendas.filter(ruta__startswith=vieja).update(
+            ruta=Concat(Value(nueva), Substr('ruta', len(vieja) + 1)),
+            profundidad=F('profundidad') + (nueva.count(SEPARADOR) - vieja.count(SEPARADOR)),
+        )
+        tocar(Categoria)
+    categoria.padre_id = nuevo_padre_id
+    categoria.ruta = nueva
+    categoria.profundidad = nueva.count(SEPARADOR) - 1
+
+
+def subarbol(categoria):
+    """La categoría y todas sus descendientes, en orden de ruta."""
+    return Categoria.objects.filter(ruta__startswith=categoria.ruta).order_by('ruta')
+
+
+def productos_del_subarbol(categoria):
+    """Productos de la categoría y de todas sus subcategorías."""
+    return Producto.objects.filter(categoria__ruta__startswith=categoria.ruta)
+
+
+def migas(categoria):
+    """Categorías desde la raíz hasta `categoria` (incluida), en una sola consulta."""
+    ids = ids_de_ruta(categoria.ruta)
+    encontradas = Categoria.objects.only('id', 'nombre', 'ruta').in_bulk(ids)
+    return [encontradas[pk] for pk in ids if pk in encontradas]
+
+
+def reconstruir_rutas():
+    """Recalcula todas las rutas, nivel por nivel desde las raíces."""
+    hijos = {}
+    for pk, padre_id in Categoria.todas_las_tiendas.values_list('pk', 'padre_id'):
+        hijos.setdefault(padre_id, []).append(pk)
+    nivel = [(pk, f'{pk}{SEPARADOR}') for pk in hijos.get(None, [])]
+    profundidad = 0
+    with transaction.atomic():
+        while nivel:
+            for pk, ruta in nivel:
+                Categoria.todas_las_tiendas.filter(pk=pk).update(ruta=ruta, profundidad=profundidad)
+            nivel = [
+                (hijo, f'{ruta}{hijo}{SEPARADOR}')
+                for pk, ruta in nivel
+                for hijo in hijos.get(pk, [])
+            ]
+            profundidad += 1
+        tocar(Categoria)
@@ -0,0 +1,154 @@
+# productos/estadisticas.py
+"""
+Estadísticas de precio por categoría para la navegación del catálogo.
+
+Todo se calcula en la base de datos, en una sola consulta: mínimo, máximo,
+promedio, el histograma (Case/When por tramo de precio) y el conteo por
+etiqueta. El resultado se guarda en caché por tienda y categoría y se
+invalida cuando cambia un producto de esa categoría.
+"""
+from django.core.cache import cache
+from django.db.models import (
+    Avg, Case, CharField, Count, DecimalField, F, FilteredRelation, IntegerField, Max, Min, Q, Sum, Value, When,
+)
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from .auditoria import valor_anterior
+from .models import Producto, Categoria, Etiquetas
+from .tiendas import clave_cache, tienda_actual_id
+
+
+# Límites inferiores de los tramos del histograma; el último tramo es abierto
+RANGOS_PRECIO = (0, 10, 50, 100, 500, 1000)
+TIEMPO_CACHE = 60 * 15
+
+
+def _clave(tienda_id, categoria_id):
+    return clave_cache(tienda_id, 'estadisticas', categoria_id)
+
+
+def _tramos():
+    """Tuplas (etiqueta, desde, hasta) de los tramos; `hasta` es None en el último."""
+    limites = list(RANGOS_PRECIO) + [None]
+    for desde, hasta in zip(limites, limites[1:]):
+        yield (f'{desde}-{hasta}' if hasta is not None else f'{desde}+'), desde, hasta
+
+
+def _histograma(precio):
+    """Sum(Case/When) por tramo de `precio` (el campo, visto desde la categoría)."""
+    tramos = {}
+    for etiqueta, desde, hasta in _tramos():
+        condicion = {f'{precio}__gte': desde}
+        if hasta is not None:
+            condicion[f'{precio}__lt'] = hasta
+        tramos[f'tramo_{len(tramos)}'] = Sum(
+            Case(When(**condicion, then=Value(1)), default=Value(0), output_field=IntegerField())
+        )
+    return tramos
+
+
+def calcular_estadisticas(categoria_id):
+    """
+    Estadísticas de precio de una categoría, sin pasar por caché, o None si
+    la categoría no existe (en la tienda activa).
+
+    Es una sola consulta: la fila de la categoría con los agregados (si no
+    hay fila, la categoría no existe) UNION ALL una fila por etiqueta con su
+    conteo; las columnas que no aplican a cada parte van en NULL.
+    """
+    categorias = Categoria.objects.filter(pk=categoria_id)
+    productos = 'producto'
+    tienda_id = tienda_actual_id()
+    if tienda_id is not None:
+        # Con la tienda en el JOIN se recorre solo el índice cubriente (tienda, categoria, precio)
+        categorias = categorias.annotate(
+            productos=FilteredRelation('producto', condition=Q(producto__tienda_id=tienda_id)),
+        )
+        productos = 'productos'
+    histograma = _histograma(f'{productos}__precio')
+    columnas = ['etiqueta', 'total', 'precio_min', 'precio_max', 'precio_promedio', *histograma]
+    decimal = DecimalField(max_digits=10, decimal_places=2)
+    resumen = categorias.annotate(
+        etiqueta=Value(None, output_field=CharField()),
+        total=Count(productos),
+        precio_min=Min(f'{productos}__precio'),
+        precio_max=Max(f'{productos}__precio'),
+        precio_promedio=Avg(f'{productos}__precio'),
+        **histograma,
+    ).values_list(*columnas)
+    por_etiqueta = Etiquetas.objects.filter(producto__categoria_id=categoria_id).annotate(
+        etiqueta=F('nombre'),
+        total=Count('producto'),
+        precio_min=Value(None, output_field=decimal),
+        precio_max=Value(None, output_field=decimal),
+        precio_promedio=Value(None, output_field=decimal),
+        **{tramo: Value(None, output_field=IntegerField()) for tramo in histograma},
+    ).values_list(*columnas)
+    filas = list(resumen.order_by().union(por_etiqueta.order_by(), all=True))
+    categoria = next((dict(zip(columnas, fila)) for fila in filas if fila[0] is None), None)
+    if categoria is None:
+        return None
+    etiquetas = sorted((fila[:2] for fila in filas if fila[0] is not None), key=lambda f: (-f[1], f[0]))
+    return {
+        'categoria_id': categoria_id,
+        'total': categoria['total'],
+        'precio_min': categoria['precio_min'],
+        'precio_max': categoria['precio_max'],
+        'precio_promedio': categoria['precio_promedio'],
+        'histograma': [
+            {'tramo': etiqueta, 'total': categoria[f'tramo_{i}'] or 0}
+            for i, (etiqueta, _, _) in enumerate(_tramos())
+        ],
+        'etiquetas': [{'nombre': nombre, 'total': total} for nombre, total in etiquetas],
+    }
+
+
+def estadisticas_categoria(categoria_id):
+    """Estadísticas de precio de una categoría, desde la caché si están vigentes (None si no existe)."""
+    clave = _clave(tienda_actual_id(), categoria_id)
+    datos = cache.get(clave)
+    if datos is None:
+        datos = calcular_estadisticas(categoria_id)
+        if datos is not None:
+            cache.set(clave, datos, TIEMPO_CACHE)
+    return datos
+
+
+def invalidar_estadisticas(tienda_id, *categoria_ids):
+    """
+    Borra las estadísticas cacheadas de `categoria_ids`. Se borran tanto en el
+    espacio de la tienda como en el global (consultas sin tienda activa).
+    """
+    cache.delete_many([
+        _clave(espacio, categoria_id)
+        for espacio in {tienda_id, None}
+        for categoria_id in set(categoria_ids) if categoria_id
+    ])
+
+
+def _producto_guardado(sender, instance, **kwargs):
+    # Si cambió de categoría, la anterior también queda desactualizada
+    anterior = valor_anterior(instance, 'categoria_id')
+    invalidar_estadisticas(instance.tienda_id, instance.categoria_id, anterior)
+
+
+def _etiquetas_cambiadas(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith('post_'):
+            invalidar_estadisticas(instance.tienda_id, instance.categoria_id)
+        return
+    # Cambiaron los productos de una etiqueta: en un clear hay que mirarlos antes de quitarlos
+    if action == 'pre_clear':
+        productos = instance.producto_set.all()
+    elif action in ('post_add', 'post_remove'):
+        productos = Producto.objects.filter(pk__in=pk_set)
+    else:
+        return
+    invalidar_estadisticas(instance.tienda_id, *productos.values_list('categoria_id', flat=True).distinct())
+
+
+def conectar_senales():
+    post_save.connect(_producto_guardado, sender=Producto, dispatch_uid='estadisticas_producto_guardado')
+    post_delete.connect(_producto_guardado, sender=Producto, dispatch_uid='estadisticas_producto_borrado')
+    m2m_changed.connect(_etiquetas_cambiadas, sender=Producto.etiquetas.through,
+                        dispatch_uid='estadisticas_etiquetas')
@@ -0,0 +1,235 @@
+# productos/etiquetas.py
+"""
+Normalización, fusión y nube de etiquetas.
+
+Las etiquetas se comparan por `clave` (nombre sin espacios sobrantes y en
+minúsculas), única por tienda: "Oferta", "oferta " y "OFERTA" son la misma.
+Para asignar etiquetas por nombre se usa `ids_etiquetas()`, que resuelve los
+nombres con un mapa clave→id en caché y solo crea las que faltan.
+
+`Etiquetas.usos` cuenta los productos de cada etiqueta y se actualiza en
+m2m_changed con UPDATE ... SET usos = usos ± n, así que la nube de etiquetas
+es una consulta ordenada por ese índice (y además se cachea).
+"""
+import math
+import unicodedata
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+
+from .models import Producto, Etiquetas
+from .estadisticas import invalidar_estadisticas
+from .tiendas import clave_cache, tienda_actual_id
+
+
+Asignacion = Producto.etiquetas.through
+TIEMPO_CACHE = 60 * 15
+LIMITE_NUBE = 50
+# La nube reparte las etiquetas en pesos de 1 a PESOS (escala logarítmica)
+PESOS = 5
+
+
+def normalizar(nombre):
+    """(nombre para mostrar, clave) de una etiqueta."""
+    nombre = ' '.join(unicodedata.normalize('NFKC', nombre or '').split())[:50]
+    return nombre, nombre.casefold()[:50]
+
+
+def _olvidar(tienda_id, *partes):
+    """
+    Borra de la caché las `partes` de la tienda: 'mapa' (clave -> id) cambia
+    solo cuando se crea, renombra o borra una etiqueta; 'nube' también
+    cuando cambian sus usos.
+    """
+    cache.delete_many([
+        clave_cache(espacio, 'etiquetas', parte)
+        for espacio in {tienda_id, None}
+        for parte in partes
+    ])
+
+
+def mapa_etiquetas():
+    """{clave: id} de las etiquetas de la tienda activa, desde la caché."""
+    clave = clave_cache(tienda_actual_id(), 'etiquetas', 'mapa')
+    mapa = cache.get(clave)
+    if mapa is None:
+        mapa = dict(Etiquetas.objects.values_list('clave', 'pk'))
+        cache.set(clave, mapa, TIEMPO_CACHE)
+    return mapa
+
+
+def ids_etiquetas(nombres):
+    """
+    Ids de las etiquetas `nombres` (sin repetidos, en orden de aparición),
+    creando solo las que no existen.
+    """
+    mapa = mapa_etiquetas()
+    ids = {}
+    faltaban = False
+    for nombre in nombres:
+        mostrado, clave = normalizar(nombre)
+        if not clave or clave in ids:
+            continue
+        if clave not in mapa:
+            faltaban = True
+            # El mapa puede estar atrasado respecto de otro proceso: se confirma antes de crear
+            existente = Etiquetas.objects.filter(clave=clave).values_list('pk', flat=True).first()
+            if existente is None:
+                try:
+                    with transaction.atomic():
+                        existente = Etiquetas.objects.create(nombre=mostrado).pk
+                except IntegrityError:
+                    existente = Etiquetas.objects.get(clave=clave).pk
+            mapa[clave] = existente
+        ids[clave] = mapa[clave]
+    if faltaban:
+        cache.set(clave_cache(tienda_actual_id(), 'etiquetas', 'mapa'), mapa, TIEMPO_CACHE)
+    return list(ids.values())
+
+
+def etiquetar(producto, nombres):
+    """Agrega a `producto` las etiquetas `nombres` (normalizadas)."""
+    producto.etiquetas.add(*ids_etiquetas(nombres))
+
+
+def fusionar(destino, duplicadas):
+    """
+    Pasa los productos de `duplicadas` a `destino` y borra las duplicadas.
+    Las asignaciones se reescriben en bloque sobre la tabla intermedia.
+    Devuelve cuántas asignaciones nuevas recibió `destino`.
+    """
+    ids = [etiqueta.pk for etiqueta in duplicadas if etiqueta.pk != destino.pk]
+    if not ids:
+        return 0
+    with transaction.atomic():
+        afectados = list(
+            Asignacion.objects.filter(etiquetas_id__in=ids).values_list('producto_id', flat=True).distinct()
+        )
+        nuevos = (
+            Asignacion.objects.filter(etiquetas_id__in=ids)
+            .exclude(producto_id__in=Asignacion.objects.filter(etiquetas_id=destino.pk).values('producto_id'))
+            .values_list('producto_id', flat=True).distinct()
+        )
+        movidas = len(Asignacion.objects.bulk_create(
+            [Asignacion(producto_id=producto_id, etiquetas_id=destino.pk) for producto_id in nuevos],
+            batch_size=1000,
+        ))
+        Asignacion.objects.filter(etiquetas_id__in=ids).delete()
+        Etiquetas.todas_las_tiendas.filter(pk__in=ids).delete()
+        Etiquetas.todas_las_tiendas.filter(pk=destino.pk).update(usos=F('usos') + movidas)
+    categorias = Producto.todas_las_tiendas.filter(pk__in=afectados).values_list('categoria_id', flat=True).distinct()
+    invalidar_estadisticas(destino.tienda_id, *categorias)
+    _olvidar(destino.tienda_id, 'mapa', 'nube')
+    return movidas
+
+
+def fusionar_duplicadas():
+    """Fusiona las etiquetas que comparten clave en la más antigua. Devuelve cuántas se eliminaron."""
+    grupos = (
+        Etiquetas.todas_las_tiendas.values('tienda_id', 'clave')
+        .annotate(total=Count('pk')).filter(total__gt=1).order_by()
+    )
+    eliminadas = 0
+    for grupo in grupos:
+        destino, *duplicadas = Etiquetas.todas_las_tiendas.filter(
+            tienda_id=grupo['tienda_id'], clave=grupo['clave']
+        ).order_by('pk')
+        fusionar(destino, duplicadas)
+        eliminadas += len(duplicadas)
+    return eliminadas
+
+
+def recalcular_usos():
+    """Recalcula `usos` de todas las etiquetas con un solo UPDATE."""
+    por_etiqueta = (
+        Asignacion.objects.filter(etiquetas_id=OuterRef('pk'))
+        .values('etiquetas_id').annotate(total=Count('pk')).values('total')
+    )
+    Etiquetas.todas_las_tiendas.update(usos=Coalesce(Subquery(por_etiqueta), 0))
+    for tienda_id in set(Etiquetas.todas_las_tiendas.values_list('tienda_id', flat=True)):
+        _olvidar(tienda_id, 'nube')
+
+
+def nube(limite=LIMITE_NUBE):
+    """Etiquetas más usadas de la tienda activa con su peso (1 a PESOS), desde la caché."""
+    clave = clave_cache(tienda_actual_id(), 'etiquetas', 'nube')
+    datos = cache.get(clave)
+    if datos is None:
+        filas = list(
+            Etiquetas.objects.filter(usos__gt=0).order_by('-usos', 'nombre')
+            .values_list('pk', 'nombre', 'usos')[:LIMITE_NUBE]
+        )
+        datos = []
+        if filas:
+            minimo, maximo = math.log(filas[-1][2]), math.log(filas[0][2])
+            rango = (maximo - minimo) or 1
+            datos = [
+                {'id': pk, 'nombre': nombre, 'usos': usos,
+                 'peso': 1 + round((math.log(usos) - minimo) / rango * (PESOS - 1))}
+                for pk, nombre, usos in filas
+            ]
+        cache.set(clave, datos, TIEMPO_CACHE)
+    return datos[:limite]
+
+
+def _sumar_usos(etiqueta_ids, cantidad):
+    if etiqueta_ids and cantidad:
+        Etiquetas.todas_las_tiendas.filter(pk__in=etiqueta_ids).update(usos=F('usos') + cantidad)
+
+
+def descontar_usos(producto_ids):
+    """Resta de `usos` las asignaciones de `producto_ids` (antes de borrarlas sin señales)."""
+    por_etiqueta = (
+        Asignacion.objects.filter(producto_id__in=producto_ids)
+        .values('etiquetas_id').annotate(total=Count('pk')).order_by()
+    )
+    for fila in por_etiqueta:
+        _sumar_usos([fila['etiquetas_id']], -fila['total'])
+
+
+def _etiquetas_cambiadas(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        # instance es un Producto: cada etiqueta de pk_set gana o pierde un uso
+        if action == 'post_add':
+            _sumar_usos(pk_set, 1)
+        elif action == 'pre_remove':
+            # pk_set trae lo pedido, no lo que de verdad estaba asignado
+            _sumar_usos(list(Asignacion.objects.filter(producto_id=instance.pk, etiquetas_id__in=pk_set)
+                             .values_list('etiquetas_id', flat=True)), -1)
+        elif action == 'pre_clear':
+            _sumar_usos(list(instance.etiquetas.values_list('pk', flat=True)), -1)
+        else:
+            return
+    else:
+        # instance es una Etiqueta y pk_set son productos
+        if action == 'post_add':
+            _sumar_usos([instance.pk], len(pk_set))
+        elif action == 'pre_remove':
+            _sumar_usos([instance.pk], -Asignacion.objects.filter(etiquetas_id=instance.pk, producto_id__in=pk_set).count())
+        elif action == 'pre_clear':
+            Etiquetas.todas_las_tiendas.filter(pk=instance.pk).update(usos=0)
+        else:
+            return
+    # Cambiaron los usos, no las etiquetas: el mapa sigue vigente
+    _olvidar(instance.tienda_id, 'nube')
+
+
+def _producto_borrado(sender, instance, **kwargs):
+    # El Collector borra las asignaciones sin emitir m2m_changed
+    descontar_usos([instance.pk])
+    _olvidar(instance.tienda_id, 'nube')
+
+
+def _etiqueta_guardada(sender, instance, created=False, **kwargs):
+    # Alta, cambio de nombre o baja. Una etiqueta nueva no tiene usos: no está en la nube
+    _olvidar(instance.tienda_id, 'mapa', *(() if created else ('nube',)))
+
+
+def conectar_senales():
+    m2m_changed.connect(_etiquetas_cambiadas, sender=Asignacion, dispatch_uid='etiquetas_usos')
+    pre_delete.connect(_producto_borrado, sender=Producto, dispatch_uid='etiquetas_producto_borrado')
+    post_save.connect(_etiqueta_guardada, sender=Etiquetas, dispatch_uid='etiquetas_guardada')
+    post_delete.connect(_etiqueta_guardada, sender=Etiquetas, dispatch_uid='etiquetas_borrada')
@@ -0,0 +1,90 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from productos.carrito import Carrito
+from productos.models import Producto, Categoria, Stock, Pedido, LineaPedido
+
+
+class Command(BaseCommand):
+    help = (
+        'Carga de carritos: muchos clientes agregan y quitan productos al azar a través '
+        'de las vistas, y una parte confirma el pedido. Mide requests por segundo, '
+        'consultas por operación y tamaño de la cookie. Borra lo que crea.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--carritos', type=int, default=200)
+        parser.add_argument('--operaciones', type=int, default=20, help='Agregar/quitar por carrito.')
+        parser.add_argument('--productos', type=int, default=500)
+        parser.add_argument('--checkout', type=float, default=0.2, help='Fracción de carritos que confirman.')
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument('--semilla', type=int, default=0)
+
+    def handle(self, *args, **options):
+        azar = random.Random(options['semilla'])
+        categoria = Categoria.objects.create(nombre='bench-carrito')
+        productos = Producto.objects.bulk_create([
+            Producto(nombre=f'bench-carrito-{i}', precio=Decimal(azar.randint(100, 99999)) / 100, categoria=categoria)
+            for i in range(options['productos'])
+        ])
+        ids = [producto.pk for producto in productos]
+        Stock.objects.bulk_create([Stock(producto_id=pk, cantidad=10 ** 6) for pk in ids])
+        usuario = User.objects.create_user('bench-carrito', password=None)
+
+        churn, consultas_churn, cookies, checkouts, consultas_checkout = [], [], [], [], []
+        try:
+            for _ in range(options['carritos']):
+                cliente = Client(HTTP_HOST=options['host'])
+                cliente.force_login(usuario)
+                en_carrito = []
+                for _ in range(options['operaciones']):
+                    if en_carrito and azar.random() < 0.3:
+                        url = reverse('productos:carrito_quitar', args=[en_carrito.pop(azar.randrange(len(en_carrito)))])
+                    else:
+                        pk = azar.choice(ids)
+                        en_carrito.append(pk)
+                        url = reverse('productos:carrito_agregar', args=[pk])
+                    inicio = time.perf_counter()
+                    with CaptureQueriesContext(connection) as consultas:
+                        cliente.post(url, {'cantidad': 1})
+                    churn.append(time.perf_counter() - inicio)
+                    consultas_churn.append(len(consultas))
+                cookie = cliente.cookies.get(Carrito.COOKIE)
+                if cookie is not None and cookie.value:
+                    cookies.append(len(cookie.value))
+                if en_carrito and azar.random() < options['checkout']:
+                    inicio = time.perf_counter()
+                    with CaptureQueriesContext(connection) as consultas:
+                        cliente.post(reverse('productos:checkout'))
+                    checkouts.append(time.perf_counter() - inicio)
+                    consultas_checkout.append(len(consultas))
+        finally:
+            pedidos = Pedido.objects.filter(usuario=usuario)
+            LineaPedido.objects.filter(pedido__in=pedidos).delete()
+            pedidos.delete()
+            Stock.objects.filter(producto_id__in=ids).delete()
+            Producto.objects.filter(pk__in=ids).delete()
+            categoria.delete()
+            usuario.delete()
+
+        total = sum(churn)
+        self.stdout.write(
+            f'{connection.vendor}: {len(churn)} agregar/quitar en {total:.2f}s ({len(churn) / total:.0f}/s), '
+            f'{statistics.mean(consultas_churn):.2f} consultas por operación'
+        )
+        if cookies:
+            self.stdout.write(f'cookie del carrito: media {statistics.mean(cookies):.0f} B, máx {max(cookies)} B')
+        if checkouts:
+            self.stdout.write(
+                f'{len(checkouts)} pedidos: {statistics.mean(checkouts) * 1000:.1f} ms de media, '
+                f'{statistics.mean(consultas_checkout):.1f} consultas de media'
+            )
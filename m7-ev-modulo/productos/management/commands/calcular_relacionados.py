@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from productos import recomendaciones
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula los productos relacionados (Jaccard sobre etiquetas y categoría) '
+        'y guarda los K mejores de cada producto. Usa NumPy si está instalado.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--k', type=int, default=recomendaciones.K, help='Vecinos por producto.')
+        parser.add_argument('--sin-numpy', action='store_true', help='Fuerza el cálculo en Python.')
+
+    def handle(self, *args, **options):
+        usar_numpy = not options['sin_numpy'] and recomendaciones.HAY_NUMPY
+        inicio = time.perf_counter()
+        total = recomendaciones.reconstruir(k=options['k'], usar_numpy=usar_numpy)
+        self.stdout.write(
+            f'{total} productos en {time.perf_counter() - inicio:.2f}s '
+            f'({"NumPy" if usar_numpy else "Python"})'
+        )
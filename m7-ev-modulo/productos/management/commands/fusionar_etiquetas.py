@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from productos.etiquetas import fusionar_duplicadas, recalcular_usos
+
+
+class Command(BaseCommand):
+    help = (
+        'Fusiona las etiquetas que solo difieren en mayúsculas o espacios. '
+        'Con --recalcular-usos vuelve a contar los productos de cada etiqueta.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recalcular-usos', action='store_true')
+
+    def handle(self, *args, **options):
+        eliminadas = fusionar_duplicadas()
+        self.stdout.write(f'Etiquetas fusionadas: {eliminadas}')
+        if options['recalcular_usos']:
+            recalcular_usos()
+            self.stdout.write('Usos recalculados.')
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError
+
+from productos.inventario import liberar_vencidas
+
+
+class Command(BaseCommand):
+    help = 'Devuelve al stock las reservas vencidas. Con --cada N se queda corriendo y barre cada N segundos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cada', type=int, default=None, help='Segundos entre barridos (modo continuo).')
+        parser.add_argument('--lote', type=int, default=500)
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                liberadas = liberar_vencidas(lote=options['lote'])
+            except OperationalError as exc:
+                # p. ej. "database is locked" en SQLite: se reintenta en el próximo barrido
+                if options['cada'] is None:
+                    raise
+                self.stderr.write(f'Barrido interrumpido: {exc}')
+            else:
+                if liberadas or options['cada'] is None:
+                    self.stdout.write(f'Reservas liberadas: {liberadas}')
+            if options['cada'] is None:
+                return
+            time.sleep(options['cada'])
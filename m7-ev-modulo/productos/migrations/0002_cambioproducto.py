@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CambioProducto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(choices=[('P', 'Producto'), ('D', 'Detalle de Producto')], default='P', max_length=1)),
+                ('fecha_cambio', models.DateTimeField(default=django.utils.timezone.now)),
+                ('mes', models.PositiveIntegerField(db_index=True)),
+                ('precio', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('cambios', models.JSONField(default=dict)),
+                ('producto', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='cambios', to='productos.producto')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['producto', 'fecha_cambio'], name='cambio_producto_fecha_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def asignar_tienda_principal(apps, schema_editor):
+    """Los datos existentes (un despliegue por tienda) pasan a la tienda 'principal'."""
+    Tienda = apps.get_model('productos', 'Tienda')
+    modelos = [apps.get_model('productos', nombre) for nombre in ('Categoria', 'Etiquetas', 'Producto', 'DetalleProducto')]
+    if not any(modelo.objects.exists() for modelo in modelos):
+        return
+    tienda, _ = Tienda.objects.get_or_create(codigo='principal', defaults={'nombre': 'Principal'})
+    for modelo in modelos:
+        modelo.objects.filter(tienda__isnull=True).update(tienda=tienda)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0003_producto_categoria_precio_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tienda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('codigo', models.SlugField(unique=True)),
+                ('nombre', models.CharField(max_length=100)),
+                ('dominio', models.CharField(blank=True, max_length=255, null=True, unique=True)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='producto',
+            name='producto_categoria_precio_idx',
+        ),
+        migrations.AddField(
+            model_name='categoria',
+            name='tienda',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='productos.tienda'),
+        ),
+        migrations.AddField(
+            model_name='detalleproducto',
+            name='tienda',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='productos.tienda'),
+        ),
+        migrations.AddField(
+            model_name='etiquetas',
+            name='tienda',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='productos.tienda'),
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='tienda',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='productos.tienda'),
+        ),
+        migrations.AddIndex(
+            model_name='categoria',
+            index=models.Index(fields=['tienda', 'nombre'], name='categoria_tienda_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='detalleproducto',
+            index=models.Index(fields=['tienda', 'producto'], name='detalle_tienda_producto_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='etiquetas',
+            index=models.Index(fields=['tienda', 'nombre'], name='etiquetas_tienda_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['tienda', 'categoria', 'precio'], name='producto_tienda_cat_precio_idx'),
+        ),
+        migrations.RunPython(asignar_tienda_principal, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+
+
+MODELOS = ('Categoria', 'Etiquetas', 'Producto', 'DetalleProducto', 'Pedido')
+
+
+def _fusionar_etiquetas(apps, tienda):
+    """Las etiquetas sin tienda cuya clave ya existe en `tienda` se fusionan en la existente."""
+    Etiquetas = apps.get_model('productos', 'Etiquetas')
+    Producto = apps.get_model('productos', 'Producto')
+    Asignacion = Producto._meta.get_field('etiquetas').remote_field.through
+    destinos = dict(Etiquetas.objects.filter(tienda=tienda).values_list('clave', 'pk'))
+    fusionadas = set()
+    for etiqueta in Etiquetas.objects.filter(tienda__isnull=True).order_by('pk'):
+        destino = destinos.setdefault(etiqueta.clave, etiqueta.pk)
+        if destino == etiqueta.pk:
+            continue
+        ya_asignados = Asignacion.objects.filter(etiquetas_id=destino).values('producto_id')
+        Asignacion.objects.filter(etiquetas_id=etiqueta.pk).exclude(producto_id__in=ya_asignados).update(etiquetas_id=destino)
+        Asignacion.objects.filter(etiquetas_id=etiqueta.pk).delete()
+        Etiquetas.objects.filter(pk=etiqueta.pk).delete()
+        fusionadas.add(destino)
+    for fila in Asignacion.objects.filter(etiquetas_id__in=fusionadas).values('etiquetas_id').annotate(total=Count('pk')).order_by():
+        Etiquetas.objects.filter(pk=fila['etiquetas_id']).update(usos=fila['total'])
+
+
+def asignar_tienda_principal(apps, schema_editor):
+    """
+    Las filas sin tienda (creadas sin tienda activa) pasan a la tienda
+    'principal', que también se crea en una base sin tiendas: es la
+    TIENDA_POR_DEFECTO de config/settings.py.
+    """
+    Tienda = apps.get_model('productos', 'Tienda')
+    modelos = [apps.get_model('productos', nombre) for nombre in MODELOS]
+    huerfanas = any(modelo.objects.filter(tienda__isnull=True).exists() for modelo in modelos)
+    if not huerfanas and Tienda.objects.exists():
+        return
+    tienda, _ = Tienda.objects.get_or_create(codigo='principal', defaults={'nombre': 'Principal'})
+    if not huerfanas:
+        return
+    # El detalle es de la tienda de su producto, si el producto tiene
+    Producto = apps.get_model('productos', 'Producto')
+    DetalleProducto = apps.get_model('productos', 'DetalleProducto')
+    DetalleProducto.objects.filter(tienda__isnull=True).update(
+        tienda_id=Subquery(Producto.objects.filter(pk=OuterRef('producto_id')).values('tienda_id')),
+    )
+    _fusionar_etiquetas(apps, tienda)
+    for modelo in modelos:
+        modelo.objects.filter(tienda__isnull=True).update(tienda=tienda)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0010_detalle_medidas'),
+    ]
+
+    operations = [
+        migrations.RunPython(asignar_tienda_principal, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='categoria',
+            name='tienda',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, to='productos.tienda'),
+        ),
+        migrations.AlterField(
+            model_name='detalleproducto',
+            name='tienda',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, to='productos.tienda'),
+        ),
+        migrations.AlterField(
+            model_name='etiquetas',
+            name='tienda',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, to='productos.tienda'),
+        ),
+        migrations.AlterField(
+            model_name='pedido',
+            name='tienda',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, to='productos.tienda'),
+        ),
+        migrations.AlterField(
+            model_name='producto',
+            name='tienda',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, to='productos.tienda'),
+        ),
+    ]
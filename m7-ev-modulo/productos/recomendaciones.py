@@ -0,0 +1,231 @@
+# productos/recomendaciones.py
+"""
+Productos relacionados a partir de etiquetas y categoría compartidas.
+
+Cada producto es un conjunto de rasgos (sus etiquetas y su categoría) y la
+similitud entre dos productos es el índice de Jaccard de esos conjuntos.
+Solo se comparan productos que comparten algún rasgo: las intersecciones
+salen de un índice invertido (rasgo -> productos), que con NumPy se cuenta
+por bloques con `bincount` (el producto disperso X·Xᵀ de la matriz de
+incidencia) y sin NumPy con contadores en Python.
+
+Los K mejores vecinos de cada producto se guardan en ProductoRelacionado:
+el comando calcular_relacionados los recalcula todos y, al cambiar las
+etiquetas o la categoría de un producto se encola `refrescar()`, que
+actualiza su lista y la de los productos cuyo puntaje con él cambió.
+"""
+from collections import Counter, defaultdict
+import heapq
+import importlib.util
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_save
+
+from tareas.cola import encolar
+
+from .auditoria import valor_anterior
+from .models import Producto, ProductoRelacionado
+
+# NumPy es opcional (sin él se usa el cálculo en Python) y se importa recién
+# en vecinos_numpy(): este módulo se importa en ready() y numpy sumaría unos
+# 50 ms a cada arranque (rendimiento/importaciones.py)
+HAY_NUMPY = importlib.util.find_spec('numpy') is not None
+
+
+Asignacion = Producto.etiquetas.through
+K = 8
+# Celdas (filas del bloque × productos) que se cuentan a la vez con NumPy
+CELDAS_POR_BLOQUE = 1 << 22
+LOTE_ESCRITURA = 1000
+
+
+def _rasgos(productos):
+    """{producto_id: {rasgos}} de un queryset de productos, en dos consultas."""
+    # Etiquetas y categorías comparten espacio de enteros: pares e impares
+    rasgos = {pk: {categoria_id * 2 + 1} for pk, categoria_id in productos.values_list('pk', 'categoria_id')}
+    asignaciones = Asignacion.objects.filter(producto_id__in=productos.values('pk'))
+    for producto_id, etiqueta_id in asignaciones.values_list('producto_id', 'etiquetas_id'):
+        rasgos[producto_id].add(etiqueta_id * 2)
+    return rasgos
+
+
+def _mejores(puntajes, k):
+    """Los `k` mejores (vecino, puntaje): mayor puntaje primero y, a igual puntaje, menor id."""
+    mejores = heapq.nsmallest(k, ((-puntaje, pk) for pk, puntaje in puntajes.items() if puntaje > 0))
+    return [(pk, -puntaje) for puntaje, pk in mejores]
+
+
+def puntajes_de(rasgos, producto_id, indice=None):
+    """{otro_id: jaccard} de `producto_id` contra los productos de `rasgos` con los que comparte algo."""
+    if indice is None:
+        indice = _indice(rasgos)
+    propios = rasgos[producto_id]
+    comunes = Counter()
+    for rasgo in propios:
+        comunes.update(indice[rasgo])
+    comunes.pop(producto_id, None)
+    return {otro: c / (len(propios) + len(rasgos[otro]) - c) for otro, c in comunes.items()}
+
+
+def _indice(rasgos):
+    indice = defaultdict(list)
+    for pk, propios in rasgos.items():
+        for rasgo in propios:
+            indice[rasgo].append(pk)
+    return indice
+
+
+def vecinos_python(rasgos, k=K):
+    """Genera (producto_id, [(vecino, puntaje), ...]) con contadores en Python."""
+    indice = _indice(rasgos)
+    for pk in rasgos:
+        yield pk, _mejores(puntajes_de(rasgos, pk, indice), k)
+
+
+def vecinos_numpy(rasgos, k=K):
+    """Lo mismo que vecinos_python, contando las intersecciones por bloques con NumPy."""
+    import numpy as np
+
+    # Columnas en orden de id: a igual puntaje gana la de menor índice, como en _mejores
+    ids_lista = sorted(rasgos)
+    ids = np.array(ids_lista, dtype=np.int64)
+    n = len(ids)
+    fila_de = {pk: i for i, pk in enumerate(ids_lista)}
+    por_rasgo = defaultdict(list)
+    for pk, propios in rasgos.items():
+        for rasgo in propios:
+            por_rasgo[rasgo].append(fila_de[pk])
+    por_rasgo = {rasgo: np.array(filas, dtype=np.int64) for rasgo, filas in por_rasgo.items()}
+    tamanos = np.array([len(rasgos[pk]) for pk in ids_lista], dtype=np.float64)
+    kk = min(k, n - 1)
+    if kk <= 0:
+        for pk in ids_lista:
+            yield pk, []
+        return
+    bloque = max(1, CELDAS_POR_BLOQUE // n)
+    # Dos puntajes de Jaccard distintos difieren al menos 1/(2·máx)², así que restar
+    # menos que eso repartido por columna desempata por id sin alterar el orden
+    desempate = np.arange(n) / (n * 2 * (2 * tamanos.max()) ** 2)
+    for desde in range(0, n, bloque):
+        hasta = min(desde + bloque, n)
+        celdas = []
+        for fila in range(desde, hasta):
+            base = (fila - desde) * n
+            celdas.extend(por_rasgo[rasgo] + base for rasgo in rasgos[ids_lista[fila]])
+        interseccion = np.bincount(np.concatenate(celdas), minlength=(hasta - desde) * n)
+        interseccion = interseccion.reshape(hasta - desde, n).astype(np.float64)
+        union = tamanos[desde:hasta, None] + tamanos[None, :] - interseccion
+        jaccard = np.divide(interseccion, union, out=np.zeros_like(interseccion), where=interseccion > 0)
+        jaccard[np.arange(hasta - desde), np.arange(desde, hasta)] = 0
+        # Top-k de todo el bloque de una vez, ordenado por puntaje desc e id asc
+        clave = desempate - jaccard
+        columnas = np.argpartition(clave, kk - 1, axis=1)[:, :kk]
+        columnas = np.take_along_axis(columnas, np.argsort(np.take_along_axis(clave, columnas, axis=1), axis=1), axis=1)
+        puntajes = np.take_along_axis(jaccard, columnas, axis=1).tolist()
+        vecinos = ids[columnas].tolist()
+        for fila in range(hasta - desde):
+            yield ids_lista[desde + fila], [
+                (vecino, puntaje) for vecino, puntaje in zip(vecinos[fila], puntajes[fila]) if puntaje > 0
+            ]
+
+
+def _guardar(listas):
+    """Reemplaza las listas de vecinos de `listas` ({producto_id: [(vecino, puntaje), ...]})."""
+    with transaction.atomic():
+        ProductoRelacionado.objects.filter(producto_id__in=list(listas)).delete()
+        ProductoRelacionado.objects.bulk_create([
+            ProductoRelacionado(producto_id=pk, relacionado_id=vecino, puntaje=puntaje, posicion=posicion)
+            for pk, vecinos in listas.items()
+            for posicion, (vecino, puntaje) in enumerate(vecinos)
+        ], batch_size=LOTE_ESCRITURA)
+
+
+def reconstruir(k=K, usar_numpy=True):
+    """Recalcula los vecinos de todos los productos, tienda por tienda. Devuelve cuántos productos procesó."""
+    calcular = vecinos_numpy if usar_numpy and HAY_NUMPY else vecinos_python
+    tiendas = Producto.todas_las_tiendas.values_list('tienda_id', flat=True).distinct()
+    total = 0
+    for tienda_id in list(tiendas):
+        rasgos = _rasgos(Producto.todas_las_tiendas.filter(tienda_id=tienda_id))
+        pendientes = {}
+        for pk, vecinos in calcular(rasgos, k):
+            pendientes[pk] = vecinos
+            if len(pendientes) >= LOTE_ESCRITURA:
+                _guardar(pendientes)
+                pendientes = {}
+        _guardar(pendientes)
+        total += len(rasgos)
+    return total
+
+
+def refrescar(producto_id, k=K):
+    """
+    Recalcula los vecinos de un producto y corrige, en las listas de los demás,
+    su puntaje con él. Si el producto sale de una lista completa, esa lista
+    queda con un vecino menos hasta la próxima reconstrucción.
+    """
+    producto = Producto.todas_las_tiendas.filter(pk=producto_id).values('tienda_id', 'categoria_id').first()
+    if producto is None:
+        return
+    etiquetas = Asignacion.objects.filter(producto_id=producto_id).values('etiquetas_id')
+    candidatos = Producto.todas_las_tiendas.filter(tienda_id=producto['tienda_id']).filter(
+        Q(pk=producto_id)
+        | Q(categoria_id=producto['categoria_id'])
+        | Q(pk__in=Asignacion.objects.filter(etiquetas_id__in=etiquetas).values('producto_id'))
+    )
+    rasgos = _rasgos(candidatos)
+    puntajes = puntajes_de(rasgos, producto_id)
+    actuales = defaultdict(list)
+    afectados = set(puntajes) | set(
+        ProductoRelacionado.objects.filter(relacionado_id=producto_id).values_list('producto_id', flat=True)
+    )
+    for pk, vecino, puntaje in (
+        ProductoRelacionado.objects.filter(producto_id__in=afectados)
+        .order_by('producto_id', 'posicion').values_list('producto_id', 'relacionado_id', 'puntaje')
+    ):
+        actuales[pk].append((vecino, puntaje))
+    listas = {producto_id: _mejores(puntajes, k)}
+    for pk in afectados:
+        # Jaccard es simétrico: el puntaje de pk con el producto es el mismo
+        vecinos = {vecino: puntaje for vecino, puntaje in actuales[pk] if vecino != producto_id}
+        if puntajes.get(pk):
+            vecinos[producto_id] = puntajes[pk]
+        nueva = _mejores(vecinos, k)
+        if nueva != actuales[pk]:
+            listas[pk] = nueva
+    _guardar(listas)
+
+
+def relacionados(producto, k=K):
+    """Productos relacionados precalculados, en una consulta por el índice (producto, posicion)."""
+    return [
+        fila.relacionado for fila in
+        ProductoRelacionado.objects.filter(producto=producto).select_related('relacionado').order_by('posicion')[:k]
+    ]
+
+
+def _encolar_refresco(*producto_ids):
+    # Fuera del request: lo ejecuta el worker (tareas), y solo si la transacción se confirma
+    for producto_id in producto_ids:
+        encolar(refrescar, producto_id)
+
+
+def _etiquetas_cambiadas(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        _encolar_refresco(instance.pk)
+    elif pk_set:
+        _encolar_refresco(*pk_set)
+
+
+def _producto_guardado(sender, instance, created, **kwargs):
+    anterior = valor_anterior(instance, 'categoria_id')
+    if created or anterior != instance.categoria_id:
+        _encolar_refresco(instance.pk)
+
+
+def conectar_senales():
+    m2m_changed.connect(_etiquetas_cambiadas, sender=Asignacion, dispatch_uid='recomendaciones_etiquetas')
+    post_save.connect(_producto_guardado, sender=Producto, dispatch_uid='recomendaciones_producto')
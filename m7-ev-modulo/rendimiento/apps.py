@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class RendimientoConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'rendimiento'
+
+    def ready(self):
+        from django.core import checks
+        from . import consultas_lentas, metricas
+        from .perfiles import revisar
+        checks.register(revisar, 'rendimiento', deploy=True)
+        metricas.instrumentar()
+        consultas_lentas.conectar()
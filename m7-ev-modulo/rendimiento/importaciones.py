@@ -0,0 +1,120 @@
+# rendimiento/importaciones.py
+"""
+Costo de importar el proyecto.
+
+Cada `manage.py` (y cada worker de WSGI al arrancar) importa settings, todas
+las apps con sus modelos y, en el primer request, el urlconf con todas las
+vistas. Lo que un módulo importa arriba del archivo se paga en cada arranque
+aunque el comando o el request nunca lo use.
+
+`medir()` corre `python -X importtime` en un proceso aparte con los mismos
+settings y devuelve, por módulo, el tiempo propio y el acumulado (con lo que
+importa) en microsegundos. Lo usan los comandos perfil_importaciones y
+bench_arranque.
+
+Lo que aparece caro y solo usan unas pocas funciones se importa dentro de
+esas funciones (`import numpy as np` en el cuerpo), no arriba del módulo.
+"""
+from dataclasses import dataclass
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+
+# Lo que se importa en cada objetivo, con django.setup() ya hecho
+OBJETIVOS = {
+    # manage.py antes de correr un comando: settings, apps y modelos
+    'setup': '',
+    # Lo que además necesita el primer request: el urlconf con todas las vistas
+    'urls': 'import_module(settings.ROOT_URLCONF)',
+    # Lo mismo que hace el servidor al cargar el worker
+    'wsgi': 'from django.core.wsgi import get_wsgi_application; get_wsgi_application()',
+}
+# -X importtime solo registra las importaciones con `import`, no las de
+# importlib.import_module(), que es como Django carga apps, modelos y urls.
+# En el proceso que mide, import_module pasa por __import__ para que salgan.
+PREAMBULO = '''
+import importlib, importlib.util, sys
+def import_module(nombre, package=None):
+    nombre = importlib.util.resolve_name(nombre, package) if nombre.startswith('.') else nombre
+    __import__(nombre)
+    return sys.modules[nombre]
+importlib.import_module = import_module
+import django
+django.setup()
+from django.conf import settings
+'''
+
+
+@dataclass
+class Importacion:
+    modulo: str
+    propio: int  # microsegundos
+    acumulado: int  # microsegundos
+    profundidad: int
+
+    @property
+    def paquete(self):
+        return self.modulo.partition('.')[0]
+
+
+def leer_importtime(texto):
+    """[Importacion] de la salida de `python -X importtime` (va por stderr)."""
+    importaciones = []
+    for linea in texto.splitlines():
+        if not linea.startswith('import time:'):
+            continue
+        propio, acumulado, nombre = linea[len('import time:'):].split('|')
+        if not propio.strip().isdigit():
+            continue  # encabezado
+        sangria = len(nombre) - len(nombre.lstrip()) - 1
+        importaciones.append(Importacion(nombre.strip(), int(propio), int(acumulado), sangria // 2))
+    return importaciones
+
+
+def medir(objetivo='urls', settings_module=None, directorio=None):
+    """Importa el proyecto en un proceso nuevo con -X importtime y devuelve [Importacion]."""
+    from django.conf import settings
+
+    codigo = PREAMBULO + OBJETIVOS[objetivo]
+    entorno = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings_module or settings.SETTINGS_MODULE}
+    proceso = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', codigo],
+        cwd=directorio or settings.BASE_DIR, env=entorno, capture_output=True, text=True,
+    )
+    if proceso.returncode != 0:
+        raise RuntimeError(proceso.stderr.strip().splitlines()[-1])
+    return leer_importtime(proceso.stderr)
+
+
+def apps_del_proyecto():
+    """AppConfigs de las apps que viven en BASE_DIR (no las de Django ni las de terceros)."""
+    from django.apps import apps
+    from django.conf import settings
+
+    base = Path(settings.BASE_DIR).resolve()
+    return [c for c in apps.get_app_configs() if Path(c.path).resolve().is_relative_to(base)]
+
+
+def hijos(importaciones):
+    """{módulo: [Importacion que importó primero]}. importtime lista cada hijo antes que su padre."""
+    arbol, pendientes = {}, {}
+    for importacion in importaciones:
+        arbol[importacion.modulo] = pendientes.pop(importacion.profundidad + 1, [])
+        pendientes.setdefault(importacion.profundidad, []).append(importacion)
+    return arbol
+
+
+def por_paquete(importaciones):
+    """{paquete: microsegundos} sumando el tiempo propio de sus módulos, de mayor a menor."""
+    totales = {}
+    for importacion in importaciones:
+        totales[importacion.paquete] = totales.get(importacion.paquete, 0) + importacion.propio
+    return dict(sorted(totales.items(), key=lambda par: par[1], reverse=True))
+
+
+def de_la_app(importaciones, app):
+    """Los módulos de `app`, del más caro al más barato por tiempo acumulado."""
+    modulos = [i for i in importaciones if i.paquete == app]
+    return sorted(modulos, key=lambda i: i.acumulado, reverse=True)
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from rendimiento.perfiles import problemas
+
+
+class Command(BaseCommand):
+    help = (
+        'Revisa los settings cargados y lista lo que cuesta rendimiento (DEBUG, conexiones no '
+        'persistentes, caché por proceso, plantillas sin caché, ...). Con --estricto termina '
+        'con error si encuentra algo, para usarlo antes de levantar los workers.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--estricto', action='store_true')
+
+    def handle(self, *args, **options):
+        perfil = getattr(settings, 'PERFIL', 'dev')
+        encontrados = problemas()
+        self.stdout.write(f'Perfil {perfil}: {len(encontrados)} problema(s)')
+        for codigo, mensaje in encontrados:
+            self.stdout.write(f'  {codigo} {mensaje}')
+        if encontrados and options['estricto']:
+            raise CommandError(f'{len(encontrados)} problema(s) de rendimiento en el perfil {perfil}')
@@ -0,0 +1,18 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.shortcuts import redirect, render
+from django.views.decorators.cache import never_cache
+
+from . import consultas_lentas as lentas
+
+
+@never_cache
+@staff_member_required
+def consultas_lentas(request):
+    """Las consultas lentas registradas, agrupadas por forma, con su plan y alertas. POST vacía el buffer."""
+    if request.method == 'POST':
+        lentas.vaciar()
+        return redirect('rendimiento:consultas_lentas')
+    return render(request, 'rendimiento/consultas_lentas.html', {
+        'grupos': lentas.resumen(),
+        'umbral': lentas.configuracion()['UMBRAL_MS'],
+    })
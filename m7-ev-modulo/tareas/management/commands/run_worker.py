@@ -0,0 +1,40 @@
+import multiprocessing
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from tareas import trabajador
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta las tareas encoladas con tareas.cola.encolar(). Cada proceso corre '
+        '--hilos hilos que toman lotes de --lote tareas. Con --una-vez termina al vaciar la cola.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=4)
+        parser.add_argument('--procesos', type=int, default=1)
+        parser.add_argument('--lote', type=int, default=10, help='Tareas que toma cada hilo por vuelta.')
+        parser.add_argument('--espera', type=float, default=1.0, help='Segundos entre consultas con la cola vacía.')
+        parser.add_argument('--una-vez', action='store_true')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            raise CommandError('Con SQLite en memoria cada hilo vería una base distinta; usa un archivo.')
+        argumentos = (options['hilos'], options['lote'], options['espera'], options['una_vez'])
+        if options['procesos'] <= 1:
+            trabajador.correr(*argumentos)
+            return
+        # spawn funciona igual en Linux y Windows; los hijos no heredan conexiones abiertas
+        connections.close_all()
+        contexto = multiprocessing.get_context('spawn')
+        procesos = [contexto.Process(target=trabajador.proceso, args=argumentos) for _ in range(options['procesos'])]
+        for proceso in procesos:
+            proceso.start()
+        try:
+            for proceso in procesos:
+                proceso.join()
+        except KeyboardInterrupt:
+            for proceso in procesos:
+                proceso.join()
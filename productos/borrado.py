@@ -0,0 +1,65 @@
+# productos/borrado.py
+"""
+Borrado de productos sin pasar por el Collector de Django.
+
+`Model.delete()` carga en memoria cada fila dependiente antes de borrarla.
+Aquí los dependientes se cuentan con subconsultas (para la página de
+confirmación) y se borran con `rendimiento.lotes.borrar_en_lotes()`, de las
+hojas hacia la raíz, cada lote en su propia transacción. El producto se
+borra al final: si el borrado falla a mitad de camino, el producto sigue en
+el catálogo y volver a borrarlo termina lo que faltaba.
+
+Ojo: al ser SQL directo no se emiten las señales pre_delete/post_delete;
+las estadísticas y las versiones de los ETags se actualizan a mano.
+"""
+from django.db import transaction
+from django.db.models import Func, OuterRef, Q, Subquery
+
+from rendimiento.lotes import TAMANO_LOTE, borrar_en_lotes
+from rendimiento.versiones import tocar
+
+from .models import Producto, DetalleProducto, Stock, Reserva, ProductoRelacionado
+from .estadisticas import invalidar_estadisticas
+from .etiquetas import descontar_usos
+
+
+Asignacion = Producto.etiquetas.through
+
+
+def _contar(queryset):
+    """Subconsulta con la cantidad de filas de `queryset`."""
+    # COUNT como Func y no como Count(): un agregado le agregaría un GROUP BY por fila
+    total = Func('pk', function='COUNT')
+    return Subquery(queryset.order_by().annotate(total=total).values('total'))
+
+
+def _relacionados(producto_id):
+    return ProductoRelacionado.objects.filter(Q(producto_id=producto_id) | Q(relacionado_id=producto_id))
+
+
+def resumen_borrado(producto):
+    """Cantidad de filas que arrastra el borrado de `producto`, en una sola consulta."""
+    # Subconsultas y no JOINs: juntar reservas, relacionados y etiquetas multiplicaría las filas
+    return Producto.objects.filter(pk=producto.pk).values(
+        total_detalles=_contar(DetalleProducto.objects.filter(producto_id=OuterRef('pk'))),
+        total_etiquetas=_contar(Asignacion.objects.filter(producto_id=OuterRef('pk'))),
+        total_stock=_contar(Stock.objects.filter(producto_id=OuterRef('pk'))),
+        total_reservas=_contar(Reserva.objects.filter(producto_id=OuterRef('pk'))),
+        total_relacionados=_contar(_relacionados(OuterRef('pk'))),
+    ).get()
+
+
+def borrar_producto(producto, tamano_lote=TAMANO_LOTE):
+    """Borra `producto` y sus dependientes en orden: etiquetas asignadas, detalle, stock, reservas, relacionados y producto."""
+    # Descontar los usos y borrar las asignaciones van juntos: repetir el paso no descuenta dos veces
+    with transaction.atomic():
+        descontar_usos([producto.pk])
+        borrar_en_lotes(Asignacion.objects.filter(producto_id=producto.pk), tamano_lote)
+    borrar_en_lotes(DetalleProducto.objects.filter(producto_id=producto.pk), tamano_lote)
+    borrar_en_lotes(Stock.objects.filter(producto_id=producto.pk), tamano_lote)
+    borrar_en_lotes(Reserva.objects.filter(producto_id=producto.pk), tamano_lote)
+    borrar_en_lotes(_relacionados(producto.pk), tamano_lote)
+    borrar_en_lotes(Producto.objects.filter(pk=producto.pk), tamano_lote)
+    # El SQL directo no emite post_delete
+    invalidar_estadisticas(producto.tienda_id, producto.categoria_id)
+    tocar(Producto, DetalleProducto, Stock)
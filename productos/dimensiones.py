@@ -0,0 +1,47 @@
+# productos/dimensiones.py
+"""
+Lectura de las dimensiones escritas a mano en DetalleProducto.dimensiones.
+
+Acepta textos como "35x25x2cm", "35 x 25 x 2 cm", "350×250×20 mm",
+"1,2 x 0,5 x 0,3 m" o "35cm x 25cm x 2cm". Devuelve las tres medidas en
+centímetros ordenadas de mayor a menor (largo >= ancho >= alto), así que
+"¿entra en una caja de AxBxC?" es comparar medida a medida con la caja
+también ordenada. Sin unidad se asume cm.
+"""
+from decimal import Decimal, InvalidOperation
+import re
+
+
+_NUMERO = r'(\d+(?:[.,]\d+)?)'
+_UNIDAD = r'(mm|cm|m)?'
+_POR = r'\s*[x×*]\s*'
+_PATRON = re.compile(
+    rf'^\s*{_NUMERO}\s*{_UNIDAD}{_POR}{_NUMERO}\s*{_UNIDAD}{_POR}{_NUMERO}\s*{_UNIDAD}\s*$',
+    re.IGNORECASE,
+)
+_A_CM = {'mm': Decimal('0.1'), 'cm': Decimal('1'), 'm': Decimal('100')}
+CENTESIMOS = Decimal('0.01')
+# DecimalField(max_digits=8, decimal_places=2)
+MAXIMO = Decimal('999999.99')
+
+
+def parsear_dimensiones(texto):
+    """(largo, ancho, alto) en cm como Decimal, o None si el texto no se entiende."""
+    coincidencia = _PATRON.match(texto or '')
+    if not coincidencia:
+        return None
+    grupos = coincidencia.groups()
+    numeros, unidades = grupos[0::2], grupos[1::2]
+    # Una sola unidad al final vale para las tres medidas
+    unidad_comun = (unidades[-1] or 'cm').lower()
+    medidas = []
+    for numero, unidad in zip(numeros, unidades):
+        try:
+            valor = Decimal(numero.replace(',', '.')) * _A_CM[(unidad or unidad_comun).lower()]
+        except InvalidOperation:
+            return None
+        valor = valor.quantize(CENTESIMOS)
+        if valor > MAXIMO:
+            return None
+        medidas.append(valor)
+    return tuple(sorted(medidas, reverse=True))
@@ -0,0 +1,122 @@
+# productos/inventario.py
+"""
+Stock y reservas de productos.
+
+Reservar descuenta el stock con un UPDATE condicional
+(`UPDATE ... SET cantidad = cantidad - n WHERE producto_id = ? AND cantidad >= n`):
+la comprobación y el descuento son una sola sentencia, así que dos compras
+simultáneas del mismo producto no pueden vender la misma unidad, y no hace
+falta bloquear la fila antes de leerla. Las reservas que no se confirman a
+tiempo devuelven su stock con `liberar_vencidas()` (comando liberar_reservas).
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from rendimiento.versiones import tocar
+
+from .models import Stock, Reserva
+
+
+MINUTOS_RESERVA = 15
+
+
+class StockInsuficiente(Exception):
+    """No hay unidades suficientes para la reserva pedida."""
+
+
+def disponible(producto_id):
+    """Unidades disponibles de un producto (0 si no tiene stock registrado)."""
+    return Stock.objects.filter(producto_id=producto_id).values_list('cantidad', flat=True).first() or 0
+
+
+def reponer(producto_id, cantidad):
+    """Suma `cantidad` unidades al stock del producto, creándolo si no existe."""
+    stock = Stock.objects.filter(producto_id=producto_id)
+    if not stock.update(cantidad=F('cantidad') + cantidad):
+        # Primera reposición: otro proceso puede estar creando la misma fila. get_or_create
+        # resuelve esa carrera (IntegrityError -> get) y la suma sigue siendo un UPDATE
+        Stock.objects.get_or_create(producto_id=producto_id)
+        stock.update(cantidad=F('cantidad') + cantidad)
+    tocar(Stock)
+
+
+def descontar(producto_id, cantidad):
+    """Descuenta `cantidad` unidades en una sola sentencia. Lanza StockInsuficiente si no alcanzan."""
+    if cantidad <= 0:
+        raise ValueError('La cantidad a descontar debe ser positiva')
+    descontado = Stock.objects.filter(producto_id=producto_id, cantidad__gte=cantidad).update(
+        cantidad=F('cantidad') - cantidad
+    )
+    if not descontado:
+        raise StockInsuficiente(f'Stock insuficiente para el producto {producto_id}')
+    tocar(Stock)
+
+
+def reservar(producto_id, cantidad, minutos=MINUTOS_RESERVA):
+    """
+    Aparta `cantidad` unidades del producto durante `minutos`.
+    Lanza StockInsuficiente si no alcanzan.
+    """
+    ahora = timezone.now()
+    with transaction.atomic():
+        descontar(producto_id, cantidad)
+        return Reserva.objects.create(
+            producto_id=producto_id, cantidad=cantidad,
+            creada_en=ahora, expira_en=ahora + timedelta(minutes=minutos),
+        )
+
+
+def confirmar_reserva(reserva):
+    """Marca la reserva como vendida. Devuelve False si ya no estaba activa (p. ej. venció)."""
+    return bool(Reserva.objects.filter(pk=reserva.pk, estado=Reserva.ACTIVA).update(estado=Reserva.CONFIRMADA))
+
+
+def liberar_reserva(reserva):
+    """Devuelve al stock las unidades de una reserva activa. Devuelve False si no estaba activa."""
+    with transaction.atomic():
+        # El cambio de estado condicional garantiza que solo se devuelva una vez
+        if not Reserva.objects.filter(pk=reserva.pk, estado=Reserva.ACTIVA).update(estado=Reserva.LIBERADA):
+            return False
+        Stock.objects.filter(producto_id=reserva.producto_id).update(cantidad=F('cantidad') + reserva.cantidad)
+        tocar(Stock)
+    return True
+
+
+def liberar_vencidas(ahora=None, lote=500):
+    """
+    Libera las reservas activas vencidas, por lotes. Devuelve cuántas se liberaron.
+
+    Cada lote son dos sentencias, sin importar cuántas reservas traiga: un
+    UPDATE del stock que suma, por producto, las reservas del lote que
+    siguen activas, y otro que las marca liberadas. Las dos van en la misma
+    transacción con las filas bloqueadas (o, en SQLite, con la base tomada
+    para escribir desde la primera), así que una reserva confirmada
+    entretanto no devuelve su stock.
+    """
+    ahora = ahora or timezone.now()
+    total = 0
+    while True:
+        with transaction.atomic():
+            # skip_locked: varios barredores en paralelo no se esperan entre sí (se ignora en SQLite)
+            vencidas = list(
+                Reserva.objects.select_for_update(skip_locked=True)
+                .filter(estado=Reserva.ACTIVA, expira_en__lte=ahora)
+                .order_by('expira_en')
+                .values_list('pk', 'producto_id')[:lote]
+            )
+            if not vencidas:
+                return total
+            activas = Reserva.objects.filter(pk__in=[pk for pk, _ in vencidas], estado=Reserva.ACTIVA)
+            por_producto = (
+                activas.filter(producto_id=OuterRef('producto_id'))
+                .values('producto_id').annotate(total=Sum('cantidad')).values('total')
+            )
+            Stock.objects.filter(producto_id__in={producto_id for _, producto_id in vencidas}).update(
+                cantidad=F('cantidad') + Coalesce(Subquery(por_producto), 0)
+            )
+            total += activas.update(estado=Reserva.LIBERADA)
+            tocar(Stock)
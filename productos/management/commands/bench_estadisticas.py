@@ -0,0 +1,74 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from productos.models import Producto, Categoria, Etiquetas
+from productos.estadisticas import RANGOS_PRECIO, calcular_estadisticas
+from productos.etiquetas import normalizar
+
+
+def estadisticas_en_python(categoria_id):
+    """Versión ingenua (recorre todos los productos en Python), solo para comparar."""
+    precios = []
+    histograma = [0] * len(RANGOS_PRECIO)
+    for precio in Producto.objects.filter(categoria_id=categoria_id).values_list('precio', flat=True).iterator():
+        precios.append(precio)
+        tramo = sum(1 for limite in RANGOS_PRECIO if precio >= limite) - 1
+        histograma[tramo] += 1
+    return {
+        'total': len(precios),
+        'precio_min': min(precios, default=None),
+        'precio_max': max(precios, default=None),
+        'precio_promedio': sum(precios) / len(precios) if precios else None,
+        'histograma': histograma,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara las estadísticas por categoría calculadas en la base de datos contra '
+        'recorrerlas en Python. Los datos se crean dentro de una transacción que se revierte.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--productos', type=int, default=1_000_000)
+        parser.add_argument('--lote', type=int, default=10_000)
+        parser.add_argument('--sin-python', action='store_true', help='No medir la versión en Python.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._medir(options)
+            transaction.set_rollback(True)
+
+    def _medir(self, options):
+        rng = random.Random(7)
+        categoria = Categoria.objects.create(nombre='bench')
+        # bulk_create no pasa por save(): la clave única (tienda, clave) se calcula aquí
+        etiquetas = Etiquetas.objects.bulk_create([
+            Etiquetas(nombre=nombre, clave=clave) for nombre, clave in (normalizar(f'bench-{i}') for i in range(20))
+        ])
+
+        inicio = time.perf_counter()
+        total = options['productos']
+        through = Producto.etiquetas.through
+        for desde in range(0, total, options['lote']):
+            productos = Producto.objects.bulk_create([
+                Producto(nombre=f'bench {i}', precio=Decimal(rng.randint(100, 500_000)) / 100, categoria=categoria)
+                for i in range(desde, min(desde + options['lote'], total))
+            ])
+            through.objects.bulk_create([
+                through(producto_id=p.pk, etiquetas_id=rng.choice(etiquetas).pk) for p in productos
+            ])
+        self.stdout.write(f'Carga de {total} productos: {time.perf_counter() - inicio:.1f}s')
+
+        inicio = time.perf_counter()
+        calcular_estadisticas(categoria.pk)
+        self.stdout.write(f'aggregate/annotate en la base de datos: {(time.perf_counter() - inicio) * 1000:.1f} ms')
+
+        if not options['sin_python']:
+            inicio = time.perf_counter()
+            estadisticas_en_python(categoria.pk)
+            self.stdout.write(f'Recorrido en Python: {(time.perf_counter() - inicio) * 1000:.1f} ms')
@@ -0,0 +1,75 @@
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, OperationalError
+
+from productos.models import Producto, Categoria, Stock, Reserva
+from productos.inventario import StockInsuficiente, reservar
+
+
+class Command(BaseCommand):
+    help = (
+        'Contención de reservas: N hilos reservan a la vez el mismo producto y se '
+        'comprueba que no se venda más de lo que hay. Usa la base de datos configurada '
+        '(SQLite en archivo o MySQL; no sirve con SQLite en memoria) y borra lo que crea.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=32)
+        parser.add_argument('--intentos', type=int, default=100, help='Reservas que intenta cada hilo.')
+        parser.add_argument('--stock', type=int, default=1000)
+        parser.add_argument('--cantidad', type=int, default=1, help='Unidades por reserva.')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            raise CommandError('Con SQLite en memoria cada hilo vería una base distinta; usa un archivo.')
+
+        categoria = Categoria.objects.create(nombre='bench-reservas')
+        producto = Producto.objects.create(nombre='bench-reservas', precio=Decimal('1.00'), categoria=categoria)
+        Stock.objects.create(producto=producto, cantidad=options['stock'])
+        resultados = {'ok': 0, 'sin_stock': 0, 'bloqueos': 0}
+        candado = threading.Lock()
+
+        def trabajar():
+            locales = {'ok': 0, 'sin_stock': 0, 'bloqueos': 0}
+            try:
+                for _ in range(options['intentos']):
+                    try:
+                        reservar(producto.pk, options['cantidad'])
+                        locales['ok'] += 1
+                    except StockInsuficiente:
+                        locales['sin_stock'] += 1
+                    except OperationalError:
+                        locales['bloqueos'] += 1
+            finally:
+                connections.close_all()
+            with candado:
+                for clave, valor in locales.items():
+                    resultados[clave] += valor
+
+        hilos = [threading.Thread(target=trabajar) for _ in range(options['hilos'])]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        duracion = time.perf_counter() - inicio
+
+        restante = Stock.objects.get(producto=producto).cantidad
+        reservado = Reserva.objects.filter(producto=producto).count() * options['cantidad']
+        intentos = options['hilos'] * options['intentos']
+        self.stdout.write(
+            f'{connection.vendor}: {intentos} intentos en {duracion:.2f}s ({intentos / duracion:.0f}/s); '
+            f"ok={resultados['ok']} sin_stock={resultados['sin_stock']} bloqueos={resultados['bloqueos']}; "
+            f'stock restante={restante}'
+        )
+        Reserva.objects.filter(producto=producto).delete()
+        Stock.objects.filter(producto=producto).delete()
+        producto.delete()
+        categoria.delete()
+
+        if restante + reservado != options['stock'] or restante < 0:
+            raise CommandError(f'Sobreventa: stock inicial {options["stock"]}, reservado {reservado}, restante {restante}')
+        self.stdout.write(self.style.SUCCESS('Sin sobreventa.'))
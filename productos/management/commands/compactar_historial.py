@@ -0,0 +1,90 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from productos.models import CambioProducto
+
+
+def _mes_menos(mes, meses):
+    """Resta `meses` a un mes en formato AAAAMM."""
+    indice = (mes // 100) * 12 + (mes % 100 - 1) - meses
+    return (indice // 12) * 100 + indice % 12 + 1
+
+
+def compactar(filas):
+    """
+    Fusiona `filas` (ordenadas por fecha) en una sola fila por (producto, modelo):
+    los campos posteriores pisan a los anteriores y se conserva la última fecha
+    y el último precio registrado.
+    """
+    fusionadas = {}
+    for fila in filas:
+        clave = (fila.producto_id, fila.modelo)
+        actual = fusionadas.get(clave)
+        if actual is None:
+            fusionadas[clave] = CambioProducto(
+                producto_id=fila.producto_id, modelo=fila.modelo, fecha_cambio=fila.fecha_cambio,
+                mes=fila.mes, precio=fila.precio, cambios=dict(fila.cambios),
+            )
+            continue
+        actual.cambios.update(fila.cambios)
+        actual.fecha_cambio = fila.fecha_cambio
+        actual.mes = fila.mes
+        if fila.precio is not None:
+            actual.precio = fila.precio
+    return list(fusionadas.values())
+
+
+class Command(BaseCommand):
+    help = (
+        'Compacta el historial de CambioProducto: deja una fila por producto y mes '
+        'en los meses cerrados y, con --retener-meses, resume todo lo anterior en una '
+        'sola fila base por producto.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--compactar-despues', type=int, default=3,
+                            help='Meses completos que se conservan sin compactar (por defecto 3).')
+        parser.add_argument('--retener-meses', type=int, default=None,
+                            help='Meses de detalle mensual a conservar; lo anterior se resume.')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        hoy = timezone.now()
+        mes_actual = hoy.year * 100 + hoy.month
+        limite_compactar = _mes_menos(mes_actual, options['compactar_despues'])
+        chunk_size = options['chunk_size']
+
+        if options['retener_meses'] is not None:
+            limite_retener = _mes_menos(mes_actual, options['retener_meses'])
+            antes = self._reescribir(CambioProducto.objects.filter(mes__lt=limite_retener), chunk_size)
+            self.stdout.write(f'Anteriores a {limite_retener}: {antes[0]} filas -> {antes[1]}')
+
+        meses = (
+            CambioProducto.objects.filter(mes__lt=limite_compactar)
+            .values_list('mes', flat=True).distinct().order_by('mes')
+        )
+        for mes in list(meses):
+            leidas, escritas = self._reescribir(CambioProducto.objects.filter(mes=mes), chunk_size)
+            if leidas != escritas:
+                self.stdout.write(f'{mes}: {leidas} filas -> {escritas}')
+        self.stdout.write(self.style.SUCCESS('Historial compactado.'))
+
+    def _reescribir(self, queryset, chunk_size):
+        """Reemplaza las filas de `queryset` por su versión compactada en una transacción."""
+        with transaction.atomic():
+            filas = queryset.order_by('fecha_cambio', 'pk').iterator(chunk_size=chunk_size)
+            leidas = 0
+
+            def contar(iterable):
+                nonlocal leidas
+                for fila in iterable:
+                    leidas += 1
+                    yield fila
+
+            compactadas = compactar(contar(filas))
+            if leidas == len(compactadas):
+                return leidas, leidas
+            queryset.delete()
+            CambioProducto.objects.bulk_create(compactadas, batch_size=chunk_size)
+        return leidas, len(compactadas)
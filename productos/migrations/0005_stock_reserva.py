@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:09
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0004_tiendas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Stock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad', models.PositiveIntegerField(default=0)),
+                ('producto', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stock', to='productos.producto')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Reserva',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad', models.PositiveIntegerField()),
+                ('creada_en', models.DateTimeField(default=django.utils.timezone.now)),
+                ('expira_en', models.DateTimeField()),
+                ('estado', models.CharField(choices=[('A', 'Activa'), ('C', 'Confirmada'), ('L', 'Liberada')], default='A', max_length=1)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservas', to='productos.producto')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['estado', 'expira_en'], name='reserva_estado_expira_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, Concat
+
+
+def rutas_iniciales(apps, schema_editor):
+    """Las categorías existentes son todas raíces: su ruta es su propio id."""
+    Categoria = apps.get_model('productos', 'Categoria')
+    Categoria.objects.update(ruta=Concat(Cast('id', CharField()), Value('/')), profundidad=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0006_pedidos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='categoria',
+            name='padre',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='hijas', to='productos.categoria'),
+        ),
+        migrations.AddField(
+            model_name='categoria',
+            name='profundidad',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='categoria',
+            name='ruta',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='categoria',
+            index=models.Index(fields=['ruta'], name='categoria_ruta_idx'),
+        ),
+        migrations.RunPython(rutas_iniciales, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:02
+
+import unicodedata
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def normalizar_y_fusionar(apps, schema_editor):
+    """Normaliza los nombres, fusiona las etiquetas repetidas y cuenta sus usos."""
+    Etiquetas = apps.get_model('productos', 'Etiquetas')
+    Producto = apps.get_model('productos', 'Producto')
+    Asignacion = Producto._meta.get_field('etiquetas').remote_field.through
+    destinos = {}
+    for etiqueta in Etiquetas.objects.order_by('pk'):
+        nombre = ' '.join(unicodedata.normalize('NFKC', etiqueta.nombre or '').split())[:50]
+        clave = nombre.casefold()[:50]
+        destino = destinos.setdefault((etiqueta.tienda_id, clave), etiqueta.pk)
+        if destino == etiqueta.pk:
+            Etiquetas.objects.filter(pk=etiqueta.pk).update(nombre=nombre, clave=clave)
+            continue
+        ya_asignados = Asignacion.objects.filter(etiquetas_id=destino).values('producto_id')
+        Asignacion.objects.filter(etiquetas_id=etiqueta.pk).exclude(producto_id__in=ya_asignados).update(etiquetas_id=destino)
+        Asignacion.objects.filter(etiquetas_id=etiqueta.pk).delete()
+        Etiquetas.objects.filter(pk=etiqueta.pk).delete()
+    for fila in Asignacion.objects.values('etiquetas_id').annotate(total=Count('pk')).order_by():
+        Etiquetas.objects.filter(pk=fila['etiquetas_id']).update(usos=fila['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0007_categoria_ruta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='etiquetas',
+            name='clave',
+            field=models.CharField(default='', editable=False, max_length=50),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='etiquetas',
+            name='usos',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='etiquetas',
+            index=models.Index(fields=['tienda', 'usos'], name='etiquetas_tienda_usos_idx'),
+        ),
+        migrations.RunPython(normalizar_y_fusionar, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='etiquetas',
+            constraint=models.UniqueConstraint(fields=('tienda', 'clave'), name='etiquetas_tienda_clave_uniq'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:25
+
+from django.db import migrations, models, transaction
+
+from productos.dimensiones import parsear_dimensiones
+
+
+LOTE = 1000
+
+
+def completar_medidas(apps, schema_editor):
+    """Lee las dimensiones existentes por lotes de ids; cada lote se guarda en su transacción."""
+    DetalleProducto = apps.get_model('productos', 'DetalleProducto')
+    ultimo = 0
+    while True:
+        lote = list(
+            DetalleProducto.objects.filter(pk__gt=ultimo).order_by('pk').only('pk', 'dimensiones')[:LOTE]
+        )
+        if not lote:
+            return
+        for detalle in lote:
+            detalle.largo, detalle.ancho, detalle.alto = parsear_dimensiones(detalle.dimensiones) or (None, None, None)
+        with transaction.atomic():
+            DetalleProducto.objects.bulk_update(lote, ['largo', 'ancho', 'alto'])
+        ultimo = lote[-1].pk
+
+
+class Migration(migrations.Migration):
+    # El relleno se confirma lote a lote en lugar de en una sola transacción gigante
+    atomic = False
+
+    dependencies = [
+        ('productos', '0009_productos_relacionados'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detalleproducto',
+            name='alto',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=8, null=True),
+        ),
+        migrations.AddField(
+            model_name='detalleproducto',
+            name='ancho',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=8, null=True),
+        ),
+        migrations.AddField(
+            model_name='detalleproducto',
+            name='largo',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=8, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='detalleproducto',
+            index=models.Index(fields=['largo', 'ancho', 'alto'], name='detalle_medidas_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='detalleproducto',
+            index=models.Index(fields=['peso'], name='detalle_peso_idx'),
+        ),
+        migrations.RunPython(completar_medidas, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,10 @@
 # productos/models.py
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+from .dimensiones import parsear_dimensiones
+from .tiendas import tienda_actual_id, tienda_por_defecto_id
 
 """
 Categoría (1)  ──ForeignKey──>  (N) Producto
@@ -29,12 +34,80 @@ Producto (1) - DetalleProducto (1)
 
 """
 
-class Producto(models.Model):
+class Tienda(models.Model):
+    codigo = models.SlugField(max_length=50, unique=True)
+    nombre = models.CharField(max_length=100)
+    dominio = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    
+    def __str__(self):
+        return self.nombre
+    
+    def metadata(self):
+        return {
+            'verbose_name': 'Tienda',
+            'verbose_name_plural': 'Tiendas'
+        }
+
+
+def tienda_para_guardar():
+    """Tienda de las filas nuevas: la activa o, fuera de un request, TIENDA_POR_DEFECTO."""
+    tienda_id = tienda_actual_id()
+    if tienda_id is None:
+        tienda_id = tienda_por_defecto_id()
+    if tienda_id is None:
+        raise ValueError('No hay tienda activa: usar usar_tienda() o configurar TIENDA_POR_DEFECTO')
+    return tienda_id
+
+
+class PorTiendaManager(models.Manager):
+    """Limita las consultas a la tienda activa (ver productos/tiendas.py)."""
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        tienda_id = tienda_actual_id()
+        if tienda_id is not None:
+            queryset = queryset.filter(tienda_id=tienda_id)
+        return queryset
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create no pasa por save(): la tienda se completa acá
+        objs = list(objs)
+        sin_tienda = [obj for obj in objs if obj.tienda_id is None]
+        if sin_tienda:
+            tienda_id = tienda_para_guardar()
+            for obj in sin_tienda:
+                obj.tienda_id = tienda_id
+        return super().bulk_create(objs, *args, **kwargs)
+
+
+class ModeloPorTienda(models.Model):
+    """Base de los modelos del catálogo: cada fila pertenece a una tienda."""
+    tienda = models.ForeignKey(Tienda, on_delete=models.CASCADE, editable=False)
+    
+    objects = PorTiendaManager()
+    todas_las_tiendas = models.Manager()
+    
+    class Meta:
+        abstract = True
+    
+    def save(self, *args, **kwargs):
+        if self.tienda_id is None:
+            self.tienda_id = tienda_para_guardar()
+        super().save(*args, **kwargs)
+
+
+class Producto(ModeloPorTienda):
     nombre = models.CharField(max_length=100)
     precio = models.DecimalField(max_digits=10, decimal_places=2)
     categoria = models.ForeignKey('Categoria', on_delete=models.CASCADE)
     etiquetas = models.ManyToManyField('Etiquetas')
     
+    class Meta:
+        # Índice cubriente para las estadísticas de precio por categoría
+        indexes = [
+            models.Index(fields=['tienda', 'categoria', 'precio'], name='producto_tienda_cat_precio_idx'),
+        ]
+    
     def __str__(self):
         return self.nombre
     
@@ -44,8 +117,27 @@ class Producto(models.Model):
             'verbose_name_plural': 'Productos'
         }
     
-class Categoria(models.Model):
+class Categoria(ModeloPorTienda):
     nombre = models.CharField(max_length=100)
+    padre = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='hijas')
+    # Ruta materializada: ids desde la raíz hasta esta categoría, p. ej. "1/7/12/".
+    # El subárbol es un prefijo de ruta (ver productos/categorias.py)
+    ruta = models.CharField(max_length=255, blank=True, editable=False)
+    profundidad = models.PositiveSmallIntegerField(default=0, editable=False)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['tienda', 'nombre'], name='categoria_tienda_nombre_idx'),
+            models.Index(fields=['ruta'], name='categoria_ruta_idx'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        from .categorias import asignar_ruta, validar_padre
+        # El ciclo se rechaza antes de escribir, y la fila y las rutas cambian juntas
+        with transaction.atomic():
+            validar_padre(self)
+            super().save(*args, **kwargs)
+            asignar_ruta(self)
     
     def __str__(self):
         return self.nombre
@@ -56,8 +148,26 @@ class Categoria(models.Model):
             'verbose_name_plural': 'Categorías'
         }
     
-class Etiquetas(models.Model):
+class Etiquetas(ModeloPorTienda):
     nombre = models.CharField(max_length=50)
+    # Nombre normalizado ("Oferta " y "oferta" comparten clave; ver productos/etiquetas.py)
+    clave = models.CharField(max_length=50, editable=False)
+    # Productos que llevan la etiqueta; se mantiene en m2m_changed
+    usos = models.PositiveIntegerField(default=0, editable=False)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['tienda', 'nombre'], name='etiquetas_tienda_nombre_idx'),
+            models.Index(fields=['tienda', 'usos'], name='etiquetas_tienda_usos_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['tienda', 'clave'], name='etiquetas_tienda_clave_uniq'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        from .etiquetas import normalizar
+        self.nombre, self.clave = normalizar(self.nombre)
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return self.nombre
@@ -68,11 +178,29 @@ class Etiquetas(models.Model):
             'verbose_name_plural': 'Etiquetas'
         }
 
-class DetalleProducto(models.Model):
+class DetalleProducto(ModeloPorTienda):
     producto = models.OneToOneField(Producto, on_delete=models.CASCADE)
     dimensiones = models.CharField(max_length=100)
     peso = models.DecimalField(max_digits=6, decimal_places=2)
     material = models.CharField(max_length=100)
+    # Medidas en cm leídas de `dimensiones`, de mayor a menor (ver productos/dimensiones.py)
+    largo = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True, editable=False)
+    ancho = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True, editable=False)
+    alto = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True, editable=False)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['tienda', 'producto'], name='detalle_tienda_producto_idx'),
+            models.Index(fields=['largo', 'ancho', 'alto'], name='detalle_medidas_idx'),
+            models.Index(fields=['peso'], name='detalle_peso_idx'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        self.largo, self.ancho, self.alto = parsear_dimensiones(self.dimensiones) or (None, None, None)
+        # El detalle es de la misma tienda que su producto
+        if self.tienda_id is None and tienda_actual_id() is None and self.producto_id is not None:
+            self.tienda_id = Producto.todas_las_tiendas.filter(pk=self.producto_id).values_list('tienda_id', flat=True).first()
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"Detalle de {self.producto.nombre}"
@@ -81,4 +209,155 @@ class DetalleProducto(models.Model):
         return {
             'verbose_name': 'Detalle de Producto',
             'verbose_name_plural': 'Detalles de Productos'
-        }
\ No newline at end of file
+        }
+
+
+class CambioProducto(models.Model):
+    """
+    Historial append-only de cambios de Producto y DetalleProducto.
+
+    Cada fila guarda solo los campos que cambiaron (en `cambios`). El precio,
+    además, va en su propia columna para que "precio a una fecha" sea una
+    búsqueda por el índice (producto, fecha_cambio). `mes` (AAAAMM) es la
+    clave de partición lógica que usa el comando compactar_historial.
+    """
+    PRODUCTO = 'P'
+    DETALLE = 'D'
+    MODELO_CHOICES = [
+        (PRODUCTO, 'Producto'),
+        (DETALLE, 'Detalle de Producto'),
+    ]
+    # Sin restricción de FK: el historial sobrevive al borrado del producto
+    producto = models.ForeignKey(Producto, on_delete=models.DO_NOTHING, db_constraint=False, related_name='cambios')
+    modelo = models.CharField(max_length=1, choices=MODELO_CHOICES, default=PRODUCTO)
+    fecha_cambio = models.DateTimeField(default=timezone.now)
+    mes = models.PositiveIntegerField(db_index=True)
+    precio = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    cambios = models.JSONField(default=dict)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['producto', 'fecha_cambio'], name='cambio_producto_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"Cambio de {self.producto_id} el {self.fecha_cambio:%Y-%m-%d %H:%M}"
+
+    def save(self, *args, **kwargs):
+        if not self.mes:
+            self.mes = self.fecha_cambio.year * 100 + self.fecha_cambio.month
+        super().save(*args, **kwargs)
+
+    def metadata(self):
+        return {
+            'verbose_name': 'Cambio de Producto',
+            'verbose_name_plural': 'Cambios de Productos'
+        }
+
+
+class Stock(models.Model):
+    """Unidades disponibles de un producto (ya descontadas las reservas activas)."""
+    producto = models.OneToOneField(Producto, on_delete=models.CASCADE, related_name='stock')
+    cantidad = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"Stock de {self.producto_id}: {self.cantidad}"
+    
+    def metadata(self):
+        return {
+            'verbose_name': 'Stock',
+            'verbose_name_plural': 'Stocks'
+        }
+
+
+class Reserva(models.Model):
+    ACTIVA = 'A'
+    CONFIRMADA = 'C'
+    LIBERADA = 'L'
+    ESTADO_CHOICES = [
+        (ACTIVA, 'Activa'),
+        (CONFIRMADA, 'Confirmada'),
+        (LIBERADA, 'Liberada'),
+    ]
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='reservas')
+    cantidad = models.PositiveIntegerField()
+    creada_en = models.DateTimeField(default=timezone.now)
+    expira_en = models.DateTimeField()
+    estado = models.CharField(max_length=1, choices=ESTADO_CHOICES, default=ACTIVA)
+    
+    class Meta:
+        # Lo que recorre el barrido de reservas vencidas
+        indexes = [
+            models.Index(fields=['estado', 'expira_en'], name='reserva_estado_expira_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Reserva de {self.cantidad} x {self.producto_id} ({self.get_estado_display()})"
+    
+    def metadata(self):
+        return {
+            'verbose_name': 'Reserva',
+            'verbose_name_plural': 'Reservas'
+        }
+
+
+class Pedido(ModeloPorTienda):
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='pedidos')
+    creado_en = models.DateTimeField(default=timezone.now)
+    total = models.DecimalField(max_digits=12, decimal_places=2)
+    
+    def __str__(self):
+        return f"Pedido #{self.pk}"
+    
+    def metadata(self):
+        return {
+            'verbose_name': 'Pedido',
+            'verbose_name_plural': 'Pedidos'
+        }
+
+
+class LineaPedido(models.Model):
+    pedido = models.ForeignKey(Pedido, on_delete=models.CASCADE, related_name='lineas')
+    # Sin restricción de FK: el pedido conserva nombre y precio aunque el producto se borre
+    producto = models.ForeignKey(Producto, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    nombre = models.CharField(max_length=100)
+    precio_unitario = models.DecimalField(max_digits=10, decimal_places=2)
+    cantidad = models.PositiveIntegerField()
+    
+    def __str__(self):
+        return f"{self.cantidad} x {self.nombre}"
+    
+    @property
+    def subtotal(self):
+        return self.precio_unitario * self.cantidad
+    
+    def metadata(self):
+        return {
+            'verbose_name': 'Línea de Pedido',
+            'verbose_name_plural': 'Líneas de Pedido'
+        }
+
+
+class ProductoRelacionado(models.Model):
+    """
+    Vecinos precalculados de cada producto (ver productos/recomendaciones.py):
+    mostrar los relacionados es una lectura por el índice (producto, posicion).
+    """
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='relacionados')
+    relacionado = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='+')
+    puntaje = models.FloatField()
+    posicion = models.PositiveSmallIntegerField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['producto', 'posicion'], name='relacionado_producto_posicion_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.producto_id} -> {self.relacionado_id} ({self.puntaje:.2f})"
+    
+    def metadata(self):
+        return {
+            'verbose_name': 'Producto Relacionado',
+            'verbose_name_plural': 'Productos Relacionados'
+        }
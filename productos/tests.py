@@ -1,3 +1,707 @@
-from django.test import TestCase
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from tareas.cola import procesar
+
+from .models import Producto, Categoria, Etiquetas, DetalleProducto, CambioProducto, Tienda, Reserva, Pedido, ProductoRelacionado, Stock
+from . import inventario
+from . import borrado
+from .auditoria import registro_de_cambios, precio_en_fecha, historial_precios
+from .estadisticas import calcular_estadisticas
+from .tiendas import clave_cache, usar_tienda, tienda_actual_id
+from .carrito import Carrito, PreciosCambiados, confirmar_pedido
+from . import categorias
+from . import etiquetas
+from . import recomendaciones
+from .dimensiones import parsear_dimensiones
+from . import views
+
+
+class BorradoProductoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.categoria = Categoria.objects.create(nombre='Electrónica')
+        cls.etiquetas = [Etiquetas.objects.create(nombre=n) for n in ('nuevo', 'oferta', 'gaming')]
+
+    def crear_producto(self, nombre='Laptop'):
+        producto = Producto.objects.create(nombre=nombre, precio=Decimal('999.90'), categoria=self.categoria)
+        producto.etiquetas.set(self.etiquetas)
+        DetalleProducto.objects.create(producto=producto, dimensiones='35x25x2cm', peso=Decimal('2.5'), material='Aluminio')
+        return producto
+
+    def test_resumen_en_una_consulta(self):
+        producto = self.crear_producto()
+        inventario.reponer(producto.pk, 5)
+        inventario.reservar(producto.pk, 2)
+        otro = self.crear_producto('Mouse')
+        ProductoRelacionado.objects.create(producto=otro, relacionado=producto, puntaje=0.5, posicion=0)
+        with self.assertNumQueries(1):
+            resumen = borrado.resumen_borrado(producto)
+        self.assertEqual(resumen, {
+            'total_detalles': 1, 'total_etiquetas': 3, 'total_stock': 1, 'total_reservas': 1, 'total_relacionados': 1,
+        })
+
+    def test_borrar_producto_en_lotes(self):
+        producto = self.crear_producto()
+        otro = self.crear_producto('Mouse')
+        borrado.borrar_producto(producto, tamano_lote=2)
+        self.assertFalse(Producto.objects.filter(pk=producto.pk).exists())
+        self.assertFalse(DetalleProducto.objects.filter(producto_id=producto.pk).exists())
+        self.assertEqual(Producto.etiquetas.through.objects.count(), 3)
+        self.assertEqual(Etiquetas.objects.count(), 3)
+        self.assertTrue(DetalleProducto.objects.filter(producto=otro).exists())
+
+    def test_borrado_interrumpido_se_retoma(self):
+        producto = self.crear_producto()
+        original = borrado.borrar_en_lotes
+
+        def falla_en_stock(queryset, tamano_lote):
+            if queryset.model is Stock:
+                raise DatabaseError('conexión perdida')
+            return original(queryset, tamano_lote)
+
+        with mock.patch.object(borrado, 'borrar_en_lotes', falla_en_stock), self.assertRaises(DatabaseError):
+            borrado.borrar_producto(producto)
+        self.assertTrue(Producto.objects.filter(pk=producto.pk).exists())
+        borrado.borrar_producto(producto)
+        self.assertFalse(Producto.objects.filter(pk=producto.pk).exists())
+        # Los usos se descontaron una sola vez
+        self.assertEqual(list(Etiquetas.objects.values_list('usos', flat=True).distinct()), [0])
+
+
+class HistorialPreciosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.categoria = Categoria.objects.create(nombre='Electrónica')
+
+    def test_alta_y_cambios_solo_guardan_campos_modificados(self):
+        producto = Producto.objects.create(nombre='Mouse', precio=Decimal('10.00'), categoria=self.categoria)
+        alta = CambioProducto.objects.get()
+        self.assertEqual(alta.cambios, {'nombre': 'Mouse', 'precio': '10.00', 'categoria_id': self.categoria.pk})
+
+        producto = Producto.objects.get(pk=producto.pk)
+        producto.precio = '12.5'
+        producto.save()
+        producto.save()  # sin cambios: no agrega filas
+        cambio = CambioProducto.objects.latest('fecha_cambio')
+        self.assertEqual(CambioProducto.objects.count(), 2)
+        self.assertEqual(cambio.cambios, {'precio': '12.5'})
+        self.assertEqual(cambio.precio, Decimal('12.50'))
+
+    def test_un_solo_insert_por_transaccion(self):
+        productos = [
+            Producto.objects.create(nombre=f'P{i}', precio=Decimal('1.00'), categoria=self.categoria)
+            for i in range(3)
+        ]
+        with self.assertNumQueries(6):  # SAVEPOINT + 3 UPDATE + 1 INSERT + RELEASE
+            with registro_de_cambios():
+                for producto in productos:
+                    producto.precio = Decimal('2.00')
+                    producto.save(update_fields=['precio'])
+        self.assertEqual(CambioProducto.objects.filter(precio=Decimal('2.00')).count(), 3)
+
+    def test_precio_en_fecha(self):
+        producto = Producto.objects.create(nombre='Teclado', precio=Decimal('30.00'), categoria=self.categoria)
+        CambioProducto.objects.filter(producto=producto).update(
+            fecha_cambio=datetime(2025, 1, 1, tzinfo=dt_timezone.utc), mes=202501)
+        detalle = DetalleProducto.objects.create(producto=producto, dimensiones='45x15x3cm', peso=Decimal('0.8'), material='Plástico')
+        detalle.material = 'Aluminio'
+        detalle.save()
+        CambioProducto.objects.create(
+            producto=producto, fecha_cambio=datetime(2025, 3, 1, tzinfo=dt_timezone.utc),
+            precio=Decimal('25.00'), cambios={'precio': '25.00'},
+        )
+        self.assertIsNone(precio_en_fecha(producto, datetime(2024, 12, 31, tzinfo=dt_timezone.utc)))
+        self.assertEqual(precio_en_fecha(producto, datetime(2025, 2, 1, tzinfo=dt_timezone.utc)), Decimal('30.00'))
+        self.assertEqual(precio_en_fecha(producto, datetime(2025, 4, 1, tzinfo=dt_timezone.utc)), Decimal('25.00'))
+        self.assertEqual([p for _, p in historial_precios(producto)], [Decimal('30.00'), Decimal('25.00')])
+
+    def test_edicion_desde_la_vista(self):
+        producto = Producto.objects.create(nombre='Monitor', precio=Decimal('150.00'), categoria=self.categoria)
+        self.client.force_login(User.objects.create_user('vendedor', password='x'))
+        response = self.client.post(reverse('productos:editar', args=[producto.pk]), {'nombre': 'Monitor', 'precio': '140.00'})
+        self.assertRedirects(response, reverse('productos:detalle', args=[producto.pk]), fetch_redirect_response=False)
+        self.assertEqual([p for _, p in historial_precios(producto)], [Decimal('150.00'), Decimal('140.00')])
+
+    def test_compactar_historial(self):
+        producto = Producto.objects.create(nombre='Silla', precio=Decimal('50.00'), categoria=self.categoria)
+        CambioProducto.objects.all().delete()
+        for dia, precio in ((1, '50.00'), (10, '45.00'), (20, '40.00')):
+            CambioProducto.objects.create(
+                producto=producto, fecha_cambio=datetime(2024, 5, dia, tzinfo=dt_timezone.utc),
+                precio=Decimal(precio), cambios={'precio': precio},
+            )
+        CambioProducto.objects.create(
+            producto=producto, modelo=CambioProducto.DETALLE,
+            fecha_cambio=datetime(2024, 5, 2, tzinfo=dt_timezone.utc), cambios={'material': 'Madera'},
+        )
+        call_command('compactar_historial', stdout=StringIO())
+        self.assertEqual(CambioProducto.objects.count(), 2)
+        fila = CambioProducto.objects.get(modelo=CambioProducto.PRODUCTO)
+        self.assertEqual(fila.precio, Decimal('40.00'))
+        self.assertEqual(fila.fecha_cambio.day, 20)
+
+        call_command('compactar_historial', retener_meses=0, stdout=StringIO())
+        self.assertEqual(CambioProducto.objects.count(), 2)
+
+
+class EstadisticasCategoriaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.electronica = Categoria.objects.create(nombre='Electrónica')
+        cls.hogar = Categoria.objects.create(nombre='Hogar')
+        cls.oferta = Etiquetas.objects.create(nombre='oferta')
+        cls.nuevo = Etiquetas.objects.create(nombre='nuevo')
+        for nombre, precio in (('Cable', '5.00'), ('Mouse', '25.00'), ('Teclado', '45.00'), ('Laptop', '1200.00')):
+            producto = Producto.objects.create(nombre=nombre, precio=Decimal(precio), categoria=cls.electronica)
+            producto.etiquetas.add(cls.oferta)
+        Producto.objects.get(nombre='Laptop').etiquetas.add(cls.nuevo)
+        Producto.objects.create(nombre='Silla', precio=Decimal('80.00'), categoria=cls.hogar)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_agregados_en_la_base_de_datos(self):
+        with self.assertNumQueries(1):
+            datos = calcular_estadisticas(self.electronica.pk)
+        self.assertEqual(datos['total'], 4)
+        self.assertEqual(datos['precio_min'], Decimal('5.00'))
+        self.assertEqual(datos['precio_max'], Decimal('1200.00'))
+        self.assertEqual(
+            {t['tramo']: t['total'] for t in datos['histograma']},
+            {'0-10': 1, '10-50': 2, '50-100': 0, '100-500': 0, '500-1000': 0, '1000+': 1},
+        )
+        self.assertEqual(datos['etiquetas'], [{'nombre': 'oferta', 'total': 4}, {'nombre': 'nuevo', 'total': 1}])
+
+    def test_cache_e_invalidacion(self):
+        url = reverse('productos:estadisticas_categoria', args=[self.electronica.pk])
+        self.assertEqual(self.client.get(url).json()['total'], 4)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        silla = Producto.objects.get(nombre='Silla')
+        silla.categoria = self.electronica
+        silla.save()
+        self.assertEqual(self.client.get(url).json()['total'], 5)
+        hogar = reverse('productos:estadisticas_categoria', args=[self.hogar.pk])
+        self.assertEqual(self.client.get(hogar).json()['total'], 0)
+
+        self.oferta.producto_set.clear()
+        self.assertEqual(self.client.get(url).json()['etiquetas'], [{'nombre': 'nuevo', 'total': 1}])
+
+    def test_categoria_inexistente(self):
+        url = reverse('productos:estadisticas_categoria', args=[9999])
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_bench_estadisticas(self):
+        salida = StringIO()
+        call_command('bench_estadisticas', '--productos', '50', '--lote', '20', stdout=salida)
+        self.assertIn('Carga de 50 productos', salida.getvalue())
+        # Todo lo que crea se revierte
+        self.assertFalse(Etiquetas.objects.filter(nombre__startswith='bench-').exists())
+
+
+class TiendasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.norte = Tienda.objects.create(codigo='norte', nombre='Tienda Norte', dominio='norte.example.com')
+        cls.sur = Tienda.objects.create(codigo='sur', nombre='Tienda Sur', dominio='sur.example.com')
+        for tienda, precios in ((cls.norte, ('10.00', '20.00')), (cls.sur, ('300.00',))):
+            with usar_tienda(tienda):
+                categoria = Categoria.objects.create(nombre='Electrónica')
+                for precio in precios:
+                    producto = Producto.objects.create(nombre='Mouse', precio=Decimal(precio), categoria=categoria)
+                    DetalleProducto.objects.create(producto=producto, dimensiones='10x6x4cm', peso=Decimal('0.1'), material='Plástico')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_manager_filtra_por_tienda_activa(self):
+        self.assertEqual(Producto.objects.count(), 3)
+        with usar_tienda(self.norte):
+            self.assertEqual(Producto.objects.count(), 2)
+            self.assertEqual(DetalleProducto.objects.count(), 2)
+            self.assertEqual(Categoria.objects.get().tienda, self.norte)
+        with usar_tienda(self.sur):
+            self.assertEqual(list(Producto.objects.values_list('precio', flat=True)), [Decimal('300.00')])
+        self.assertEqual(Producto.todas_las_tiendas.filter(tienda=self.sur).count(), 1)
+
+    def test_detalle_hereda_tienda_del_producto(self):
+        producto = Producto.todas_las_tiendas.filter(tienda=self.sur).get()
+        self.assertEqual(DetalleProducto.todas_las_tiendas.get(producto=producto).tienda, self.sur)
+
+    @override_settings(ALLOWED_HOSTS=['.example.com', 'testserver'])
+    def test_middleware_resuelve_por_host(self):
+        categoria_norte = Categoria.todas_las_tiendas.get(tienda=self.norte)
+        url = reverse('productos:estadisticas_categoria', args=[categoria_norte.pk])
+        self.assertEqual(self.client.get(url, HTTP_HOST='norte.example.com').json()['total'], 2)
+        # La categoría de otra tienda no existe para la tienda activa
+        self.assertEqual(self.client.get(url, HTTP_HOST='sur.example.com').status_code, 404)
+        # El cliente no elige la tienda con un header
+        self.assertEqual(self.client.get(url, HTTP_HOST='sur.example.com', headers={'X-Tienda': 'norte'}).status_code, 404)
+        self.assertIsNone(tienda_actual_id())
+
+    @override_settings(ALLOWED_HOSTS=['.example.com', 'testserver'], TIENDA_HEADER='X-Tienda')
+    def test_header_solo_si_esta_configurado(self):
+        categoria_norte = Categoria.todas_las_tiendas.get(tienda=self.norte)
+        url = reverse('productos:estadisticas_categoria', args=[categoria_norte.pk])
+        self.assertEqual(self.client.get(url, HTTP_HOST='sur.example.com', headers={'X-Tienda': 'norte'}).json()['total'], 2)
+        lista = self.client.get(reverse('productos:lista_productos'), HTTP_HOST='sur.example.com', headers={'X-Tienda': 'norte'})
+        self.assertIn('X-Tienda', lista['Vary'])
+
+    @override_settings(ALLOWED_HOSTS=['.example.com', 'testserver'], TIENDA_POR_DEFECTO=None)
+    def test_sin_tienda_responde_404(self):
+        self.assertEqual(self.client.get(reverse('productos:lista_productos'), HTTP_HOST='otra.example.com').status_code, 404)
+        with self.assertRaises(ValueError):
+            Categoria.objects.create(nombre='Sin tienda')
+
+    def test_filas_sin_tienda_van_a_la_tienda_por_defecto(self):
+        principal = Tienda.objects.get(codigo='principal')
+        categoria = Categoria.objects.create(nombre='Hogar')
+        etiqueta, = Etiquetas.objects.bulk_create([Etiquetas(nombre='hogar', clave='hogar')])
+        self.assertEqual((categoria.tienda_id, etiqueta.tienda_id), (principal.pk, principal.pk))
+
+
+class InventarioTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nombre='Electrónica')
+        cls.producto = Producto.objects.create(nombre='Mouse', precio=Decimal('10.00'), categoria=categoria)
+
+    def setUp(self):
+        inventario.reponer(self.producto.pk, 5)
+
+    def test_reservar_descuenta_y_no_sobrevende(self):
+        inventario.reservar(self.producto.pk, 3)
+        with self.assertRaises(inventario.StockInsuficiente):
+            inventario.reservar(self.producto.pk, 3)
+        self.assertEqual(inventario.disponible(self.producto.pk), 2)
+        self.assertEqual(Reserva.objects.count(), 1)
+
+    def test_liberar_devuelve_una_sola_vez(self):
+        reserva = inventario.reservar(self.producto.pk, 2)
+        self.assertTrue(inventario.liberar_reserva(reserva))
+        self.assertFalse(inventario.liberar_reserva(reserva))
+        self.assertFalse(inventario.confirmar_reserva(reserva))
+        self.assertEqual(inventario.disponible(self.producto.pk), 5)
+
+    def test_barrido_de_vencidas(self):
+        vencida = inventario.reservar(self.producto.pk, 2, minutos=0)
+        confirmada = inventario.reservar(self.producto.pk, 1, minutos=0)
+        vigente = inventario.reservar(self.producto.pk, 1)
+        self.assertTrue(inventario.confirmar_reserva(confirmada))
+        call_command('liberar_reservas', stdout=StringIO())
+        estados = dict(Reserva.objects.values_list('pk', 'estado'))
+        self.assertEqual(estados[vencida.pk], Reserva.LIBERADA)
+        self.assertEqual(estados[confirmada.pk], Reserva.CONFIRMADA)
+        self.assertEqual(estados[vigente.pk], Reserva.ACTIVA)
+        self.assertEqual(inventario.disponible(self.producto.pk), 3)
+
+    def test_barrido_agrupa_por_producto(self):
+        otro = Producto.objects.create(nombre='Teclado', precio=Decimal('30.00'), categoria=self.producto.categoria)
+        inventario.reponer(otro.pk, 5)
+        for producto in (self.producto, otro, otro):
+            inventario.reservar(producto.pk, 1, minutos=0)
+        # Un lote: la selección, el stock y el estado; y la selección vacía del siguiente
+        with self.assertNumQueries(4 + 4):  # + SAVEPOINT y RELEASE de cada lote
+            self.assertEqual(inventario.liberar_vencidas(), 3)
+        self.assertEqual((inventario.disponible(self.producto.pk), inventario.disponible(otro.pk)), (5, 5))
+
+    def test_primera_reposicion_concurrente(self):
+        otro = Producto.objects.create(nombre='Teclado', precio=Decimal('30.00'), categoria=self.producto.categoria)
+        original = QuerySet.update
+
+        def otro_proceso_repone(queryset, **kwargs):
+            # Entre el UPDATE que no encuentra la fila y el alta, otro proceso la crea
+            actualizados = original(queryset, **kwargs)
+            if not actualizados and queryset.model is Stock and not Stock.objects.filter(producto=otro).exists():
+                Stock.objects.create(producto=otro, cantidad=2)
+            return actualizados
+
+        with mock.patch.object(QuerySet, 'update', otro_proceso_repone):
+            inventario.reponer(otro.pk, 3)
+        self.assertEqual(inventario.disponible(otro.pk), 5)
+
+    def test_lista_muestra_disponible(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('productos:lista_productos'))
+            self.assertContains(response, '<td>5</td>', html=True)
+
+
+class CarritoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.categoria = Categoria.objects.create(nombre='Electrónica')
+        cls.laptop = Producto.objects.create(nombre='Laptop', precio=Decimal('1000.00'), categoria=cls.categoria)
+        cls.mouse = Producto.objects.create(nombre='Mouse', precio=Decimal('20.00'), categoria=cls.categoria)
+        inventario.reponer(cls.laptop.pk, 2)
+        inventario.reponer(cls.mouse.pk, 10)
+        cls.usuario = User.objects.create_user('comprador', password='clave-segura-123')
+
+    def test_agregar_y_quitar_sin_consultas(self):
+        self.client.get(reverse('productos:carrito'))  # carga el mapa de tiendas del proceso
+        with self.assertNumQueries(0):
+            self.client.post(reverse('productos:carrito_agregar', args=[self.laptop.pk]))
+            self.client.post(reverse('productos:carrito_agregar', args=[self.mouse.pk]), {'cantidad': 3})
+            self.client.post(reverse('productos:carrito_quitar', args=[self.laptop.pk]))
+        self.assertEqual(self.client.cookies[Carrito.COOKIE]['httponly'], True)
+        response = self.client.get(reverse('productos:carrito'))
+        self.assertEqual([(l['producto'], l['cantidad']) for l in response.context['lineas']], [(self.mouse, 3)])
+        self.assertEqual(response.context['total'], Decimal('60.00'))
+
+    def test_cookie_alterada_es_carrito_vacio(self):
+        self.client.cookies[Carrito.COOKIE] = f'{self.laptop.pk}:1'
+        response = self.client.get(reverse('productos:carrito'))
+        self.assertEqual(response.context['lineas'], [])
+
+    def test_confirmar_pedido_revalida_precios(self):
+        carrito = Carrito({self.laptop.pk: 1, self.mouse.pk: 2, 999999: 1})
+        Producto.objects.filter(pk=self.mouse.pk).update(precio=Decimal('25.00'))
+        with self.assertRaises(PreciosCambiados):
+            confirmar_pedido(carrito, self.usuario, total_mostrado='1040.00')
+        # in_bulk, savepoint, pedido, dos descuentos de stock, bulk_create de líneas, fin del savepoint
+        with self.assertNumQueries(7):
+            pedido = confirmar_pedido(carrito, self.usuario, total_mostrado='1050.00')
+        self.assertEqual(pedido.total, Decimal('1050.00'))
+        self.assertEqual(
+            list(pedido.lineas.order_by('producto_id').values_list('nombre', 'precio_unitario', 'cantidad')),
+            [('Laptop', Decimal('1000.00'), 1), ('Mouse', Decimal('25.00'), 2)],
+        )
+        self.assertEqual(inventario.disponible(self.mouse.pk), 8)
+
+    def test_sin_stock_no_deja_pedido_a_medias(self):
+        self.client.force_login(self.usuario)
+        self.client.post(reverse('productos:carrito_agregar', args=[self.mouse.pk]))
+        self.client.post(reverse('productos:carrito_agregar', args=[self.laptop.pk]), {'cantidad': 3})
+        response = self.client.post(reverse('productos:checkout'))
+        self.assertContains(response, 'No hay stock suficiente')
+        self.assertFalse(Pedido.objects.exists())
+        self.assertEqual(inventario.disponible(self.mouse.pk), 10)
+
+    def test_total_alterado_vuelve_al_carrito(self):
+        self.client.force_login(self.usuario)
+        self.client.post(reverse('productos:carrito_agregar', args=[self.mouse.pk]))
+        for total in ('abc', 'NaN', 'sNaN', 'Infinity', ''):
+            response = self.client.post(reverse('productos:checkout'), {'total': total})
+            self.assertContains(response, 'Los precios cambiaron')
+        self.assertFalse(Pedido.objects.exists())
+
+    def test_checkout_vacia_carrito(self):
+        self.client.force_login(self.usuario)
+        self.client.post(reverse('productos:carrito_agregar', args=[self.mouse.pk]))
+        response = self.client.post(reverse('productos:checkout'), {'total': '20.00'})
+        pedido = Pedido.objects.get()
+        self.assertRedirects(response, reverse('productos:pedido', args=[pedido.pk]))
+        self.assertEqual(self.client.cookies[Carrito.COOKIE].value, '')
+        self.assertContains(self.client.get(reverse('productos:shop')), 'Mouse')
+
+
+class ArbolCategoriasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.electronica = Categoria.objects.create(nombre='Electrónica')
+        cls.computacion = Categoria.objects.create(nombre='Computación', padre=cls.electronica)
+        cls.notebooks = Categoria.objects.create(nombre='Notebooks', padre=cls.computacion)
+        cls.hogar = Categoria.objects.create(nombre='Hogar')
+        for nombre, categoria in (('Radio', cls.electronica), ('Mouse', cls.computacion),
+                                  ('Laptop', cls.notebooks), ('Lámpara', cls.hogar)):
+            Producto.objects.create(nombre=nombre, precio=Decimal('10.00'), categoria=categoria)
+
+    def nombres(self, queryset):
+        return sorted(queryset.values_list('nombre', flat=True))
+
+    def test_rutas_al_crear(self):
+        self.assertEqual(self.notebooks.ruta, f'{self.electronica.pk}/{self.computacion.pk}/{self.notebooks.pk}/')
+        self.assertEqual(self.notebooks.profundidad, 2)
+
+    def test_productos_del_subarbol_en_una_consulta(self):
+        with self.assertNumQueries(1):
+            nombres = self.nombres(categorias.productos_del_subarbol(self.electronica))
+        self.assertEqual(nombres, ['Laptop', 'Mouse', 'Radio'])
+
+    def test_migas_en_una_consulta(self):
+        with self.assertNumQueries(1):
+            migas = [c.nombre for c in categorias.migas(self.notebooks)]
+        self.assertEqual(migas, ['Electrónica', 'Computación', 'Notebooks'])
+
+    def test_mover_rama(self):
+        categorias.mover(self.computacion, self.hogar)
+        notebooks = Categoria.objects.get(pk=self.notebooks.pk)
+        self.assertEqual(notebooks.ruta, f'{self.hogar.pk}/{self.computacion.pk}/{self.notebooks.pk}/')
+        self.assertEqual(notebooks.profundidad, 2)
+        self.assertEqual(self.nombres(categorias.productos_del_subarbol(self.hogar)), ['Laptop', 'Lámpara', 'Mouse'])
+        self.assertEqual(self.nombres(categorias.productos_del_subarbol(self.electronica)), ['Radio'])
+        with self.assertRaises(ValueError):
+            categorias.mover(self.hogar, notebooks)
+
+    def test_cambiar_padre_con_save_mueve_la_rama(self):
+        self.computacion.padre = None
+        self.computacion.save()
+        self.assertEqual(Categoria.objects.get(pk=self.notebooks.pk).ruta, f'{self.computacion.pk}/{self.notebooks.pk}/')
+        Categoria.objects.update(ruta='')
+        categorias.reconstruir_rutas()
+        self.assertEqual(Categoria.objects.get(pk=self.notebooks.pk).ruta, f'{self.computacion.pk}/{self.notebooks.pk}/')
+
+    def test_ciclo_con_save_no_se_escribe(self):
+        self.electronica.padre = self.notebooks
+        with self.assertRaises(ValueError):
+            self.electronica.save()
+        self.assertIsNone(Categoria.objects.get(pk=self.electronica.pk).padre_id)
+        self.computacion.padre = self.computacion
+        with self.assertRaises(ValueError):
+            self.computacion.save()
+        self.assertEqual(Categoria.objects.get(pk=self.computacion.pk).padre_id, self.electronica.pk)
+
+    def test_lista_filtra_por_subarbol(self):
+        response = self.client.get(reverse('productos:lista_productos'), {'categoria': self.computacion.pk})
+        self.assertEqual(sorted(p.nombre for p in response.context['productos']), ['Laptop', 'Mouse'])
+        self.assertEqual([c.nombre for c in response.context['migas']], ['Electrónica', 'Computación'])
+        self.assertEqual(self.client.get(reverse('productos:lista_productos'), {'categoria': 'abc'}).status_code, 404)
+
+
+class EtiquetasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.categoria = Categoria.objects.create(nombre='Electrónica')
+        cls.productos = [
+            Producto.objects.create(nombre=f'Producto {i}', precio=Decimal('10.00'), categoria=cls.categoria)
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def usos(self):
+        return dict(Etiquetas.objects.values_list('nombre', 'usos'))
+
+    def test_normaliza_y_deduplica_con_el_mapa(self):
+        ids = etiquetas.ids_etiquetas(['Oferta', ' oferta ', 'OFERTA', 'Gaming  PC'])
+        self.assertEqual(len(ids), 2)
+        self.assertEqual(sorted(Etiquetas.objects.values_list('nombre', flat=True)), ['Gaming PC', 'Oferta'])
+        with self.assertNumQueries(0):
+            self.assertEqual(etiquetas.ids_etiquetas(['oferta', 'gaming pc']), ids)
+
+    def test_usos_se_mantienen_en_m2m_changed(self):
+        oferta, nuevo = (Etiquetas.objects.create(nombre=n) for n in ('oferta', 'nuevo'))
+        for producto in self.productos:
+            producto.etiquetas.add(oferta)
+        self.productos[0].etiquetas.add(nuevo, oferta)
+        self.productos[1].etiquetas.remove(oferta, nuevo)
+        nuevo.producto_set.add(self.productos[2])
+        self.assertEqual(self.usos(), {'oferta': 2, 'nuevo': 2})
+        self.productos[0].etiquetas.clear()
+        self.productos[2].delete()
+        self.assertEqual(self.usos(), {'oferta': 0, 'nuevo': 0})
+
+    def test_fusionar_reescribe_asignaciones(self):
+        oferta = Etiquetas.objects.create(nombre='oferta')
+        # Duplicado histórico que saltó la normalización
+        repetida = Etiquetas.objects.create(nombre='rebaja')
+        Etiquetas.objects.filter(pk=repetida.pk).update(nombre='Oferta ', clave='oferta ')
+        self.productos[0].etiquetas.add(oferta, repetida)
+        self.productos[1].etiquetas.add(repetida)
+        movidas = etiquetas.fusionar(oferta, [repetida])
+        self.assertEqual(movidas, 1)
+        self.assertFalse(Etiquetas.objects.filter(pk=repetida.pk).exists())
+        self.assertEqual(sorted(oferta.producto_set.values_list('pk', flat=True)),
+                         [self.productos[0].pk, self.productos[1].pk])
+        self.assertEqual(self.usos(), {'oferta': 2})
+
+    def test_nube_con_pesos_en_cache(self):
+        for producto in self.productos:
+            etiquetas.etiquetar(producto, ['oferta'])
+        etiquetas.etiquetar(self.productos[0], ['nuevo'])
+        nube = etiquetas.nube()
+        self.assertEqual([(e['nombre'], e['usos'], e['peso']) for e in nube], [('oferta', 3, 5), ('nuevo', 1, 1)])
+        with self.assertNumQueries(0):
+            etiquetas.nube()
+        etiquetas.etiquetar(self.productos[1], ['nuevo'])
+        self.assertEqual(etiquetas.nube()[1]['usos'], 2)
+        response = self.client.get(reverse('productos:nube_etiquetas'), {'limite': 1})
+        self.assertEqual([e['nombre'] for e in response.json()['etiquetas']], ['oferta'])
+        response = self.client.get(reverse('productos:nube_etiquetas'), {'limite': -1})
+        self.assertEqual([e['nombre'] for e in response.json()['etiquetas']], ['oferta'])
+
+    def test_asignar_no_invalida_el_mapa(self):
+        etiquetas.etiquetar(self.productos[0], ['oferta'])
+        clave = clave_cache(None, 'etiquetas', 'mapa')
+        self.assertIn('oferta', cache.get(clave))
+        etiquetas.etiquetar(self.productos[1], ['oferta'])
+        self.productos[0].etiquetas.clear()
+        self.assertIn('oferta', cache.get(clave))
+        Etiquetas.objects.get(clave='oferta').save()
+        self.assertIsNone(cache.get(clave))
+
+
+class RecomendacionesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.electronica = Categoria.objects.create(nombre='Electrónica')
+        cls.hogar = Categoria.objects.create(nombre='Hogar')
+        cls.gamer, cls.oferta, cls.nuevo = (Etiquetas.objects.create(nombre=n) for n in ('gamer', 'oferta', 'nuevo'))
+        def crear(nombre, categoria, *tags):
+            producto = Producto.objects.create(nombre=nombre, precio=Decimal('10.00'), categoria=categoria)
+            producto.etiquetas.set(tags)
+            return producto
+        cls.laptop = crear('Laptop', cls.electronica, cls.gamer, cls.oferta)
+        cls.mouse = crear('Mouse', cls.electronica, cls.gamer, cls.oferta)
+        cls.teclado = crear('Teclado', cls.electronica, cls.gamer)
+        cls.lampara = crear('Lámpara', cls.hogar, cls.oferta)
+        cls.silla = crear('Silla', cls.hogar, cls.nuevo)
+
+    def vecinos(self, producto):
+        return list(ProductoRelacionado.objects.filter(producto=producto).order_by('posicion')
+                    .values_list('relacionado__nombre', flat=True))
+
+    def test_numpy_y_python_coinciden(self):
+        rasgos = recomendaciones._rasgos(Producto.objects.all())
+        python = dict(recomendaciones.vecinos_python(rasgos, 3))
+        self.assertEqual(python[self.laptop.pk], [(self.mouse.pk, 1.0), (self.teclado.pk, 2 / 3), (self.lampara.pk, 1 / 4)])
+        if recomendaciones.HAY_NUMPY:
+            numpy = dict(recomendaciones.vecinos_numpy(rasgos, 3))
+            self.assertEqual(numpy.keys(), python.keys())
+            for pk, vecinos in python.items():
+                self.assertEqual([v for v, _ in numpy[pk]], [v for v, _ in vecinos])
+                for (_, a), (_, b) in zip(numpy[pk], vecinos):
+                    self.assertAlmostEqual(a, b)
+
+    def test_comando_y_detalle_en_una_consulta(self):
+        call_command('calcular_relacionados', '--k', '2', stdout=StringIO())
+        self.assertEqual(self.vecinos(self.laptop), ['Mouse', 'Teclado'])
+        self.assertEqual(self.vecinos(self.silla), ['Lámpara'])
+        with self.assertNumQueries(1):
+            nombres = [p.nombre for p in recomendaciones.relacionados(self.laptop)]
+        self.assertEqual(nombres, ['Mouse', 'Teclado'])
+        response = self.client.get(reverse('productos:detalle', args=[self.laptop.pk]))
+        self.assertContains(response, reverse('productos:detalle', args=[self.mouse.pk]))
+
+    def test_refresco_incremental_al_cambiar_etiquetas(self):
+        recomendaciones.reconstruir()
+        self.silla.etiquetas.set([self.gamer, self.oferta])
+        self.silla.categoria = self.electronica
+        self.silla.save()
+        while procesar(100):
+            pass
+        self.assertEqual(self.vecinos(self.silla), ['Laptop', 'Mouse', 'Teclado', 'Lámpara'])
+        self.assertEqual(self.vecinos(self.laptop), ['Mouse', 'Silla', 'Teclado', 'Lámpara'])
+        self.assertEqual(self.vecinos(self.lampara), ['Laptop', 'Mouse', 'Silla'])
+        recomendaciones.reconstruir()
+        self.assertEqual(self.vecinos(self.laptop), ['Mouse', 'Silla', 'Teclado', 'Lámpara'])
+
+    def test_borrar_producto_borra_sus_relaciones(self):
+        recomendaciones.reconstruir(k=2)
+        borrado.borrar_producto(self.mouse)
+        self.assertFalse(ProductoRelacionado.objects.filter(relacionado_id=self.mouse.pk).exists())
+
+
+class DimensionesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nombre='Electrónica')
+        for nombre, precio, dimensiones, peso in (
+            ('Laptop', '999.90', '35x25x2cm', '2.50'),
+            ('Monitor', '300.00', '60 x 45 x 20 cm', '4.00'),
+            ('Mouse', '20.00', '120×60×40 mm', '0.10'),
+            ('Mueble', '150.00', 'a medida', '1.00'),
+        ):
+            producto = Producto.objects.create(nombre=nombre, precio=Decimal(precio), categoria=categoria)
+            DetalleProducto.objects.create(producto=producto, dimensiones=dimensiones, peso=Decimal(peso), material='-')
+
+    def test_parsear_dimensiones(self):
+        casos = {
+            '35x25x2cm': ('35.00', '25.00', '2.00'),
+            '2 X 35 X 25': ('35.00', '25.00', '2.00'),
+            '1,2 x 0,5 x 0,3 m': ('120.00', '50.00', '30.00'),
+            '350mm x 25cm x 20mm': ('35.00', '25.00', '2.00'),
+        }
+        for texto, esperado in casos.items():
+            self.assertEqual(parsear_dimensiones(texto), tuple(map(Decimal, esperado)), texto)
+        for texto in ('', 'a medida', '35x25', '35x25x2km'):
+            self.assertIsNone(parsear_dimensiones(texto), texto)
+
+    def test_save_completa_medidas(self):
+        detalle = DetalleProducto.objects.get(producto__nombre='Mouse')
+        self.assertEqual((detalle.largo, detalle.ancho, detalle.alto), (Decimal('12'), Decimal('6'), Decimal('4')))
+        self.assertIsNone(DetalleProducto.objects.get(producto__nombre='Mueble').largo)
+
+    def test_filtros_del_catalogo(self):
+        def nombres(**parametros):
+            response = self.client.get(reverse('productos:lista_productos'), parametros)
+            return sorted(p.nombre for p in response.context['productos'])
+        self.assertEqual(nombres(peso_max='3', caja='40x30x20cm'), ['Laptop', 'Mouse'])
+        self.assertEqual(nombres(caja='20x40x30'), ['Laptop', 'Mouse'])
+        self.assertEqual(nombres(precio_min='100', precio_max='500'), ['Monitor', 'Mueble'])
+        for invalido in ('no es un número', 'nan', 'sNaN', 'Infinity', '-Infinity'):
+            self.assertEqual(nombres(precio_min=invalido, peso_max=invalido), ['Laptop', 'Monitor', 'Mouse', 'Mueble'])
+
+
+class ListaParcialTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nombre='Libros')
+        Producto.objects.bulk_create([
+            Producto(nombre=f'Libro {i:03d}', precio=Decimal('5.00') + i, categoria=categoria)
+            for i in range(views.FILAS_POR_PAGINA + 5)
+        ])
+
+    def test_parcial_solo_filas_en_una_consulta(self):
+        url = reverse('productos:lista_productos')
+        completa = self.client.get(url)
+        with self.assertNumQueries(1):
+            parcial = self.client.get(url, {'parcial': 1, 'page': 2, 'precio_min': 5})
+        self.assertNotContains(parcial, '<html')
+        self.assertEqual(len(parcial.context['productos']), 5)
+        self.assertIsNone(parcial.context['siguiente'])
+        self.assertContains(completa, 'page=2')
+        self.assertContains(completa, 'data-siguiente')
+        self.assertLess(len(parcial.content), len(completa.content) / 5)
+
+    def test_siguiente_conserva_filtros(self):
+        response = self.client.get(reverse('productos:lista_productos'), {'precio_min': 5, 'page': 'x'})
+        self.assertEqual(response.context['siguiente'], 2)
+        self.assertContains(response, 'href="?precio_min=5&amp;page=2"')
+
+    def test_pagina_fuera_de_rango(self):
+        url = reverse('productos:lista_productos')
+        for pagina in (3, 99999999999999999999999):
+            self.assertEqual(self.client.get(url, {'page': pagina}).status_code, 404)
+            self.assertEqual(self.client.get(url, {'page': pagina, 'parcial': 1}).status_code, 404)
+
+    def test_304_sin_consultas_hasta_que_cambia_el_stock(self):
+        url = reverse('productos:lista_productos')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            inventario.reponer(Producto.objects.first().pk, 3)
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 200)
+
+    def test_fila_de_un_producto(self):
+        producto = Producto.objects.get(nombre='Libro 003')
+        response = self.client.get(reverse('productos:fila_producto', args=[producto.pk]))
+        self.assertContains(response, f'id="producto-{producto.pk}"')
+        self.assertNotContains(response, '<table')
+        self.assertEqual(self.client.get(reverse('productos:fila_producto', args=[0])).status_code, 404)
@@ -0,0 +1,132 @@
+# productos/tiendas.py
+"""
+Varias tiendas en un solo despliegue.
+
+La tienda activa vive en un ContextVar: la fija `TiendaMiddleware` para cada
+request o `usar_tienda()` en comandos y tests. Los managers de los modelos
+del catálogo filtran por ella; sin tienda activa las consultas no se
+filtran, lo que solo pasa fuera de un request (comandos, migraciones,
+tareas en segundo plano).
+
+La tienda de un request sale del host (`Tienda.dominio`). El cliente no
+elige la tienda: el header TIENDA_HEADER solo se tiene en cuenta si está
+configurado, y debe ponerlo un proxy interno que descarte el que manda el
+cliente. Si nada coincide se usa TIENDA_POR_DEFECTO (código; para un
+despliegue de una sola tienda) y, sin ella, el request es un 404: nunca se
+atiende un request con el catálogo de todas las tiendas.
+
+Las filas que se crean sin tienda activa van a TIENDA_POR_DEFECTO; sin
+ninguna de las dos, guardarlas es un error.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+import time
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.http import Http404
+from django.utils.cache import patch_vary_headers
+
+
+_tienda_actual = ContextVar('tienda_actual', default=None)
+
+# {codigo o dominio: id de tienda} por proceso; se recarga cada TIEMPO_MAPA
+# segundos para ver las tiendas creadas desde otros procesos
+TIEMPO_MAPA = 60
+_mapa_tiendas = None
+_mapa_cargado_en = 0.0
+
+
+def tienda_actual_id():
+    """Id de la tienda activa, o None si no hay ninguna."""
+    return _tienda_actual.get()
+
+
+@contextmanager
+def usar_tienda(tienda):
+    """Activa `tienda` (instancia o id) dentro del bloque."""
+    token = _tienda_actual.set(getattr(tienda, 'pk', tienda))
+    try:
+        yield
+    finally:
+        _tienda_actual.reset(token)
+
+
+def clave_cache(tienda_id, *partes):
+    """Clave de caché con el espacio de nombres de la tienda."""
+    return ':'.join(['tienda', str(tienda_id if tienda_id is not None else '-'), *map(str, partes)])
+
+
+def _tiendas():
+    global _mapa_tiendas, _mapa_cargado_en
+    if _mapa_tiendas is None or time.monotonic() - _mapa_cargado_en > TIEMPO_MAPA:
+        from .models import Tienda
+        mapa = {}
+        for pk, codigo, dominio in Tienda.objects.values_list('pk', 'codigo', 'dominio'):
+            mapa[codigo] = pk
+            if dominio:
+                mapa[dominio.lower()] = pk
+        _mapa_tiendas, _mapa_cargado_en = mapa, time.monotonic()
+    return _mapa_tiendas
+
+
+def tienda_por_defecto_id():
+    """Id de la tienda TIENDA_POR_DEFECTO, o None si no está configurada o no existe."""
+    codigo = getattr(settings, 'TIENDA_POR_DEFECTO', None)
+    return _tiendas().get(codigo) if codigo else None
+
+
+def olvidar_tiendas(**kwargs):
+    """Descarta el mapa de tiendas en memoria (se recarga en el próximo request)."""
+    global _mapa_tiendas
+    _mapa_tiendas = None
+
+
+def conectar_senales():
+    from .models import Tienda
+    post_save.connect(olvidar_tiendas, sender=Tienda, dispatch_uid='tiendas_guardada')
+    post_delete.connect(olvidar_tiendas, sender=Tienda, dispatch_uid='tiendas_borrada')
+
+
+def resolver_tienda(request):
+    """
+    Id de la tienda del request: el header TIENDA_HEADER (código) si está
+    configurado y viene, si no el host y si no TIENDA_POR_DEFECTO.
+    """
+    tiendas = _tiendas()
+    header = getattr(settings, 'TIENDA_HEADER', None)
+    codigo = request.headers.get(header) if header else None
+    if codigo:
+        return tiendas.get(codigo)
+    tienda_id = tiendas.get(request.get_host().split(':')[0].lower())
+    return tienda_id if tienda_id is not None else tienda_por_defecto_id()
+
+
+def variar_por_tienda(vista):
+    """
+    Agrega TIENDA_HEADER al Vary de la respuesta, si está configurado. La
+    tienda que sale del host no lo necesita: el host ya es parte de la URL.
+    """
+    @wraps(vista)
+    def envuelta(request, *args, **kwargs):
+        response = vista(request, *args, **kwargs)
+        header = getattr(settings, 'TIENDA_HEADER', None)
+        if header:
+            patch_vary_headers(response, [header])
+        return response
+    return envuelta
+
+
+class TiendaMiddleware:
+    """Activa la tienda del request durante toda la vista; sin tienda, 404."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.tienda_id = resolver_tienda(request)
+        if request.tienda_id is None:
+            raise Http404('Tienda no encontrada')
+        with usar_tienda(request.tienda_id):
+            return self.get_response(request)
@@ -15,13 +15,21 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('about/', views.about, name='about'),
     path('contacto/', views.contacto, name='contacto'),
-    #path('shop/', views.shop, name='shop'),
+    path('shop/', views.shop, name='shop'),
+    path('carrito/', views.CarritoView, name='carrito'),
+    path('carrito/agregar/<int:pk>/', views.CarritoAgregarView, name='carrito_agregar'),
+    path('carrito/quitar/<int:pk>/', views.CarritoQuitarView, name='carrito_quitar'),
+    path('carrito/confirmar/', views.CheckoutView, name='checkout'),
+    path('pedidos/<int:pk>/', views.PedidoView, name='pedido'),
     path('crear_producto/', ProductoCreateView, name='crear'),
     path('producto_detalle/<int:pk>/', ProductoDetailView, name='detalle'),
     path('<int:pk>/editar/', ProductoEditView, name='editar'),
     path('<int:pk>/eliminar/', ProductoDeleteView, name='delete'),
     path('lista/', ProductoListView, name='lista_productos'),
-    path('login/', CustomLoginView, name='login'),
+    path('lista/<int:pk>/fila/', views.ProductoFilaView, name='fila_producto'),
+    path('categorias/<int:pk>/estadisticas/', views.EstadisticasCategoriaView, name='estadisticas_categoria'),
+    path('etiquetas/nube/', views.NubeEtiquetasView, name='nube_etiquetas'),
+    path('login/', CustomLoginView.as_view(), name='login'),
     path('logout/', LogoutView.as_view(next_page=reverse_lazy('productos:index')), name='logout'),
     path('registro/', RegistroView.as_view(), name='registro'),
 ]
@@ -1,10 +1,28 @@
+from decimal import Decimal, InvalidOperation
+
 from django.shortcuts import redirect, render, get_object_or_404
+from django.http import Http404, JsonResponse
+from django.db.models.functions import Coalesce
 from django.contrib.auth.decorators import login_required
-from .models import Producto
+from django.core.paginator import Paginator
+from django.views.decorators.http import require_POST
+from .models import Producto, Categoria, Pedido, DetalleProducto, Stock
+from .borrado import borrar_producto, resumen_borrado
+from .auditoria import registro_de_cambios
+from .estadisticas import estadisticas_categoria
+from .categorias import migas
+from .dimensiones import parsear_dimensiones
+from .etiquetas import nube
+from .recomendaciones import relacionados
+from .carrito import Carrito, CarritoVacio, PreciosCambiados, confirmar_pedido
+from .inventario import StockInsuficiente
+from .tiendas import tienda_actual_id, variar_por_tienda
+from rendimiento.respuestas import condicion
 from django.contrib.auth.views import LoginView, LogoutView
 from django.contrib.auth.forms import UserCreationForm
 from django.views.generic import CreateView
 from django.urls import reverse_lazy
+from django.utils.http import url_has_allowed_host_and_scheme
 
 class CustomLoginView(LoginView):
     template_name = 'productos/login.html'
@@ -40,13 +58,185 @@ def about(request):
 def contacto(request):
     return render(request, 'productos/contacto.html')
 
+PRODUCTOS_POR_PAGINA = 9
+
+def shop(request):
+    productos = Producto.objects.only('id', 'nombre', 'precio').order_by('nombre', 'pk')
+    pagina = Paginator(productos, PRODUCTOS_POR_PAGINA).get_page(request.GET.get('page'))
+    return render(request, 'productos/shop.html', {
+        'productos': pagina.object_list,
+        'pagina': pagina,
+        'carrito': Carrito.desde_request(request),
+    })
+
+def _volver(request):
+    # Vuelve a la página desde la que se agregó, si es de este sitio
+    destino = request.META.get('HTTP_REFERER')
+    if destino and url_has_allowed_host_and_scheme(destino, allowed_hosts={request.get_host()}):
+        return redirect(destino)
+    return redirect('productos:shop')
+
+# El carrito va en una cookie firmada: agregar y quitar no consultan la base de datos
+@require_POST
+def CarritoAgregarView(request, pk):
+    carrito = Carrito.desde_request(request)
+    try:
+        cantidad = int(request.POST.get('cantidad', 1))
+    except ValueError:
+        cantidad = 1
+    carrito.agregar(pk, cantidad)
+    return carrito.guardar(_volver(request))
+
+@require_POST
+def CarritoQuitarView(request, pk):
+    carrito = Carrito.desde_request(request)
+    carrito.quitar(pk)
+    return carrito.guardar(redirect('productos:carrito'))
+
+def CarritoView(request, error=None):
+    carrito = Carrito.desde_request(request)
+    lineas, total = carrito.detalle()
+    return render(request, 'productos/carrito.html', {
+        'carrito': carrito,
+        'lineas': lineas,
+        'total': total,
+        'error': error,
+    })
+
+@login_required
+@require_POST
+def CheckoutView(request):
+    carrito = Carrito.desde_request(request)
+    try:
+        pedido = confirmar_pedido(carrito, request.user, request.POST.get('total'))
+    except PreciosCambiados:
+        return CarritoView(request, error='Los precios cambiaron. Revisa el total antes de confirmar.')
+    except StockInsuficiente:
+        return CarritoView(request, error='No hay stock suficiente para alguno de los productos.')
+    except CarritoVacio:
+        return redirect('productos:shop')
+    carrito.vaciar()
+    return carrito.guardar(redirect('productos:pedido', pk=pedido.pk))
+
+@login_required
+def PedidoView(request, pk):
+    pedido = get_object_or_404(Pedido.objects.prefetch_related('lineas'), pk=pk, usuario=request.user)
+    return render(request, 'productos/pedido.html', {'pedido': pedido})
+
+def _decimal(valor):
+    # NaN e Infinity son Decimal válidos pero no sirven de límite: el filtro fallaría en la base
+    try:
+        valor = Decimal(valor) if valor else None
+    except InvalidOperation:
+        return None
+    return valor if valor is not None and valor.is_finite() else None
+
+def _filtrar_catalogo(productos, parametros):
+    """Filtros del catálogo: rango de precio, peso máximo y caja en la que debe entrar."""
+    filtros = {
+        'precio_min': parametros.get('precio_min', ''),
+        'precio_max': parametros.get('precio_max', ''),
+        'peso_max': parametros.get('peso_max', ''),
+        'caja': parametros.get('caja', ''),
+    }
+    if _decimal(filtros['precio_min']) is not None:
+        productos = productos.filter(precio__gte=_decimal(filtros['precio_min']))
+    if _decimal(filtros['precio_max']) is not None:
+        productos = productos.filter(precio__lte=_decimal(filtros['precio_max']))
+    if _decimal(filtros['peso_max']) is not None:
+        productos = productos.filter(detalleproducto__peso__lte=_decimal(filtros['peso_max']))
+    caja = parsear_dimensiones(filtros['caja'])
+    if caja:
+        # Medidas y caja van de mayor a menor: entra si cada medida cabe en la de la caja
+        largo, ancho, alto = caja
+        productos = productos.filter(
+            detalleproducto__largo__lte=largo,
+            detalleproducto__ancho__lte=ancho,
+            detalleproducto__alto__lte=alto,
+        )
+    return productos, filtros
+
+FILAS_POR_PAGINA = 50
+# Más allá de esto el OFFSET no entra en un entero de 64 bits
+PAGINA_MAXIMA = (2 ** 63 - 1) // (FILAS_POR_PAGINA + 1)
+
+# La lista solo cambia si cambia alguno de estos modelos: con If-None-Match igual se contesta 304 sin renderizar
+lista_condicional = condicion(Producto, Stock, Categoria, DetalleProducto, extra=lambda request: tienda_actual_id())
+
+def _lista_productos():
+    # `disponible` sale del stock en la misma consulta (0 si el producto no tiene stock)
+    return Producto.objects.annotate(disponible=Coalesce('stock__cantidad', 0))
+
+def _pagina_de_filas(filas, numero, por_pagina=FILAS_POR_PAGINA):
+    """
+    Página `numero` de `filas` y si hay otra después. Trae una fila de más
+    en lugar de contar: la lista y su scroll infinito siguen en una consulta.
+    Una página vacía que no es la primera es un 404, como en Paginator.page().
+    """
+    try:
+        numero = max(int(numero), 1)
+    except (TypeError, ValueError):
+        numero = 1
+    if numero > PAGINA_MAXIMA:
+        raise Http404('Página fuera de rango')
+    desde = (numero - 1) * por_pagina
+    pagina = list(filas[desde:desde + por_pagina + 1])
+    if not pagina and numero > 1:
+        raise Http404('Página fuera de rango')
+    return pagina[:por_pagina], numero + 1 if len(pagina) > por_pagina else None
+
+@variar_por_tienda
+@lista_condicional
 def ProductoListView(request):
-    productos = Producto.objects.all()
-    return render(request, 'productos/lista_productos.html', {'productos': productos})
+    productos, contexto = _filtrar_catalogo(_lista_productos(), request.GET)
+    categoria_id = request.GET.get('categoria')
+    if categoria_id:
+        try:
+            categoria_id = int(categoria_id)
+        except ValueError:
+            raise Http404('Categoría no encontrada')
+        # Incluye las subcategorías: un prefijo de ruta, sin recorrer el árbol
+        categoria = get_object_or_404(Categoria.objects.only('id', 'nombre', 'ruta'), pk=categoria_id)
+        productos = productos.filter(categoria__ruta__startswith=categoria.ruta)
+        contexto.update(categoria=categoria, migas=migas(categoria))
+    contexto['productos'], contexto['siguiente'] = _pagina_de_filas(productos.order_by('pk'), request.GET.get('page'))
+    # Con ?parcial=1 (custom.js, scroll infinito) solo se renderizan las filas
+    parametros = request.GET.copy()
+    parametros.pop('page', None)
+    parametros.pop('parcial', None)
+    contexto['consulta'] = parametros.urlencode()
+    if request.GET.get('parcial'):
+        return render(request, 'productos/filas_productos.html', contexto)
+    return render(request, 'productos/lista_productos.html', contexto)
+
+@variar_por_tienda
+@lista_condicional
+def ProductoFilaView(request, pk):
+    """La fila de un producto en la lista, para refrescarla sin recargar la página."""
+    producto = get_object_or_404(_lista_productos(), pk=pk)
+    return render(request, 'productos/fila_producto.html', {'producto': producto})
 
 def ProductoDetailView(request, pk):
     producto = get_object_or_404(Producto, pk=pk)  
-    return render(request, 'productos/detalle_producto.html', {'producto': producto})   
+    return render(request, 'productos/detalle_producto.html', {
+        'producto': producto,
+        'relacionados': relacionados(producto),
+    })   
+
+def EstadisticasCategoriaView(request, pk):
+    # Rango de precios, histograma y conteo por etiqueta, calculados en la base de datos
+    datos = estadisticas_categoria(pk)
+    if datos is None:
+        raise Http404('Categoría no encontrada')
+    return JsonResponse(datos)
+
+def NubeEtiquetasView(request):
+    # Etiquetas más usadas con su peso; sale de la caché (los usos se mantienen al asignar)
+    try:
+        limite = max(1, min(int(request.GET.get('limite', 50)), 50))
+    except ValueError:
+        limite = 50
+    return JsonResponse({'etiquetas': nube(limite)})
 
 # Vistas protegidas (requieren login)
 @login_required
@@ -67,7 +257,9 @@ def ProductoEditView(request, pk):
         producto.nombre = request.POST.get('nombre')
         producto.descripcion = request.POST.get('descripcion')
         producto.precio = request.POST.get('precio')
-        producto.save()
+        # El precio anterior queda en el historial (CambioProducto)
+        with registro_de_cambios():
+            producto.save()
         return redirect('productos:detalle', pk=producto.pk)
     return render(request, 'productos/editar_producto.html', {'producto': producto})
 
@@ -75,6 +267,9 @@ def ProductoEditView(request, pk):
 def ProductoDeleteView(request, pk):    
     producto = get_object_or_404(Producto, pk=pk)  
     if request.method == 'POST':
-        producto.delete()
+        borrar_producto(producto)
         return redirect('productos:lista_productos')
-    return render(request, 'productos/eliminar_producto.html', {'producto': producto})
\ No newline at end of file
+    return render(request, 'productos/eliminar_producto.html', {
+        'producto': producto,
+        'resumen': resumen_borrado(producto),
+    })
\ No newline at end of file
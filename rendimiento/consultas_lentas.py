@@ -0,0 +1,246 @@
+# rendimiento/consultas_lentas.py
+"""
+Registro de consultas lentas con su plan de ejecución.
+
+Un execute wrapper en cada conexión mide todas las consultas. Las que pasan
+de UMBRAL_MS quedan registradas con:
+
+- la vista que las hizo (el nombre de URL, el mismo que usa metricas.py);
+- la línea del proyecto que las disparó, la más interna fuera de Django
+  (p. ej. academico/admin.py:40 en get_queryset), y las anteriores;
+- el plan: la primera vez que aparece cada forma de consulta en el
+  proceso se corre EXPLAIN con los mismos parámetros (EXPLAIN QUERY PLAN
+  en SQLite, EXPLAIN en MySQL, según el backend). Esa es la muestra: las
+  repeticiones de la misma consulta no vuelven a pagar un EXPLAIN.
+
+Del plan salen las alertas: recorrido completo de una tabla (SCAN sin
+índice en SQLite, type=ALL en MySQL), orden o agrupamiento en una tabla
+temporal y, para cada tabla recorrida entera, las columnas del WHERE que
+no tienen índice en el modelo (productos.Producto.nombre, ...).
+
+Los registros van a un buffer circular de CAPACIDAD lugares en la caché
+compartida: el lugar sale de un contador atómico (cache.incr), así todos
+los workers escriben en el mismo buffer sin leerlo antes. Lo leen el
+comando consultas_lentas y la página /rendimiento/consultas-lentas/ (solo
+staff). Con LocMemCache (desarrollo) cada proceso tiene su propio buffer:
+el comando no ve lo que registró runserver, la página sí.
+"""
+from contextvars import ContextVar
+import hashlib
+from pathlib import Path
+import re
+import time
+import traceback
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+
+from .metricas import vista_actual
+
+
+POR_DEFECTO = {
+    'UMBRAL_MS': 100,
+    'CAPACIDAD': 200,
+    # Segundos que un registro queda en el buffer
+    'DURACION': 60 * 60 * 24,
+}
+CLAVE = 'rendimiento:lentas'
+LARGO_SQL = 4000
+FORMAS_EXPLICADAS = 1000
+
+_dentro = ContextVar('consultas_lentas_dentro', default=False)
+_explicadas = set()
+_raiz = Path(settings.BASE_DIR).resolve()
+# Los middlewares y wrappers de esta app no son el origen de ninguna consulta
+_envolturas = {r.resolve() for r in Path(__file__).parent.glob('*.py') if r.name != 'tests.py'}
+
+
+def configuracion():
+    return {**POR_DEFECTO, **getattr(settings, 'RENDIMIENTO_CONSULTAS_LENTAS', {})}
+
+
+def huella(sql):
+    """La forma de la consulta: igual para `IN (%s, %s)` que para `IN (%s, %s, %s)`."""
+    forma = re.sub(r'\((?:%s, )*%s\)', '(...)', sql)
+    return hashlib.blake2b(forma.encode(), digest_size=8).hexdigest()
+
+
+def _pila():
+    """Líneas del proyecto en la pila actual (sin Django ni los wrappers), de afuera hacia adentro."""
+    lineas = []
+    for marco in traceback.extract_stack():
+        if marco.filename.startswith('<'):
+            continue
+        ruta = Path(marco.filename).resolve()
+        if ruta.is_relative_to(_raiz) and ruta not in _envolturas and 'site-packages' not in ruta.parts:
+            lineas.append(f'{ruta.relative_to(_raiz).as_posix()}:{marco.lineno} en {marco.name}')
+    return lineas[-5:]
+
+
+def _tablas():
+    from django.apps import apps
+
+    return {modelo._meta.db_table: modelo for modelo in apps.get_models(include_auto_created=True)}
+
+
+def _columnas_con_indice(modelo):
+    opciones = modelo._meta
+    columnas = {c.column for c in opciones.local_fields if c.primary_key or c.unique or c.db_index}
+    primeras = [indice.fields[0] for indice in opciones.indexes if indice.fields]
+    primeras += [juntos[0] for juntos in opciones.unique_together]
+    primeras += [r.fields[0] for r in opciones.constraints if getattr(r, 'fields', None)]
+    columnas.update(opciones.get_field(nombre.lstrip('-')).column for nombre in primeras)
+    return columnas
+
+
+def _columnas_filtradas(sql, tabla):
+    condicion = re.split(r'\bWHERE\b', sql, maxsplit=1)
+    if len(condicion) < 2:
+        return []
+    condicion = re.split(r'\b(?:GROUP BY|ORDER BY|LIMIT|HAVING)\b', condicion[1])[0]
+    patron = r'[`"]%s[`"]\.[`"](\w+)[`"]\s*(?:=|<|>|<=|>=|IN\b|LIKE\b|IS\b|BETWEEN\b)' % re.escape(tabla)
+    return list(dict.fromkeys(re.findall(patron, condicion)))
+
+
+def _recorridos(vendor, plan):
+    """(tablas recorridas enteras, hay orden/agrupamiento en tabla temporal) según el plan."""
+    enteras, temporal = [], False
+    if vendor == 'sqlite':
+        for *_, detalle in plan:
+            if detalle.startswith('SCAN ') and 'INDEX' not in detalle:
+                enteras.append(detalle.split()[1])
+            temporal |= detalle.startswith('USE TEMP B-TREE')
+    else:
+        for fila in plan:
+            if str(fila.get('type', '')).upper() == 'ALL':
+                enteras.append(fila.get('table'))
+            extra = str(fila.get('Extra') or '')
+            temporal |= 'Using filesort' in extra or 'Using temporary' in extra
+    return enteras, temporal
+
+
+def _tabla_de_alias(sql, nombre):
+    """Las subconsultas de Django usan alias (U0, T3): "tabla" U0."""
+    encontrada = re.search(r'[`"](\w+)[`"] (?:AS )?[`"]?%s[`"]?[\s),]' % re.escape(nombre), sql)
+    return encontrada.group(1) if encontrada else nombre
+
+
+def alertas(vendor, sql, plan):
+    """Recorridos completos, tablas temporales e índices que faltan, en palabras."""
+    enteras, temporal = _recorridos(vendor, plan)
+    tablas = _tablas()
+    encontradas = []
+    for nombre in enteras:
+        tabla = _tabla_de_alias(sql, nombre)
+        modelo = tablas.get(tabla)
+        if modelo is None:
+            continue  # tabla derivada (subquery) o de otra app sin modelo
+        encontradas.append(f'Recorre toda la tabla de {modelo._meta.label}')
+        indexadas = _columnas_con_indice(modelo)
+        for columna in _columnas_filtradas(sql, tabla) + _columnas_filtradas(sql, nombre):
+            if columna not in indexadas:
+                encontradas.append(f'Falta un índice en {modelo._meta.label}.{columna}')
+    if temporal:
+        encontradas.append('Ordena o agrupa en una tabla temporal (ORDER BY / GROUP BY sin índice)')
+    return encontradas
+
+
+def _explicar(connection, sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+        if connection.vendor == 'sqlite':
+            return [tuple(fila) for fila in cursor.fetchall()]
+        columnas = [c[0] for c in cursor.description]
+        return [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+
+
+def _guardar(entrada):
+    conf = configuracion()
+    try:
+        numero = cache.incr(f'{CLAVE}:n')
+    except ValueError:
+        cache.add(f'{CLAVE}:n', 0, None)
+        numero = cache.incr(f'{CLAVE}:n')
+    cache.set(f'{CLAVE}:{numero % conf["CAPACIDAD"]}', entrada, conf['DURACION'])
+
+
+def registrar(connection, sql, params, milisegundos):
+    forma = huella(sql)
+    entrada = {
+        'sql': sql[:LARGO_SQL], 'huella': forma, 'ms': round(milisegundos, 2), 'alias': connection.alias,
+        'vista': vista_actual(), 'pila': _pila(), 'cuando': time.time(), 'plan': None, 'alertas': [],
+    }
+    consulta = sql.lstrip().upper()
+    if forma not in _explicadas and consulta.startswith(('SELECT', 'WITH')) and len(_explicadas) < FORMAS_EXPLICADAS:
+        _explicadas.add(forma)
+        try:
+            entrada['plan'] = _explicar(connection, sql, params)
+        except DatabaseError as error:
+            entrada['plan'] = [f'EXPLAIN falló: {error}']
+        else:
+            entrada['alertas'] = alertas(connection.vendor, sql, entrada['plan'])
+    _guardar(entrada)
+
+
+def _medir(execute, sql, params, many, context):
+    if _dentro.get():
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    resultado = execute(sql, params, many, context)
+    milisegundos = (time.perf_counter() - inicio) * 1000
+    if milisegundos >= configuracion()['UMBRAL_MS'] and not many:
+        token = _dentro.set(True)
+        try:
+            registrar(context['connection'], sql, params, milisegundos)
+        finally:
+            _dentro.reset(token)
+    return resultado
+
+
+def _conexion_creada(sender, connection, **kwargs):
+    if _medir not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_medir)
+
+
+def conectar():
+    """Instala el wrapper en cada conexión nueva. Se llama una vez desde RendimientoConfig.ready()."""
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    connection_created.connect(_conexion_creada, dispatch_uid='consultas_lentas')
+    for conexion in connections.all(initialized_only=True):
+        _conexion_creada(None, conexion)
+
+
+def registradas():
+    """Los registros del buffer, del más nuevo al más viejo."""
+    capacidad = configuracion()['CAPACIDAD']
+    entradas = cache.get_many([f'{CLAVE}:{i}' for i in range(capacidad)]).values()
+    return sorted(entradas, key=lambda e: e['cuando'], reverse=True)
+
+
+def vaciar():
+    capacidad = configuracion()['CAPACIDAD']
+    cache.delete_many([f'{CLAVE}:n', *(f'{CLAVE}:{i}' for i in range(capacidad))])
+    _explicadas.clear()
+
+
+def resumen():
+    """Registros agrupados por forma de consulta, las que más tiempo suman primero."""
+    grupos = {}
+    for entrada in registradas():
+        grupo = grupos.setdefault(entrada['huella'], {
+            'sql': entrada['sql'], 'veces': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+            'vistas': set(), 'pila': entrada['pila'], 'plan': None, 'alertas': [],
+        })
+        grupo['veces'] += 1
+        grupo['total_ms'] += entrada['ms']
+        grupo['max_ms'] = max(grupo['max_ms'], entrada['ms'])
+        grupo['vistas'].add(entrada['vista'])
+        if entrada['plan'] is not None and grupo['plan'] is None:
+            grupo['plan'], grupo['alertas'] = entrada['plan'], entrada['alertas']
+    for grupo in grupos.values():
+        grupo['vistas'] = sorted(grupo['vistas'])
+        grupo['promedio_ms'] = grupo['total_ms'] / grupo['veces']
+    return sorted(grupos.values(), key=lambda g: g['total_ms'], reverse=True)
@@ -0,0 +1,41 @@
+# rendimiento/lotes.py
+"""
+Borrado en lotes sin pasar por el Collector de Django.
+
+`Model.delete()` carga en memoria cada fila dependiente antes de borrarla.
+`borrar_en_lotes()` borra con DELETE ... WHERE id IN (...) de a
+`tamano_lote` ids, cada lote en su propia transacción: ningún lote deja la
+tabla bloqueada mucho tiempo, pero el borrado completo no es atómico.
+
+Por eso los borrados de cada app (productos/borrado.py,
+voluntariado/borrado.py, academico/borrado.py) van de las hojas hacia la
+raíz y borran la raíz al final. Si algo falla a mitad de camino, la raíz
+sigue existiendo con parte de sus dependientes ya borrados, y volver a
+llamar al mismo borrado termina el trabajo: cada paso vuelve a buscar lo
+que queda y un paso ya hecho no encuentra nada. Los pasos que además
+actualizan contadores tienen que hacerlo en la misma transacción que el
+DELETE, para que repetirlos no descuente dos veces.
+
+Al ser SQL directo no se emiten las señales pre_delete/post_delete.
+"""
+from django.db import connection, transaction
+
+
+TAMANO_LOTE = 1000
+
+
+def borrar_en_lotes(queryset, tamano_lote=TAMANO_LOTE):
+    """Borra las filas de `queryset` en lotes de `tamano_lote` ids. Devuelve el total borrado."""
+    modelo = queryset.model
+    tabla = connection.ops.quote_name(modelo._meta.db_table)
+    columna_pk = connection.ops.quote_name(modelo._meta.pk.column)
+    ids_pendientes = queryset.order_by('pk').values_list('pk', flat=True)
+    total = 0
+    while True:
+        ids = list(ids_pendientes[:tamano_lote])
+        if not ids:
+            return total
+        marcadores = ', '.join(['%s'] * len(ids))
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {tabla} WHERE {columna_pk} IN ({marcadores})', ids)
+            total += cursor.rowcount
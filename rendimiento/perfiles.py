@@ -0,0 +1,176 @@
+# rendimiento/perfiles.py
+"""
+Perfiles de settings compartidos por los tres proyectos: dev, bench y prod.
+
+Cada settings.py deja lo propio del proyecto (apps, base de datos, urls) y
+termina con `aplicar_perfil(globals())`. El perfil sale de la variable de
+entorno DJANGO_PERFIL (dev por defecto, que no cambia nada):
+
+- bench: lo mismo que producción pero en la máquina local, para medir.
+  DEBUG apagado (con DEBUG cada consulta queda guardada en
+  connection.queries y la memoria crece sin límite bajo carga), plantillas
+  cacheadas, conexiones persistentes, sesiones cached_db y logs en WARNING
+  (salvo los loggers de RENDIMIENTO_LOGS_INFO, que el proyecto define antes
+  de aplicar el perfil: p. ej. los tiempos por lote de un envío masivo).
+  Caché local en memoria salvo que se defina REDIS_URL.
+- prod: bench más SECRET_KEY, ALLOWED_HOSTS y REDIS_URL desde el entorno
+  y estáticos con nombre hasheado (ManifestStaticFilesStorage, se pueden
+  cachear para siempre). La caché es Redis, sin alternativa: las versiones
+  de los ETags (versiones.py) y el buffer de consultas_lentas.py necesitan
+  que todos los workers vean la misma caché y que cache.incr sea atómico,
+  y FileBasedCache lo implementa como leer, sumar y escribir.
+
+`problemas()` revisa los settings ya cargados y devuelve lo que cuesta
+rendimiento; lo usan el comando revisar_rendimiento y `check --deploy`.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+PERFILES = ('dev', 'bench', 'prod')
+CARGADOR_CACHEADO = 'django.template.loaders.cached.Loader'
+# Segundos que una conexión a la base se reusa entre requests
+CONN_MAX_AGE = 60
+# Backends de caché compartidos con cache.incr atómico
+CACHES_ATOMICAS = ('RedisCache', 'PyMemcacheCache', 'PyLibMCCache')
+
+
+def perfil_activo():
+    return os.environ.get('DJANGO_PERFIL', 'dev')
+
+
+def _requerido(variable):
+    valor = os.environ.get(variable)
+    if not valor:
+        raise ImproperlyConfigured(f'El perfil prod necesita la variable de entorno {variable}')
+    return valor
+
+
+def _caches(perfil):
+    redis = _requerido('REDIS_URL') if perfil == 'prod' else os.environ.get('REDIS_URL')
+    if redis:
+        backend = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': redis}
+    else:
+        backend = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'OPTIONS': {'MAX_ENTRIES': 10000}}
+    return {'default': backend}
+
+
+def _logging(nivel, en_info=()):
+    return {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'handlers': {'consola': {'class': 'logging.StreamHandler'}},
+        'root': {'handlers': ['consola'], 'level': nivel},
+        'loggers': {
+            # En DEBUG este logger formatea cada consulta SQL
+            'django.db.backends': {'level': 'WARNING', 'propagate': True},
+            **{nombre: {'level': 'INFO', 'propagate': True} for nombre in en_info},
+        },
+    }
+
+
+def _cacheado(cargadores):
+    return any(isinstance(c, (list, tuple)) and c[0] == CARGADOR_CACHEADO for c in cargadores)
+
+
+def _plantillas_cacheadas(plantillas):
+    for plantilla in plantillas:
+        if plantilla['BACKEND'] != 'django.template.backends.django.DjangoTemplates':
+            continue
+        opciones = plantilla.setdefault('OPTIONS', {})
+        cargadores = opciones.get('loaders') or ['django.template.loaders.filesystem.Loader']
+        if plantilla.pop('APP_DIRS', False) and 'django.template.loaders.app_directories.Loader' not in cargadores:
+            cargadores = [*cargadores, 'django.template.loaders.app_directories.Loader']
+        if not _cacheado(cargadores):
+            cargadores = [(CARGADOR_CACHEADO, cargadores)]
+        opciones['loaders'] = cargadores
+        opciones['debug'] = False
+
+
+def aplicar_perfil(ajustes, perfil=None):
+    """Ajusta el diccionario de settings (el globals() de settings.py) al perfil. Devuelve el perfil."""
+    perfil = perfil or perfil_activo()
+    if perfil not in PERFILES:
+        raise ImproperlyConfigured(f'DJANGO_PERFIL debe ser uno de {", ".join(PERFILES)}, no {perfil!r}')
+    ajustes['PERFIL'] = perfil
+    if perfil == 'dev':
+        return perfil
+
+    base_dir = ajustes['BASE_DIR']
+    ajustes['DEBUG'] = False
+    for base in ajustes['DATABASES'].values():
+        base['CONN_MAX_AGE'] = CONN_MAX_AGE
+        base['CONN_HEALTH_CHECKS'] = True
+    _plantillas_cacheadas(ajustes['TEMPLATES'])
+    ajustes['CACHES'] = _caches(perfil)
+    ajustes['SESSION_ENGINE'] = 'django.contrib.sessions.backends.cached_db'
+    ajustes['LOGGING'] = _logging(os.environ.get('DJANGO_LOG_LEVEL', 'WARNING'), ajustes.get('RENDIMIENTO_LOGS_INFO', ()))
+
+    if perfil == 'bench':
+        ajustes['ALLOWED_HOSTS'] = ['localhost', '127.0.0.1', 'testserver']
+    else:
+        ajustes['SECRET_KEY'] = _requerido('DJANGO_SECRET_KEY')
+        ajustes['ALLOWED_HOSTS'] = _requerido('DJANGO_ALLOWED_HOSTS').split(',')
+        ajustes.setdefault('STATIC_ROOT', base_dir / 'staticfiles')
+        ajustes['STORAGES'] = {
+            'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+            'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'},
+        }
+    return perfil
+
+
+def problemas():
+    """[(código, mensaje)] de los settings actuales que cuestan rendimiento."""
+    from django.conf import settings
+
+    from .metricas import configuracion as configuracion_metricas
+
+    perfil = getattr(settings, 'PERFIL', 'dev')
+    encontrados = []
+    if settings.DEBUG:
+        encontrados.append(('R001', 'DEBUG está activo: cada consulta queda en connection.queries y la memoria crece'))
+    for alias, base in settings.DATABASES.items():
+        if not base.get('CONN_MAX_AGE') and perfil != 'dev':
+            encontrados.append(('R002', f'La base {alias!r} abre una conexión nueva en cada request (CONN_MAX_AGE=0)'))
+        if perfil == 'prod' and base['ENGINE'].endswith('sqlite3'):
+            encontrados.append(('R003', f'La base {alias!r} es SQLite: serializa todas las escrituras'))
+    backend = settings.CACHES['default']['BACKEND']
+    if backend.endswith('DummyCache'):
+        encontrados.append(('R004', 'La caché es DummyCache: las cachés del proyecto nunca aciertan'))
+    elif backend.endswith('LocMemCache') and perfil == 'prod':
+        encontrados.append(('R005', 'La caché es local de cada proceso: los workers no comparten versiones ni invalidaciones'))
+    elif perfil == 'prod' and not backend.endswith(CACHES_ATOMICAS):
+        encontrados.append(('R014', 'cache.incr no es atómico en esta caché: los workers pisan versiones y contadores'))
+    for plantilla in settings.TEMPLATES:
+        opciones = plantilla.get('OPTIONS', {})
+        cargadores = opciones.get('loaders')
+        if cargadores and not _cacheado(cargadores):
+            encontrados.append(('R006', 'Las plantillas se leen y compilan en cada render (sin cached.Loader)'))
+    if settings.SESSION_ENGINE == 'django.contrib.sessions.backends.db' and perfil != 'dev':
+        encontrados.append(('R007', 'Las sesiones van a la base en cada request: usar cached_db'))
+    nivel_sql = settings.LOGGING.get('loggers', {}).get('django.db.backends', {}).get('level')
+    if nivel_sql == 'DEBUG':
+        encontrados.append(('R008', 'El logger django.db.backends está en DEBUG: formatea cada consulta SQL'))
+    if 'rendimiento.respuestas.CompresionMiddleware' not in settings.MIDDLEWARE:
+        encontrados.append(('R009', 'Las respuestas salen sin comprimir (falta CompresionMiddleware)'))
+    elif 'django.middleware.gzip.GZipMiddleware' in settings.MIDDLEWARE:
+        encontrados.append(('R010', 'GZipMiddleware y CompresionMiddleware juntos: sobra uno'))
+    if settings.MIDDLEWARE[:1] != ['rendimiento.arranque.SaludMiddleware']:
+        encontrados.append(('R012', '/healthz y /readyz pasan por sesiones y autenticación (SaludMiddleware no va primero)'))
+    metricas = configuracion_metricas()
+    if perfil == 'prod' and not metricas['DIRECTORIO']:
+        encontrados.append(('R013', '/metrics muestra solo el worker que contesta (falta DJANGO_METRICAS_DIR)'))
+    if perfil == 'prod' and not metricas['TOKEN'] and not metricas['IPS']:
+        encontrados.append(('R015', '/metrics no contesta a nadie (falta DJANGO_METRICAS_TOKEN)'))
+    almacen = settings.STORAGES['staticfiles']['BACKEND']
+    if perfil == 'prod' and 'Manifest' not in almacen:
+        encontrados.append(('R011', 'Los estáticos no llevan hash en el nombre: no se pueden cachear a largo plazo'))
+    return encontrados
+
+
+def revisar(app_configs=None, **kwargs):
+    """Los problemas() como advertencias del framework de checks (manage.py check --deploy)."""
+    from django.core.checks import Warning
+
+    return [Warning(mensaje, id=f'rendimiento.{codigo}') for codigo, mensaje in problemas()]
@@ -0,0 +1,163 @@
+# tareas/cola.py
+"""
+Cola de tareas en la base de datos, sin broker externo.
+
+`encolar()` inserta una fila en Tarea; como es una fila más, si la
+transacción del request se deshace la tarea desaparece con ella, y el worker
+no la ve hasta que se confirma. El comando run_worker toma lotes de tareas
+y las ejecuta en un pool de hilos (o de procesos).
+
+Tomar tareas: en MySQL/PostgreSQL con `SELECT ... FOR UPDATE SKIP LOCKED`,
+así varios workers toman lotes distintos sin esperarse. SQLite no tiene
+bloqueo por fila: ahí cada tarea se toma con un UPDATE condicional
+(`WHERE estado = 'P'`) y solo un worker gana cada una.
+
+Los fallos se reintentan con espera exponencial (RETRASO_BASE · 2^intentos,
+hasta RETRASO_MAXIMO) y al agotar `max_intentos` la tarea queda FALLIDA con
+el traceback en `error`.
+
+Mientras ejecuta, cada proceso del worker renueva `tomada_en` de sus tareas
+(`latido()`, cada trabajador.INTERVALO_LATIDO segundos). Una tarea EN_CURSO
+sin latido hace MINUTOS_ABANDONO es de un worker caído o colgado:
+`recuperar_abandonadas()` la cuenta como un intento fallido y la devuelve a
+PENDIENTE o, si ya agotó `max_intentos`, la deja FALLIDA. Así una tarea que
+tumba al worker cada vez no se reintenta para siempre, y una que solo tarda
+mucho no se ejecuta dos veces.
+"""
+from datetime import timedelta
+import os
+import socket
+import threading
+import traceback
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Tarea
+
+
+RETRASO_BASE = 2
+RETRASO_MAXIMO = 60 * 60
+# Una tarea EN_CURSO sin latido hace más que esto se da por abandonada (worker caído)
+MINUTOS_ABANDONO = 15
+
+
+def nombre_proceso():
+    return f'{socket.gethostname()}:{os.getpid()}:'
+
+
+def nombre_trabajador():
+    return f'{nombre_proceso()}{threading.get_ident()}'
+
+
+def _ruta(funcion):
+    if isinstance(funcion, str):
+        return funcion
+    return f'{funcion.__module__}.{funcion.__qualname__}'
+
+
+def encolar(funcion, *args, demora=0, max_intentos=5, **kwargs):
+    """
+    Encola `funcion(*args, **kwargs)`. `funcion` es una función de nivel de
+    módulo o su ruta importable; los argumentos deben ser serializables a JSON.
+    """
+    ahora = timezone.now()
+    return Tarea.objects.create(
+        funcion=_ruta(funcion),
+        argumentos={'args': list(args), 'kwargs': kwargs},
+        max_intentos=max_intentos,
+        creada_en=ahora,
+        disponible_en=ahora + timedelta(seconds=demora),
+    )
+
+
+def retraso(intentos):
+    """Segundos de espera antes del reintento número `intentos`."""
+    return min(RETRASO_BASE * 2 ** (intentos - 1), RETRASO_MAXIMO)
+
+
+def tomar(lote=10, trabajador=None):
+    """Marca como EN_CURSO hasta `lote` tareas disponibles y las devuelve."""
+    trabajador = trabajador or nombre_trabajador()
+    ahora = timezone.now()
+    disponibles = Tarea.objects.filter(estado=Tarea.PENDIENTE, disponible_en__lte=ahora).order_by('disponible_en', 'pk')
+    cambios = {'estado': Tarea.EN_CURSO, 'tomada_en': ahora, 'tomada_por': trabajador}
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(disponibles.select_for_update(skip_locked=True).values_list('pk', flat=True)[:lote])
+            Tarea.objects.filter(pk__in=ids).update(**cambios)
+    else:
+        ids = [
+            pk for pk in disponibles.values_list('pk', flat=True)[:lote]
+            if Tarea.objects.filter(pk=pk, estado=Tarea.PENDIENTE).update(**cambios)
+        ]
+    return list(Tarea.objects.filter(pk__in=ids).order_by('disponible_en', 'pk'))
+
+
+def _propia(tarea):
+    """La tarea, si sigue en curso a nombre de quien la tomó (no fue recuperada y tomada por otro)."""
+    return Tarea.objects.filter(pk=tarea.pk, estado=Tarea.EN_CURSO, tomada_por=tarea.tomada_por)
+
+
+def ejecutar(tarea):
+    """Ejecuta una tarea ya tomada y registra el resultado. Devuelve True si terminó bien."""
+    try:
+        funcion = import_string(tarea.funcion)
+        funcion(*tarea.argumentos.get('args', []), **tarea.argumentos.get('kwargs', {}))
+    except Exception:
+        intentos = tarea.intentos + 1
+        ahora = timezone.now()
+        cambios = {'intentos': intentos, 'error': traceback.format_exc()}
+        if intentos >= tarea.max_intentos:
+            cambios.update(estado=Tarea.FALLIDA, terminada_en=ahora)
+        else:
+            cambios.update(estado=Tarea.PENDIENTE, disponible_en=ahora + timedelta(seconds=retraso(intentos)))
+        _propia(tarea).update(**cambios)
+        return False
+    _propia(tarea).update(
+        estado=Tarea.HECHA, terminada_en=timezone.now(), error=''
+    )
+    return True
+
+
+def procesar(lote=10, trabajador=None):
+    """Toma un lote y lo ejecuta en este hilo. Devuelve cuántas tareas ejecutó."""
+    tareas = tomar(lote, trabajador)
+    for tarea in tareas:
+        ejecutar(tarea)
+    return len(tareas)
+
+
+def latido(proceso=None):
+    """Renueva `tomada_en` de las tareas EN_CURSO de los hilos de `proceso` (este, por defecto)."""
+    proceso = proceso or nombre_proceso()
+    return Tarea.objects.filter(estado=Tarea.EN_CURSO, tomada_por__startswith=proceso).update(
+        tomada_en=timezone.now()
+    )
+
+
+def recuperar_abandonadas(minutos=MINUTOS_ABANDONO):
+    """
+    Las tareas EN_CURSO sin latido hace `minutos` cuentan un intento: vuelven
+    a PENDIENTE o, si agotaron `max_intentos`, quedan FALLIDA. Devuelve
+    cuántas recuperó.
+    """
+    ahora = timezone.now()
+    abandonadas = Tarea.objects.filter(estado=Tarea.EN_CURSO, tomada_en__lt=ahora - timedelta(minutes=minutos))
+    cambios = {
+        'intentos': F('intentos') + 1,
+        'error': f'Abandonada: su worker no dio señales en {minutos} minutos',
+    }
+    with transaction.atomic():
+        fallidas = abandonadas.filter(intentos__gte=F('max_intentos') - 1).update(
+            estado=Tarea.FALLIDA, terminada_en=ahora, **cambios
+        )
+        return fallidas + abandonadas.update(estado=Tarea.PENDIENTE, disponible_en=ahora, **cambios)
+
+
+def purgar_terminadas(dias=7):
+    """Borra las tareas HECHAS hace más de `dias` días."""
+    limite = timezone.now() - timedelta(days=dias)
+    return Tarea.objects.filter(estado=Tarea.HECHA, terminada_en__lt=limite).delete()[0]